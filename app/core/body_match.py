@@ -0,0 +1,104 @@
+"""Match do corpo da requisição (`request.body` + `request.body_match` do mock).
+
+- exact (padrão): JSON igual pelo `==` do Python (ordem de chaves irrelevante; true == 1 == 1.0) ou
+  texto igual. O corpo esperado vira uma chave canônica com hash na escrita e o recebido é
+  canonicalizado uma única vez por requisição, então o teste por candidato é uma comparação de bytes
+  (ou uma busca em dict quando há muitos no mesmo URI).
+- partial: o corpo esperado é um subconjunto do recebido (objetos por chave, recursivamente;
+  listas com o mesmo tamanho, item a item).
+- jsonpath: `{"$.expr": valor, ...}`; todas as expressões precisam resultar no valor esperado.
+- regex: expressão regular buscada no texto bruto do corpo.
+"""
+from __future__ import annotations
+import hashlib, json, re
+from typing import Any, Callable, Optional, Tuple
+from ..utils.jsonpath import compile_jsonpath, parse_jsonpath
+
+BODY_MATCH_MODES = ("exact", "partial", "jsonpath", "regex")
+
+# (corpo decodificado, texto bruto) -> casa?
+BodyTest = Callable[[Any, str], bool]
+
+def _normalize(value: Any) -> Any:
+    # true, 1 e 1.0 têm a mesma forma canônica, como na igualdade (==) de dicts e listas do Python
+    if isinstance(value, bool): return int(value)
+    if isinstance(value, float) and value.is_integer(): return int(value)
+    if isinstance(value, dict): return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list): return [_normalize(v) for v in value]
+    return value
+
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+_TEXT = ord("t")
+
+def canonical_json(value: Any) -> str:
+    return _CANONICAL.encode(_normalize(value))
+
+def _digest(kind: bytes, text: str) -> bytes:
+    return kind + hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def exact_key(spec: Any) -> bytes:
+    """Chave do corpo esperado no modo exact: JSON canônico para objetos/listas, texto para o resto."""
+    if isinstance(spec, (dict, list)): return _digest(b"j", canonical_json(spec))
+    return _digest(b"t", str(spec))
+
+def is_text_key(key: bytes) -> bool:
+    return key[0] == _TEXT
+
+class RequestBodyKeys:
+    """Chaves do corpo recebido, calculadas no máximo uma vez por requisição e só as consultadas.
+
+    Um mock exact com corpo JSON compara com `json_key` (JSON canônico); com corpo texto, com
+    `text_key` (o texto recebido, ou o JSON compacto dele quando o corpo é JSON).
+    """
+    __slots__ = ("_body", "_json", "_text")
+
+    def __init__(self, body: Any):
+        self._body = body
+        self._json: Optional[bytes] = None
+        self._text: Optional[bytes] = None
+
+    def json_key(self) -> bytes:
+        if self._json is None:
+            self._json = _digest(b"j", canonical_json(self._body)) if isinstance(self._body, (dict, list)) else b""
+        return self._json
+
+    def text_key(self) -> bytes:
+        if self._text is None:
+            body = self._body
+            self._text = _digest(b"t", body if isinstance(body, str) else json.dumps(body, separators=(",", ":"), ensure_ascii=False))
+        return self._text
+
+    def matches(self, key: bytes) -> bool:
+        return key == (self.text_key() if key[0] == _TEXT else self.json_key())
+
+def _subset(spec: Any) -> Callable[[Any], bool]:
+    if isinstance(spec, dict):
+        items = tuple((k, _subset(v)) for k, v in spec.items())
+        return lambda v: isinstance(v, dict) and all(k in v and t(v[k]) for k, t in items)
+    if isinstance(spec, list):
+        tests = tuple(_subset(x) for x in spec)
+        return lambda v: isinstance(v, list) and len(v) == len(tests) and all(t(x) for t, x in zip(tests, v))
+    return lambda v: v == spec
+
+def compile_body_match(mode: str, spec: Any) -> Tuple[bytes, Optional[BodyTest]]:
+    """(assinatura, teste) do corpo esperado; no modo exact o teste é None e a assinatura é a chave.
+
+    A assinatura identifica o match (modo + corpo canônico) e entra na checagem de duplicidade.
+    Corpo incompatível com o modo, JSONPath ou regex inválidos geram ValueError.
+    """
+    if mode == "exact": return exact_key(spec), None
+    if mode == "partial":
+        if not isinstance(spec, (dict, list)): raise ValueError("body_match 'partial' requires a JSON object or array body")
+        test = _subset(spec)
+        return _digest(b"p", canonical_json(spec)), lambda body, text: test(body)
+    if mode == "jsonpath":
+        if not isinstance(spec, dict) or not spec: raise ValueError("body_match 'jsonpath' requires an object of {jsonpath: expected value}")
+        for expr in spec: parse_jsonpath(expr)
+        checks = tuple((compile_jsonpath(expr), expected) for expr, expected in spec.items())
+        return _digest(b"q", canonical_json(spec)), lambda body, text: all(get(body) == expected for get, expected in checks)
+    if mode == "regex":
+        if not isinstance(spec, str): raise ValueError("body_match 'regex' requires a string body")
+        try: search = re.compile(spec).search
+        except re.error as e: raise ValueError(f"Invalid body regex {spec!r}: {e}") from e
+        return _digest(b"r", spec), lambda body, text: search(text) is not None
+    raise ValueError(f"Unknown body_match mode: {mode!r}")
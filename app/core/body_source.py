@@ -0,0 +1,207 @@
+"""Corpos grandes servidos por streaming (`MockResponse.body_source`), com memória constante e Range.
+
+- file: arquivo sob MOCK_FILES_DIR. Com a extensão ASGI `http.response.zerocopysend`, o servidor faz
+  sendfile direto do descritor; sem ela, o arquivo é lido em fatias de STREAM_CHUNK_BYTES com
+  `os.pread` numa thread, sem bloquear o event loop.
+- generator: `count` registros JSON gerados a partir de `record` (NDJSON ou array JSON). Cada
+  registro é um molde de bytes com o índice nos buracos. O tamanho total e o offset de qualquer
+  registro saem em O(nº de dígitos), então Range funciona sem gerar o que vem antes.
+
+Em ambos, só uma fatia fica em memória por download. As respostas têm `Accept-Ranges: bytes` e um
+ETag (tamanho + mtime no arquivo, hash do molde no gerador); `Range: bytes=a-b` (um intervalo)
+responde 206, e fora do tamanho 416. `If-Range` e `If-None-Match` são respeitados.
+"""
+from __future__ import annotations
+import asyncio, hashlib, json, os, re, uuid
+from contextlib import aclosing
+from typing import Any, AsyncIterator, List, Optional, Tuple, Union
+import anyio.to_thread
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from ..models import BodySource
+from ..utils.paths import resolve_under
+from .chaos import ChaosPlan, Pacer, fault_headers, start_with_chaos
+from .config import MOCK_FILES_DIR, STREAM_CHUNK_BYTES
+from .responses import etag_matches
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+_INDEX = "{{index}}"
+_RANGE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """(início, fim inclusivo) de um `Range: bytes=...` com um intervalo; None = ignorar (malformado ou vários)."""
+    m = _RANGE.match(value)
+    if not m or (not m.group(1) and not m.group(2)): return None
+    if not m.group(1):
+        n = int(m.group(2))
+        if n == 0 or size == 0: raise RangeNotSatisfiable()
+        return max(0, size - n), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if m.group(2) and end < start: return None
+    if start >= size: raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+class FileSource:
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def stat(self) -> Tuple[int, str]:
+        st = os.stat(self.path)
+        return st.st_size, f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    async def chunks(self, start: int, length: int, chunk: int) -> AsyncIterator[bytes]:
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            while length > 0:
+                data = await anyio.to_thread.run_sync(os.pread, fd, min(chunk, length), start)
+                if not data: return  # arquivo encolheu: a conexão fecha com o corpo incompleto
+                start += len(data); length -= len(data)
+                yield data
+        finally:
+            os.close(fd)
+
+class GeneratorSource:
+    """Registro i = `str(i)` entre os trechos de `statics`, seguido de "\\n" (NDJSON) ou "," / "]" (array)."""
+    __slots__ = ("statics", "holes", "static_len", "count", "array", "size", "etag")
+
+    def __init__(self, record: Any, count: int, array: bool):
+        nonce = uuid.uuid4().hex
+        marker = f"\x00{nonce}\x00"
+        def mark(v: Any) -> Any:
+            if isinstance(v, dict): return {k: mark(x) for k, x in v.items()}
+            if isinstance(v, list): return [mark(x) for x in v]
+            if isinstance(v, str) and _INDEX in v: return v.replace(_INDEX, marker)
+            return v
+        data = json.dumps(mark(record), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        inner = re.escape(json.dumps(marker)[1:-1].encode("utf-8"))
+        # "{{index}}" sozinho vira número; dentro de um texto, vira parte do texto
+        self.statics: Tuple[bytes, ...] = tuple(re.split(b'"' + inner + b'"|' + inner, data))
+        self.holes = len(self.statics) - 1
+        self.static_len = sum(len(s) for s in self.statics)
+        self.count = count
+        self.array = array
+        self.size = (1 if array else 0) + sum(n * self._item_len(d) for d, _, n in self._buckets()) + (1 if array and count == 0 else 0)
+        self.etag = '"g' + hashlib.blake2b(repr((self.statics, count, array)).encode(), digest_size=12).hexdigest() + '"'
+
+    def _item_len(self, digits: int) -> int:
+        return self.static_len + self.holes * digits + 1
+
+    def _buckets(self):
+        # (dígitos, primeiro índice, quantidade) para índices com o mesmo número de dígitos
+        lo, d = 0, 1
+        while lo < self.count:
+            hi = min(self.count, 10 ** d)
+            yield d, lo, hi - lo
+            lo, d = hi, d + 1
+
+    def _item(self, i: int) -> bytes:
+        tail = (b"]" if i == self.count - 1 else b",") if self.array else b"\n"
+        return str(i).encode("ascii").join(self.statics) + tail
+
+    def _locate(self, offset: int) -> Tuple[int, int]:
+        for d, lo, n in self._buckets():
+            size = n * self._item_len(d)
+            if offset < size: return lo + offset // self._item_len(d), offset % self._item_len(d)
+            offset -= size
+        return self.count, 0
+
+    def stat(self) -> Tuple[int, str]:
+        return self.size, self.etag
+
+    async def chunks(self, start: int, length: int, chunk: int) -> AsyncIterator[bytes]:
+        if self.array and self.count == 0:
+            yield b"[]"[start:start + length]; return
+        buf: List[bytes] = []; filled = 0
+        head = 1 if self.array else 0
+        if start < head:
+            buf.append(b"["); filled = 1; length -= 1
+        i, skip = self._locate(max(0, start - head))
+        while length > 0 and i < self.count:
+            item = self._item(i)
+            if skip: item = item[skip:]; skip = 0
+            if len(item) > length: item = item[:length]
+            buf.append(item); filled += len(item); length -= len(item); i += 1
+            if filled >= chunk:
+                yield b"".join(buf); buf, filled = [], 0
+                await asyncio.sleep(0)  # geração é CPU: devolve a vez aos outros downloads
+        if buf: yield b"".join(buf)
+
+Source = Union[FileSource, GeneratorSource]
+
+def compile_source(spec: Optional[BodySource]) -> Optional[Source]:
+    if spec is None: return None
+    if spec.kind == "file": return FileSource(str(resolve_under(MOCK_FILES_DIR, spec.path)))
+    return GeneratorSource(spec.record, spec.count, spec.format == "json_array")
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    found = None
+    for k, v in scope["headers"]:
+        if k == name: found = v
+    return found.decode("latin-1") if found is not None else None
+
+async def _simple(send: Send, status: int, headers: RawHeaders, body: bytes = b"") -> None:
+    await send({"type": "http.response.start", "status": status, "headers": [*headers, (b"content-length", str(len(body)).encode("latin-1"))]})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_source(scope: Scope, send: Send, status: int, raw_headers: RawHeaders, source: Source, chaos: Optional[ChaosPlan] = None) -> None:
+    try: size, etag = source.stat()
+    except OSError:
+        return await _simple(send, 500, [(b"content-type", b"application/json")], b'{"detail":"Response body file is not available"}')
+    method = scope["method"]
+    headers = [*raw_headers, (b"accept-ranges", b"bytes"), (b"etag", etag.encode("latin-1"))]
+    start, length = 0, size
+    if 200 <= status < 300 and method in ("GET", "HEAD"):
+        if etag_matches(etag, _header(scope, b"if-none-match")):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        requested, if_range = _header(scope, b"range"), _header(scope, b"if-range")
+        if status == 200 and requested and (if_range is None or if_range.strip() == etag):
+            try: rng = parse_range(requested, size)
+            except RangeNotSatisfiable:
+                return await _simple(send, 416, [*raw_headers, (b"content-range", f"bytes */{size}".encode("latin-1"))])
+            if rng is not None:
+                start, length, status = rng[0], rng[1] - rng[0] + 1, 206
+                headers.append((b"content-range", f"bytes {rng[0]}-{rng[1]}/{size}".encode("latin-1")))
+    headers.append((b"content-length", str(length).encode("latin-1")))
+
+    kind = await start_with_chaos(send, chaos) if chaos is not None else None
+    if kind == "error": return
+    await send({"type": "http.response.start", "status": status, "headers": fault_headers(headers, kind)})
+    if kind == "drop": return
+    if kind == "truncate": length //= 2
+    if method == "HEAD" or length == 0:
+        if kind is None: await send({"type": "http.response.body", "body": b""})
+        return
+    pacer = Pacer(chaos.bandwidth) if chaos is not None and chaos.bandwidth else None
+    if kind is None and pacer is None and isinstance(source, FileSource) and "http.response.zerocopysend" in scope.get("extensions", {}):
+        with open(source.path, "rb") as f:
+            await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": length})
+        return
+    chunk = min(STREAM_CHUNK_BYTES, chaos.chunk) if pacer is not None else STREAM_CHUNK_BYTES
+    async with aclosing(source.chunks(start, length, chunk)) as chunks:
+        async for data in chunks:
+            if pacer is not None: await pacer.wait(len(data))
+            await send({"type": "http.response.body", "body": data, "more_body": True})
+    if kind is None: await send({"type": "http.response.body", "body": b""})
+
+class SourceResponse(Response):
+    """Resposta com `body_source`: headers do mock + streaming do arquivo/gerador (ver `send_source`)."""
+
+    def __init__(self, source: Source, status_code: int, raw_headers: RawHeaders, chaos: Optional[ChaosPlan] = None):
+        self.status_code = status_code
+        self.background = None
+        self.body = b""
+        self.raw_headers = raw_headers
+        self.source = source
+        self.chaos = chaos
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send_source(scope, send, self.status_code, self.raw_headers, self.source, self.chaos)
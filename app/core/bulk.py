@@ -0,0 +1,99 @@
+"""Importação/exportação em lote (NDJSON).
+
+Cada registro é um objeto JSON com `kind` = "scenario" ou "mock" e os campos de ScenarioCreate /
+MockCreate (um mock pode trazer `id` para preservar o identificador). A exportação produz o mesmo
+formato, então `GET /api/bulk/export` pode ser reimportado diretamente.
+"""
+from __future__ import annotations
+import codecs, itertools, json
+from typing import Any, AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from pydantic import ValidationError
+from ..models import MockCreate, Scenario, ScenarioCreate
+
+MAX_REPORTED_ERRORS = 1000
+
+class BulkItem(NamedTuple):
+    line: int
+    model: Union[ScenarioCreate, MockCreate]
+    mock_id: Optional[str] = None
+
+class BulkError(NamedTuple):
+    line: int
+    error: str
+
+async def iter_json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+    """Lê NDJSON (um objeto por linha) ou um array JSON à medida que os bytes chegam.
+
+    Gera (linha/posição, objeto, erro); registros malformados vêm com objeto None e o erro de parse.
+    """
+    buf, line, mode = "", 0, None
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        try: buf += utf8.decode(chunk)
+        except UnicodeDecodeError as e: raise ValueError(f"Invalid UTF-8: {e}") from e
+        if mode is None:
+            stripped = buf.lstrip()
+            if not stripped: continue
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            if mode == "array": buf = stripped[1:]
+        if mode == "ndjson":
+            *lines, buf = buf.split("\n")
+            for raw in lines:
+                line += 1
+                if raw.strip(): yield _parse_line(line, raw)
+        else:
+            while True:
+                buf = buf.lstrip().lstrip(",").lstrip()
+                if not buf or buf.startswith("]"): break
+                try: obj, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    break  # objeto ainda incompleto; espera mais bytes
+                line += 1; buf = buf[end:]
+                yield line, obj, None
+    try: buf += utf8.decode(b"", final=True)
+    except UnicodeDecodeError as e: raise ValueError(f"Invalid UTF-8: {e}") from e
+    if mode == "ndjson" and buf.strip():
+        yield _parse_line(line + 1, buf)
+    elif mode == "array":
+        rest = buf.strip()
+        if rest and rest != "]":
+            yield line + 1, None, f"Invalid JSON array element near: {rest[:80]!r}"
+
+def _parse_line(line: int, raw: str) -> Tuple[int, Any, Optional[str]]:
+    try: return line, json.loads(raw), None
+    except json.JSONDecodeError as e: return line, None, f"Invalid JSON: {e}"
+
+def to_item(line: int, obj: Any) -> BulkItem:
+    """Valida um registro; ValueError/ValidationError descrevem o problema."""
+    if not isinstance(obj, dict): raise ValueError("Record must be a JSON object")
+    kind = obj.get("kind") or ("mock" if "request" in obj else "scenario" if "basepath" in obj else None)
+    if kind == "scenario": return BulkItem(line, ScenarioCreate.model_validate(obj))
+    if kind == "mock":
+        mock_id = obj.get("id")
+        if mock_id is not None and not isinstance(mock_id, str): raise ValueError("Mock id must be a string")
+        return BulkItem(line, MockCreate.model_validate(obj), mock_id)
+    raise ValueError("Unknown record kind (expected 'scenario' or 'mock')")
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(x) for x in err['loc']) or '<root>'}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+def _record(kind: str, doc: bytes) -> bytes:
+    # {"kind":"...", + campos do documento JSON, sem passar por dict intermediário
+    return b'{"kind":"' + kind.encode() + b'",' + doc[1:] + b"\n"
+
+def export_records(scenarios: Iterable[Scenario], mocks_of, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Serializa cenários seguidos dos seus mocks, agrupando linhas em blocos de ~chunk_size bytes.
+
+    `mocks_of(basepath)` devolve os registros do snapshot (`MockRecord`), cujo JSON já está pronto em `doc`.
+    """
+    out: List[bytes] = []; size = 0
+    for s in scenarios:
+        scenario_doc = s.model_dump_json().encode("utf-8")
+        for kind, doc in itertools.chain((("scenario", scenario_doc),), (("mock", r.doc) for r in mocks_of(s.basepath))):
+            rec = _record(kind, doc); out.append(rec); size += len(rec)
+            if size >= chunk_size:
+                yield b"".join(out); out, size = [], 0
+    if out: yield b"".join(out)
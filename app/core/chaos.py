@@ -0,0 +1,125 @@
+"""Latência simulada, limite de banda e falhas por mock/variante (`chaos`), compilados na escrita.
+
+Tudo roda com timers do asyncio (`asyncio.sleep`): uma resposta atrasada ou com banda limitada é
+só uma corrotina suspensa, sem worker nem thread presos. Com limite de banda o corpo (já
+pré-codificado) é enviado em fatias, cada uma agendada pelo relógio.
+
+Falhas (sorteadas antes da latência, que vale para todas):
+- error: status 5xx com corpo JSON curto no lugar da resposta do mock;
+- drop: envia os headers e encerra sem corpo (o cliente vê a conexão cair);
+- truncate: anuncia o Content-Length completo e envia só metade do corpo.
+"""
+from __future__ import annotations
+import asyncio, math, random, time
+from typing import Callable, List, Optional, Tuple
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from ..models import ChaosProfile, LatencySpec
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+FAULT_HEADER = b"x-mock-fault"
+# fatias de ~100 ms de banda, entre 1 KiB e 64 KiB
+_MIN_CHUNK, _MAX_CHUNK = 1024, 64 * 1024
+
+def _sampler(spec: LatencySpec) -> Callable[[], float]:
+    lo, hi = (spec.min_ms or 0.0) / 1000, (spec.max_ms / 1000 if spec.max_ms is not None else math.inf)
+    ms, dist = spec.ms / 1000, spec.distribution
+    if dist == "uniform": return lambda: random.uniform(lo, hi)
+    if dist == "normal":
+        sd = spec.stddev_ms / 1000
+        return lambda: min(hi, max(lo, random.gauss(ms, sd)))
+    if dist == "lognormal":
+        sigma = spec.sigma
+        return lambda: min(hi, max(lo, ms * random.lognormvariate(0.0, sigma)))
+    fixed = min(hi, max(lo, ms))
+    return lambda: fixed
+
+class ChaosPlan:
+    __slots__ = ("delay", "bandwidth", "chunk", "faults")
+
+    def __init__(self, profile: ChaosProfile):
+        self.delay: Optional[Callable[[], float]] = _sampler(profile.latency) if profile.latency else None
+        self.bandwidth = profile.bandwidth_bps
+        self.chunk = min(_MAX_CHUNK, max(_MIN_CHUNK, (profile.bandwidth_bps or 0) // 10))
+        # (probabilidade acumulada, tipo, status)
+        acc, faults = 0.0, []
+        for f in profile.faults:
+            if f.probability <= 0: continue
+            acc += f.probability; faults.append((acc, f.kind, f.status_code))
+        self.faults: Tuple[Tuple[float, str, int], ...] = tuple(faults)
+
+    def pick_fault(self) -> Optional[Tuple[float, str, int]]:
+        if not self.faults: return None
+        x = random.random()
+        for f in self.faults:
+            if x < f[0]: return f
+        return None
+
+def compile_chaos(profile: Optional[ChaosProfile]) -> Optional[ChaosPlan]:
+    """Plano de runtime do perfil; None quando não há nada a simular (resposta segue o caminho normal)."""
+    if profile is None or (profile.latency is None and profile.bandwidth_bps is None and not profile.faults): return None
+    return ChaosPlan(profile)
+
+async def start_with_chaos(send: Send, plan: ChaosPlan) -> Optional[str]:
+    """Sorteia a falha e aplica a latência; a falha `error` já sai respondida. Devolve o tipo da falha ou None."""
+    fault = plan.pick_fault()
+    if plan.delay is not None:
+        delay = plan.delay()
+        if delay > 0: await asyncio.sleep(delay)
+    if fault is None: return None
+    _, kind, status = fault
+    if kind == "error":
+        data = b'{"error":"fault_injected","message":"Simulated failure"}'
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(data)).encode("latin-1")), (FAULT_HEADER, b"error")]})
+        await send({"type": "http.response.body", "body": data})
+    return kind
+
+def fault_headers(raw_headers: RawHeaders, kind: Optional[str]) -> RawHeaders:
+    return raw_headers if kind is None else [*raw_headers, (FAULT_HEADER, kind.encode("latin-1"))]
+
+class Pacer:
+    """Limite de banda: cada fatia espera até o instante em que a banda permitiria tê-la enviado (pelo relógio,
+    sem acumular o atraso do próprio envio)."""
+    __slots__ = ("rate", "start", "sent")
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.start = time.monotonic()
+        self.sent = 0
+
+    async def wait(self, size: int) -> None:
+        self.sent += size
+        delay = self.start + self.sent / self.rate - time.monotonic()
+        if delay > 0: await asyncio.sleep(delay)
+
+async def send_with_chaos(send: Send, status: int, raw_headers: RawHeaders, body: bytes, plan: ChaosPlan) -> None:
+    kind = await start_with_chaos(send, plan)
+    if kind == "error": return
+    await send({"type": "http.response.start", "status": status, "headers": fault_headers(raw_headers, kind)})
+    if kind is not None:
+        # resposta fica incompleta: o servidor encerra a conexão (drop: sem corpo; truncate: metade dele)
+        if kind == "truncate": await send({"type": "http.response.body", "body": body[:len(body) // 2], "more_body": True})
+        return
+    if not plan.bandwidth or not body:
+        await send({"type": "http.response.body", "body": body})
+        return
+    pacer, size = Pacer(plan.bandwidth), plan.chunk
+    for i in range(0, len(body), size):
+        chunk = body[i:i + size]
+        await pacer.wait(len(chunk))
+        await send({"type": "http.response.body", "body": chunk, "more_body": i + size < len(body)})
+
+class ChaosResponse(Response):
+    """Entrega uma resposta já montada (bytes + headers) aplicando o plano de chaos."""
+
+    def __init__(self, inner: Response, plan: ChaosPlan):
+        self.status_code = inner.status_code
+        self.background = None
+        self.body = inner.body
+        self.raw_headers = inner.raw_headers
+        self.plan = plan
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send_with_chaos(send, self.status_code, self.raw_headers, self.body, self.plan)
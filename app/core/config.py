@@ -3,4 +3,46 @@ APP_TITLE = os.getenv("APP_TITLE", "Mad Dog Mock")
 APP_VERSION = os.getenv("APP_VERSION", "2.0.0")
 CORS_ALLOW_ORIGINS = [o.strip() for o in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()]
 JWKS_TTL = int(os.getenv("JWKS_TTL", "600"))
+JWKS_STALE_TTL = int(os.getenv("JWKS_STALE_TTL", str(JWKS_TTL)))
+JWKS_NEGATIVE_TTL = int(os.getenv("JWKS_NEGATIVE_TTL", "30"))
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "10"))
 HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5.0"))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_MAX_TTL = int(os.getenv("JWT_CACHE_MAX_TTL", str(JWKS_TTL)))
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Despacho ASGI direto para o tráfego de mocks, antes do roteamento do FastAPI (opt-in)
+FAST_PATH = os.getenv("FAST_PATH", "false").lower() in ("1", "true", "yes", "on")
+# Arquivos servidos por `body_source` (kind=file) ficam sob este diretório; fatias do streaming em bytes
+MOCK_FILES_DIR = os.getenv("MOCK_FILES_DIR", "mock_files")
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", str(256 * 1024)))
+# Journal de requisições (app.core.journal): capacidade do ring buffer (0 desliga), bytes do corpo gravados
+# por entrada (0 = não grava) e arquivo NDJSON opcional onde as entradas são acrescentadas em background
+JOURNAL_CAPACITY = int(os.getenv("JOURNAL_CAPACITY", "10000"))
+JOURNAL_BODY_BYTES = int(os.getenv("JOURNAL_BODY_BYTES", "0"))
+JOURNAL_FILE = os.getenv("JOURNAL_FILE") or None
+JOURNAL_SPILL_INTERVAL = float(os.getenv("JOURNAL_SPILL_INTERVAL", "0.5"))
+# Métricas Prometheus em GET /metrics; máximo de combinações de labels por métrica (o excedente vira "__other__")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "1000"))
+# Store: "memory" (um processo), "file" (persistido em STORE_DIR, app.storage.persistent) ou "redis" (compartilhado entre workers/réplicas, app.storage.redis_store)
+STORE_BACKEND = os.getenv("STORE_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("REDIS_PREFIX", "maddog")
+REDIS_SYNC_INTERVAL = float(os.getenv("REDIS_SYNC_INTERVAL", "5"))
+REDIS_LOG_SIZE = int(os.getenv("REDIS_LOG_SIZE", "1000"))
+# STORE_BACKEND=file: 0 = cada escrita espera o fsync do journal; > 0 = fsync a cada tantos segundos (perde no máximo esse intervalo)
+STORE_DIR = os.getenv("STORE_DIR", "data")
+STORE_FSYNC_INTERVAL = float(os.getenv("STORE_FSYNC_INTERVAL", "0"))
+STORE_SNAPSHOT_INTERVAL = float(os.getenv("STORE_SNAPSHOT_INTERVAL", "60"))
+# Server-Timing (app.core.timing): header da requisição que liga o tempo por fase mesmo em cenários sem `server_timing` ("" desliga)
+SERVER_TIMING_REQUEST_HEADER = os.getenv("SERVER_TIMING_REQUEST_HEADER", "X-Mock-Timing")
+# GET /api/profile: profiler por amostragem do event loop (opt-in), duração máxima de uma coleta e intervalo padrão entre amostras
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+# Proxy para o `upstream_url` do cenário (app.core.proxy): timeout e conexões do pool, bytes da resposta guardados para
+# repassar a chamadas idênticas concorrentes e para gravar (`record`), e headers da resposta que não entram no mock gravado
+PROXY_TIMEOUT = float(os.getenv("PROXY_TIMEOUT", "30"))
+PROXY_MAX_CONNECTIONS = int(os.getenv("PROXY_MAX_CONNECTIONS", "100"))
+PROXY_BUFFER_BYTES = int(os.getenv("PROXY_BUFFER_BYTES", str(1024 * 1024)))
+PROXY_RECORD_DROP_HEADERS = [h.strip().lower() for h in os.getenv("PROXY_RECORD_DROP_HEADERS", "date,server,set-cookie,etag,last-modified,age,via,x-request-id").split(",") if h.strip()]
@@ -0,0 +1,182 @@
+"""Journal das requisições de mock: ring buffer de capacidade fixa, para verificar chamadas em testes.
+
+Cada requisição que passa pelo catch-all (ou pelo despacho direto) vira uma entrada compacta no fim
+do buffer, sobrescrevendo a mais antiga quando cheio: memória limitada por JOURNAL_CAPACITY (e
+JOURNAL_BODY_BYTES, se o corpo for gravado), qualquer que seja a taxa de requisições. A escrita não
+usa lock nem `await`: é uma atribuição numa lista, no próprio event loop. Respostas de mock são
+registradas depois de enviadas, com o status que de fato saiu (`SentStatus`): 304 da negociação,
+206/416 de Range e o status das falhas do chaos, não o status configurado no mock.
+
+Com JOURNAL_FILE, uma tarefa em background acrescenta as entradas novas a um arquivo NDJSON a cada
+JOURNAL_SPILL_INTERVAL segundos (escrita numa thread, uma gravação por vez). Uma entrada só conta como
+gravada depois que a escrita termina: se ela falha, o erro é registrado no log, contado em `spill_errors`
+e as mesmas entradas são tentadas de novo na próxima rodada. Se o buffer der a volta antes da gravação,
+as entradas perdidas são contadas em `spill_dropped`.
+"""
+from __future__ import annotations
+import asyncio, json, logging, time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import anyio.to_thread
+from starlette.types import Message, Send
+from ..models import RequestLogQuery
+from .config import JOURNAL_BODY_BYTES, JOURNAL_CAPACITY, JOURNAL_FILE, JOURNAL_SPILL_INTERVAL
+from .request_context import RequestContext
+
+log = logging.getLogger(__name__)
+
+# Corpos ainda não lidos só são lidos para o journal até este Content-Length
+_MAX_BODY_READ = 1024 * 1024
+
+class JournalEntry:
+    __slots__ = ("seq", "ts", "method", "path", "query", "scenario", "mock_id", "variant", "status", "duration_ms", "body")
+
+    def __init__(self, seq: int, ts: float, method: str, path: str, query: str, scenario: Optional[str], mock_id: Optional[str],
+                 variant: Optional[int], status: int, duration_ms: float, body: Optional[str]):
+        self.seq = seq; self.ts = ts; self.method = method; self.path = path; self.query = query
+        self.scenario = scenario; self.mock_id = mock_id; self.variant = variant; self.status = status
+        self.duration_ms = duration_ms; self.body = body
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "timestamp": datetime.fromtimestamp(self.ts, timezone.utc).isoformat(), "method": self.method, "path": self.path,
+                "query": self.query or None, "scenario": self.scenario, "mock_id": self.mock_id, "variant": self.variant,
+                "status": self.status, "duration_ms": round(self.duration_ms, 3), "body": self.body}
+
+def _matcher(q: RequestLogQuery):
+    since = q.since.timestamp() if q.since else None
+    until = q.until.timestamp() if q.until else None
+    method = q.method.upper() if q.method else None
+    def test(e: JournalEntry) -> bool:
+        if q.unmatched and e.mock_id is not None: return False
+        if q.scenario is not None and e.scenario != q.scenario: return False
+        if q.mock_id is not None and e.mock_id != q.mock_id: return False
+        if method is not None and e.method != method: return False
+        if q.path is not None and e.path != q.path: return False
+        if since is not None and e.ts < since: return False
+        if until is not None and e.ts > until: return False
+        return True
+    return test
+
+class SentStatus:
+    """`send` ASGI que guarda o status do `http.response.start` enviado (`status` começa com o previsto)."""
+    __slots__ = ("send", "status")
+
+    def __init__(self, send: Send, status: int):
+        self.send = send
+        self.status = status
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start": self.status = message["status"]
+        await self.send(message)
+
+class RequestJournal:
+    def __init__(self, capacity: int, body_bytes: int = 0, spill_path: Optional[str] = None):
+        self.capacity = capacity
+        self.body_bytes = body_bytes
+        self.spill_path = spill_path
+        self._items: List[Optional[JournalEntry]] = [None] * capacity
+        self._seq = 0
+        self._spilled = 0
+        self.spill_dropped = 0
+        self.spill_errors = 0
+        self._flush_lock = asyncio.Lock()
+        self._spill_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def record(self, ctx: RequestContext, started: float, scenario: Optional[str], mock_id: Optional[str], status: int) -> None:
+        """Acrescenta a requisição; `started` é o perf_counter() do início do tratamento."""
+        if not self.capacity: return
+        body = None
+        if self.body_bytes and ctx.body_loaded:
+            raw = ctx.raw_body
+            if raw: body = raw[:self.body_bytes].decode("utf-8", errors="replace")
+        seq = self._seq
+        self._items[seq % self.capacity] = JournalEntry(seq, time.time(), ctx.method, ctx.path, ctx.query_string, scenario, mock_id,
+                                                        ctx.variant, status, (time.perf_counter() - started) * 1000, body)
+        self._seq = seq + 1
+
+    async def capture_body(self, ctx: RequestContext) -> None:
+        """Com JOURNAL_BODY_BYTES, lê para o journal corpos pequenos que o match não precisou ler."""
+        if not self.body_bytes or ctx.body_loaded: return
+        length = ctx.header("content-length")
+        if length and length.isdigit() and 0 < int(length) <= _MAX_BODY_READ: await ctx.load_body()
+
+    def entries(self, start_seq: int = 0) -> Iterator[JournalEntry]:
+        """Entradas ainda no buffer com seq >= start_seq, da mais antiga para a mais nova."""
+        end = self._seq
+        for seq in range(max(start_seq, end - self.capacity, 0), end):
+            e = self._items[seq % self.capacity]
+            if e is not None and e.seq == seq: yield e
+
+    def query(self, q: RequestLogQuery, limit: Optional[int] = None) -> List[JournalEntry]:
+        """Entradas que satisfazem o filtro, em ordem cronológica; com `limit`, só as últimas."""
+        test = _matcher(q)
+        found = [e for e in self.entries() if test(e)]
+        return found[-limit:] if limit else found
+
+    def count(self, q: RequestLogQuery) -> int:
+        test = _matcher(q)
+        return sum(1 for e in self.entries() if test(e))
+
+    async def clear(self) -> None:
+        """Esvazia o buffer até a entrada atual; com JOURNAL_FILE, as ainda não gravadas vão antes para o arquivo.
+
+        Entradas registradas durante a gravação ficam no buffer (e vão para o arquivo na próxima rodada).
+        Se a gravação falhar, as pendentes são descartadas e contadas em `spill_dropped`.
+        """
+        target = self._seq
+        if self.spill_path:
+            while self._spilled < target:
+                try: await self.flush(target)
+                except Exception: break
+            if self._spilled < target:
+                self.spill_dropped += target - self._spilled; self._spilled = target
+        self._items = [e if e is not None and e.seq >= target else None for e in self._items]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "size": min(self._seq, self.capacity), "total": self._seq,
+                "spill_file": self.spill_path, "spill_dropped": self.spill_dropped, "spill_errors": self.spill_errors}
+
+    async def flush(self, until: Optional[int] = None) -> None:
+        """Grava as entradas pendentes com seq < `until` (padrão: todas); se a escrita falha, registra, conta e levanta o erro."""
+        if not self.spill_path: return
+        async with self._flush_lock:
+            start, end = self._spilled, self._seq if until is None else min(until, self._seq)
+            if start >= end: return
+            lost = max(0, end - self.capacity - start)
+            entries = [e for e in self.entries(start) if e.seq < end]
+            if entries:
+                data = "".join(json.dumps(e.as_dict(), ensure_ascii=False) + "\n" for e in entries).encode("utf-8")
+                try: await anyio.to_thread.run_sync(_append, self.spill_path, data)
+                except Exception as e:
+                    self.spill_errors += 1
+                    log.warning("could not append %d journal entries to %s: %s", len(entries), self.spill_path, e)
+                    raise
+            self._spilled = end; self.spill_dropped += lost
+
+    async def _spill_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try: await self.flush()
+            except Exception: pass  # já registrado; tenta de novo na próxima rodada
+
+    def start(self, interval: float = JOURNAL_SPILL_INTERVAL) -> None:
+        if self.spill_path and self.enabled and self._spill_task is None:
+            self._spill_task = asyncio.create_task(self._spill_loop(interval))
+
+    async def stop(self) -> None:
+        if self._spill_task is not None:
+            self._spill_task.cancel()
+            try: await self._spill_task
+            except asyncio.CancelledError: pass
+            self._spill_task = None
+        try: await self.flush()
+        except Exception: pass
+
+def _append(path: str, data: bytes) -> None:
+    with open(path, "ab") as f: f.write(data)
+
+journal = RequestJournal(JOURNAL_CAPACITY, JOURNAL_BODY_BYTES, JOURNAL_FILE)
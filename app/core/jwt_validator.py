@@ -1,50 +1,263 @@
 from __future__ import annotations
-import time
-from typing import Any, Dict, Optional, Tuple
-from jose import jwt
+import asyncio, hashlib, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from jose import jwk, jwt
+from jose.exceptions import JWTError
 import httpx
-from .config import JWKS_TTL, HTTP_TIMEOUT
+from .config import (
+    JWKS_TTL, JWKS_STALE_TTL, JWKS_NEGATIVE_TTL, JWKS_MIN_REFRESH_INTERVAL,
+    HTTP_TIMEOUT, JWT_CACHE_SIZE, JWT_CACHE_MAX_TTL,
+)
+from .timing import PhaseTiming
+
+class KeySet:
+    """JWKS indexado por `kid`, com as chaves já construídas (uma verificação por token)."""
+
+    def __init__(self, jwks: Dict[str, Any]):
+        self.jwks = jwks
+        self.by_kid: Dict[str, List[Tuple[str, Any]]] = {}
+        self.anonymous: List[Tuple[str, Any]] = []
+        for k in jwks.get('keys', []):
+            alg = k.get('alg', 'RS256')
+            try: key = jwk.construct(k, alg)
+            except Exception: continue
+            if k.get('kid'): self.by_kid.setdefault(k['kid'], []).append((alg, key))
+            else: self.anonymous.append((alg, key))
+
+    def candidates(self, header: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        kid, alg = header.get('kid'), header.get('alg')
+        if kid and kid in self.by_kid:
+            keys = self.by_kid[kid]
+        elif kid:
+            keys = self.anonymous
+        else:
+            keys = self.anonymous + [e for entries in self.by_kid.values() for e in entries]
+        return [e for e in keys if not alg or e[0] == alg]
+
+class IssuerUnavailable(RuntimeError):
+    """Falha de integração com o issuer (rede/HTTP) ao buscar o JWKS."""
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartilhado (pool de conexões) para discovery/JWKS."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, verify=True, limits=httpx.Limits(max_connections=50, max_keepalive_connections=10))
+        _client_loop = loop
+    return _client
+
+def set_http_client(client: Optional[httpx.AsyncClient]):
+    """Substitui o cliente compartilhado (ex.: transporte apontando para um issuer local de testes)."""
+    global _client, _client_loop
+    _client, _client_loop = client, None
+    if client is not None:
+        try: _client_loop = asyncio.get_running_loop()
+        except RuntimeError: _client_loop = None
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed: await _client.aclose()
+    _client = None
+
+class _JWKSEntry:
+    __slots__ = ("keys", "fetched_at", "refresh_at", "expires_at", "stale_until")
+
+    def __init__(self, keys: KeySet, now: float):
+        self.keys = keys
+        self.fetched_at = now
+        self.refresh_at = now + JWKS_TTL * 0.8
+        self.expires_at = now + JWKS_TTL
+        self.stale_until = self.expires_at + JWKS_STALE_TTL
 
 class JWKSCache:
-    def __init__(self): self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-    def get(self, issuer: str) -> Optional[Dict[str, Any]]:
+    """Cache de JWKS por issuer.
+
+    - single-flight: buscas concorrentes do mesmo issuer compartilham uma única requisição;
+    - refresh em background a partir de 80% do JWKS_TTL, sem bloquear quem está validando;
+    - stale-while-revalidate: depois do TTL o JWKS antigo segue servido por até JWKS_STALE_TTL
+      enquanto o issuer estiver inacessível;
+    - cache negativo: issuer que falhou não é consultado de novo por JWKS_NEGATIVE_TTL;
+    - `force=True` (kid desconhecido) busca de imediato, no máximo uma vez a cada JWKS_MIN_REFRESH_INTERVAL.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, _JWKSEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._failures: Dict[str, Tuple[float, Exception]] = {}
+        self.fetches = 0
+        # consultas atendidas pelo cache (inclusive stale) / que precisaram ir ao issuer
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, issuer: str) -> Optional[KeySet]:
         it = self._cache.get(issuer)
-        if not it: return None
-        exp, jwks = it
-        if time.time() > exp: self._cache.pop(issuer, None); return None
-        return jwks
-    def set(self, issuer: str, jwks: Dict[str, Any]):
-        self._cache[issuer] = (time.time() + JWKS_TTL, jwks)
+        if not it or time.time() > it.expires_at: return None
+        return it.keys
+
+    def set(self, issuer: str, jwks: Dict[str, Any]) -> KeySet:
+        keys = KeySet(jwks)
+        self._cache[issuer] = _JWKSEntry(keys, time.time())
+        self._failures.pop(issuer, None)
+        return keys
+
+    def clear(self):
+        self._cache.clear(); self._failures.clear()
+
+    async def get_keys(self, issuer: str, *, force: bool = False) -> KeySet:
+        now = time.time()
+        entry = self._cache.get(issuer)
+        if entry is not None:
+            if force:
+                if now - entry.fetched_at < JWKS_MIN_REFRESH_INTERVAL: self.hits += 1; return entry.keys
+            elif now < entry.stale_until:
+                if now >= entry.refresh_at: self._refresh_in_background(issuer)
+                if now < entry.expires_at or issuer in self._inflight or self._failed_recently(issuer, now):
+                    self.hits += 1
+                    return entry.keys
+        failure = self._failures.get(issuer)
+        if failure is not None and now < failure[0]:
+            if entry is not None and now < entry.stale_until: self.hits += 1; return entry.keys
+            self.misses += 1
+            # exceção nova a cada requisição: a guardada seria compartilhada (e teria o traceback acumulado) entre todas
+            raise IssuerUnavailable(f"{failure[1]} (cached failure)") from failure[1]
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._fetch_task(issuer))
+        except Exception:
+            if entry is not None and now < entry.stale_until: return entry.keys
+            raise
+
+    def _failed_recently(self, issuer: str, now: float) -> bool:
+        failure = self._failures.get(issuer)
+        return failure is not None and now < failure[0]
+
+    def _refresh_in_background(self, issuer: str):
+        if issuer not in self._inflight and not self._failed_recently(issuer, time.time()):
+            self._fetch_task(issuer)
+
+    def _fetch_task(self, issuer: str) -> "asyncio.Task[KeySet]":
+        task = self._inflight.get(issuer)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            return task
+        task = asyncio.ensure_future(self._fetch(issuer))
+        self._inflight[issuer] = task
+
+        def _done(t: asyncio.Task):
+            if self._inflight.get(issuer) is t: self._inflight.pop(issuer, None)
+            if not t.cancelled(): t.exception()  # evita "exception was never retrieved" no refresh em background
+        task.add_done_callback(_done)
+        return task
+
+    async def _fetch(self, issuer: str) -> KeySet:
+        self.fetches += 1
+        try:
+            jwks = await fetch_jwks_for_issuer(issuer)
+        except Exception as e:
+            self._failures[issuer] = (time.time() + JWKS_NEGATIVE_TTL, e)
+            raise
+        return self.set(issuer, jwks)
+
+class VerifiedTokenCache:
+    """LRU de tokens já verificados (chave: digest de issuer+token), válido até o `exp` do token.
+
+    Limitado a JWT_CACHE_MAX_TTL para que rotação de chaves no issuer não fique invisível por muito tempo.
+    """
+
+    def __init__(self, maxsize: int = JWT_CACHE_SIZE, max_ttl: float = JWT_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._items: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(issuer: str, token: str) -> bytes:
+        return hashlib.sha256(f"{issuer}\0{token}".encode()).digest()
+
+    def get(self, issuer: str, token: str) -> Optional[Dict[str, Any]]:
+        if self.maxsize <= 0: return None
+        k = self._digest(issuer, token)
+        it = self._items.get(k)
+        if it is None or time.time() >= it[0]:
+            if it is not None: self._items.pop(k, None)
+            self.misses += 1
+            return None
+        self._items.move_to_end(k)
+        self.hits += 1
+        return it[1]
+
+    def put(self, issuer: str, token: str, ctx: Dict[str, Any]):
+        if self.maxsize <= 0: return
+        until = time.time() + self.max_ttl
+        exp = (ctx.get('payload') or {}).get('exp')
+        if isinstance(exp, (int, float)): until = min(until, exp)
+        k = self._digest(issuer, token)
+        self._items[k] = (until, ctx); self._items.move_to_end(k)
+        while len(self._items) > self.maxsize: self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0}
 
 jwks_cache = JWKSCache()
+token_cache = VerifiedTokenCache()
 
 async def fetch_jwks_for_issuer(issuer_url: str) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, verify=True) as client:
-        if not issuer_url.endswith('/'):
-            issuer_url += '/'
-        wk = issuer_url + '.well-known/openid-configuration'
+    client = get_http_client()
+    if not issuer_url.endswith('/'):
+        issuer_url += '/'
+    wk = issuer_url + '.well-known/openid-configuration'
+    try:
         r = await client.get(wk); r.raise_for_status()
         conf = r.json(); jwks_uri = conf.get('jwks_uri')
-        if not jwks_uri: raise RuntimeError('jwks_uri not found in openid-configuration')
+        if not jwks_uri: raise IssuerUnavailable('jwks_uri not found in openid-configuration')
         r2 = await client.get(jwks_uri); r2.raise_for_status()
         return r2.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise IssuerUnavailable(f"{type(e).__name__}: {e}") from e
 
-async def validate_jwt(token: str, issuer_url: str) -> Dict[str, Any]:
+async def validate_jwt(token: str, issuer_url: str, timing: Optional[PhaseTiming] = None) -> Dict[str, Any]:
+    """Header e payload do token verificado. Com `timing`, anota `jwks` (chaves do cache ou buscadas no issuer) e
+    `verify` (assinatura); nada é anotado quando o token já estava no cache de tokens verificados."""
     if not issuer_url.lower().startswith('https://'):
         raise RuntimeError('Issuer URL must be HTTPS')
-    jwks = jwks_cache.get(issuer_url)
-    if jwks is None:
-        jwks = await fetch_jwks_for_issuer(issuer_url)
-        jwks_cache.set(issuer_url, jwks)
+    cached = token_cache.get(issuer_url, token)
+    if cached is not None:
+        return cached
+    if timing is not None: t0, misses = time.perf_counter(), jwks_cache.misses
+    try:
+        keys = await jwks_cache.get_keys(issuer_url)
+        header = jwt.get_unverified_header(token)
+        candidates = keys.candidates(header)
+        if not candidates and header.get('kid') and header.get('kid') not in keys.by_kid:
+            # kid desconhecido: provável rotação de chaves no issuer
+            keys = await jwks_cache.get_keys(issuer_url, force=True)
+            candidates = keys.candidates(header)
+    finally:
+        if timing is not None:
+            t1 = time.perf_counter()
+            timing.add('jwks', t1 - t0, 'fetch' if jwks_cache.misses != misses else 'cache')
+    if not candidates:
+        if not keys.by_kid and not keys.anonymous: raise RuntimeError('No JWKS keys available for validation')
+        raise JWTError(f"No JWKS key matches kid={header.get('kid')!r} alg={header.get('alg')!r}")
     last_err = None
-    for key in jwks.get('keys', []):
-        try:
-            payload = jwt.decode(token, key, algorithms=[key.get('alg','RS256')], options={'verify_aud': False}, issuer=issuer_url.rstrip('/'))
-            header = jwt.get_unverified_header(token)
-            print('*********************JSON TOKEN JWT Request:')
-            print({'header': header, 'payload': payload})
-            return {'header': header, 'payload': payload}
-        except Exception as e:
-            last_err = e; continue
-    if last_err: raise last_err
-    raise RuntimeError('No JWKS keys available for validation')
+    try:
+        for alg, key in candidates:
+            try:
+                payload = jwt.decode(token, key, algorithms=[alg], options={'verify_aud': False}, issuer=issuer_url.rstrip('/'))
+                ctx = {'header': header, 'payload': payload}
+                token_cache.put(issuer_url, token, ctx)
+                return ctx
+            except Exception as e:
+                last_err = e; continue
+        raise last_err
+    finally:
+        if timing is not None: timing.add('verify', time.perf_counter() - t1)
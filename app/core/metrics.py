@@ -0,0 +1,169 @@
+"""Métricas do tráfego de mocks no formato texto do Prometheus (`GET /metrics`).
+
+Contadores e histogramas ficam em dicts simples, atualizados no próprio event loop (sem lock nem
+await): incrementar é uma busca de dict e uma soma. Os histogramas têm buckets fixos e cada série
+guarda a contagem por bucket; a forma cumulativa do Prometheus só é montada na exposição.
+
+Labels com valores vindos dos cadastros (scenario, mock_id) têm a cardinalidade limitada por
+METRICS_MAX_SERIES: depois desse número de combinações, as novas são somadas na série com todos os
+labels = "__other__". Labels de valores fixos (phase, outcome) não têm limite.
+"""
+from __future__ import annotations
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+from .config import METRICS_ENABLED, METRICS_MAX_SERIES
+from .jwt_validator import jwks_cache, token_cache
+from .proxy import proxy
+
+Labels = Tuple[str, ...]
+
+OVERFLOW = "__other__"
+# segundos: de 10 µs (match em memória) a 2.5 s (issuer de JWT lento)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+JWT_OUTCOMES = ("ok", "missing", "config", "validation", "integration")
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(v: float) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(int(v)) if float(v).is_integer() else repr(v)
+
+class Counter:
+    __slots__ = ("name", "help", "labels", "max_series", "values")
+
+    def __init__(self, name: str, help: str, labels: Labels = (), max_series: Optional[int] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.max_series = sys.maxsize if max_series is None else max_series
+        self.values: Dict[Labels, int] = {}
+
+    def inc(self, key: Labels, n: int = 1) -> None:
+        values = self.values
+        if key in values: values[key] += n
+        elif len(values) < self.max_series: values[key] = n
+        else:
+            key = (OVERFLOW,) * len(self.labels)
+            values[key] = values.get(key, 0) + n
+
+    def expose(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, v in self.values.items(): yield f"{self.name}{_labels(self.labels, key)} {v}"
+
+class HistogramSeries:
+    """Uma combinação de labels de um histograma; `observe` é o que roda por requisição."""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+class Histogram:
+    __slots__ = ("name", "help", "labels", "bounds", "max_series", "series")
+
+    def __init__(self, name: str, help: str, labels: Labels = (), bounds: Tuple[float, ...] = LATENCY_BUCKETS, max_series: Optional[int] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.bounds = bounds
+        self.max_series = sys.maxsize if max_series is None else max_series
+        self.series: Dict[Labels, HistogramSeries] = {}
+
+    def child(self, key: Labels) -> HistogramSeries:
+        """Série da combinação de labels; para labels fixos, obtenha uma vez e guarde."""
+        s = self.series.get(key)
+        if s is None:
+            if len(self.series) >= self.max_series: key = (OVERFLOW,) * len(self.labels)
+            s = self.series.setdefault(key, HistogramSeries(self.bounds))
+        return s
+
+    def expose(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, s in self.series.items():
+            acc = 0
+            for bound, n in zip((*self.bounds, float("inf")), s.counts):
+                acc += n
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, key, le)} {acc}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {s.sum!r}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {acc}"
+
+def _sample(name: str, help: str, value: float, kind: str = "gauge") -> List[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+
+class MockMetrics:
+    def __init__(self, enabled: bool = METRICS_ENABLED, max_series: int = METRICS_MAX_SERIES):
+        self.enabled = enabled
+        self.requests = Counter("mock_requests_total", "Requests answered by a mock.", ("scenario", "mock_id"), max_series)
+        self.unmatched = Counter("mock_unmatched_requests_total", "Requests that matched no mock (404); scenario is empty when no basepath matched.",
+                                 ("scenario",), max_series)
+        self.proxied = Counter("mock_proxied_requests_total", "Unmatched requests forwarded to the scenario upstream, by upstream status (502/504 when the call failed).",
+                               ("scenario", "status"), max_series)
+        self.jwt = Counter("mock_jwt_validations_total", "JWT checks on scenarios that require a token, by outcome.", ("outcome",))
+        for outcome in JWT_OUTCOMES: self.jwt.values[(outcome,)] = 0
+        self.phases = Histogram("mock_request_phase_seconds", "Time spent in each phase of mock request handling.", ("phase",))
+        # séries fixas, resolvidas uma vez
+        self.match = self.phases.child(("match",))
+        self.jwt_phase = self.phases.child(("jwt",))
+        self.response = self.phases.child(("response",))
+        self.upstream = self.phases.child(("upstream",))
+        self.total = self.phases.child(("total",))
+
+    def served(self, scenario: str, mock_id: str, started: float, matched: float, validated: Optional[float], done: float) -> None:
+        """Requisição respondida por um mock; instantes de perf_counter() no início, após o match, após o JWT (None
+        se o cenário não exige) e com a resposta pronta."""
+        self.requests.inc((scenario, mock_id))
+        self.match.observe(matched - started)
+        self.response.observe(done - (matched if validated is None else validated))
+        self.total.observe(done - started)
+
+    def jwt_checked(self, outcome: str, started: float, matched: float, validated: float) -> None:
+        """Resultado da validação de JWT; recusada, a requisição termina aqui (match e total também são contados)."""
+        self.jwt.inc((outcome,))
+        self.jwt_phase.observe(validated - matched)
+        if outcome != "ok":
+            self.match.observe(matched - started)
+            self.total.observe(validated - started)
+
+    def not_matched(self, scenario: Optional[str], started: float, matched: float) -> None:
+        self.unmatched.inc((scenario or "",))
+        self.match.observe(matched - started)
+        self.total.observe(matched - started)
+
+    def forwarded(self, scenario: str, status: int, started: float, matched: float, done: float) -> None:
+        """Requisição sem mock repassada ao upstream do cenário; `done` = headers da resposta do upstream recebidos (ou falha)."""
+        self.proxied.inc((scenario, str(status)))
+        self.match.observe(matched - started)
+        self.upstream.observe(done - matched)
+        self.total.observe(done - started)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in (self.requests, self.unmatched, self.proxied, self.jwt, self.phases): lines.extend(m.expose())
+        jwks_total = jwks_cache.hits + jwks_cache.misses
+        lines += _sample("mock_jwks_cache_hits_total", "JWKS lookups answered from the cache.", jwks_cache.hits, "counter")
+        lines += _sample("mock_jwks_cache_misses_total", "JWKS lookups that fetched from the issuer.", jwks_cache.misses, "counter")
+        lines += _sample("mock_jwks_cache_hit_ratio", "JWKS cache hits / lookups since start.", jwks_cache.hits / jwks_total if jwks_total else 0.0)
+        lines += _sample("mock_jwt_token_cache_hits_total", "Verified-token cache hits.", token_cache.hits, "counter")
+        lines += _sample("mock_jwt_token_cache_misses_total", "Verified-token cache misses.", token_cache.misses, "counter")
+        lines += _sample("mock_jwt_token_cache_size", "Tokens in the verified-token cache.", token_cache.stats()["size"])
+        lines += _sample("mock_proxy_upstream_calls_total", "Calls made to scenario upstreams.", proxy.calls, "counter")
+        lines += _sample("mock_proxy_shared_responses_total", "Proxied requests answered with the response of an identical in-flight call.", proxy.shared, "counter")
+        lines += _sample("mock_proxy_recorded_mocks_total", "Mocks recorded from upstream responses.", proxy.recorded, "counter")
+        return "\n".join(lines) + "\n"
+
+metrics = MockMetrics()
@@ -1,35 +1,120 @@
 from __future__ import annotations
-from typing import Any, Dict, List
+import json, re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from ..models import Mock, Scenario, ensure_leading_slash
+from .responses import strong_etag
+from ..storage.runtime import records_models
 
-def build_scenario_openapi(scenario: Scenario, mocks: List[Mock], app_title: str, app_version: str, guide_url: str) -> Dict[str, Any]:
+_PATH_PARAM_RE = re.compile(r"\{([a-zA-Z0-9_]+)\}")
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def mock_operation(scenario: Scenario, m: Mock) -> Tuple[str, str, Dict[str, Any]]:
+    """(path completo, método, operação OpenAPI) de um mock."""
+    full = ensure_leading_slash(scenario.basepath.rstrip("/") + "/" + m.request.uri.lstrip("/"))
+    params = []
+    for name in _PATH_PARAM_RE.findall(m.request.uri):
+        params.append({"name": name, "in": "path", "required": False, "schema": {"type":"string"}, "description": f"Path param: {name}"})
+    for p in (m.request.params or []):
+        params.append({"name": p.name, "in": p.in_, "required": False, "schema": {"type": p.schema_type}, "description": p.description or "", "example": p.example})
+    req_body = None
+    if m.request.example_body is not None or m.request.content_type:
+        req_body = {"required": False, "content": {(m.request.content_type or "application/json"): {"example": m.request.example_body}}}
+    responses = {str(m.response.status_code): {"description": m.response.description or "Mocked response", "content": {(m.response.media_type or "application/json"): {"example": m.response.body}}}}
+    if m.variants:
+        for v in m.variants:
+            code = str(v.response.status_code)
+            if code not in responses:
+                responses[code] = {"description": v.response.description or (v.description or "Variant response"), "content": {(v.response.media_type or "application/json"): {"example": v.response.body}}}
+    op = {"summary": m.name or f"Mock {m.id}", "description": (m.description or "") + f"\n\nMock-ID: {m.id}", "tags": m.tags or [], "parameters": params, "responses": responses}
+    if req_body: op["requestBody"] = req_body
+    return full, m.request.method.lower(), op
+
+def _info(scenario: Scenario, app_title: str, app_version: str, guide_url: str) -> Dict[str, Any]:
+    info_desc = (scenario.description or "")
+    if guide_url: info_desc += f"\n\n**Documentação:** [Guia (Markdown)]({guide_url})"
+    return {"title": f"{app_title} — Cenário {scenario.basepath}", "version": app_version, "description": info_desc}
+
+def _tag(t: str) -> Dict[str, str]:
+    return {"name": t, "description": f"Grupo: {t}"}
+
+def build_scenario_openapi(scenario: Scenario, mocks: Iterable[Mock], app_title: str, app_version: str, guide_url: str) -> Dict[str, Any]:
     paths: Dict[str, Any] = {}
     tags: Dict[str, Dict[str, str]] = {}
-    import re as _re
-
     for m in mocks:
         if not m.enabled or m.scenario_basepath != scenario.basepath: continue
-        full = ensure_leading_slash(scenario.basepath.rstrip("/") + "/" + m.request.uri.lstrip("/"))
-        item = paths.setdefault(full, {})
-        params = []
-        for name in _re.findall(r"\{([a-zA-Z0-9_]+)\}", m.request.uri):
-            params.append({"name": name, "in": "path", "required": False, "schema": {"type":"string"}, "description": f"Path param: {name}"})
-        for p in (m.request.params or []):
-            params.append({"name": p.name, "in": p.in_, "required": False, "schema": {"type": p.schema_type}, "description": p.description or "", "example": p.example})
-        req_body = None
-        if m.request.example_body is not None or m.request.content_type:
-            req_body = {"required": False, "content": {(m.request.content_type or "application/json"): {"example": m.request.example_body}}}
-        responses = {str(m.response.status_code): {"description": m.response.description or "Mocked response", "content": {(m.response.media_type or "application/json"): {"example": m.response.body}}}}
-        if m.variants:
-            for v in m.variants:
-                code = str(v.response.status_code)
-                if code not in responses:
-                    responses[code] = {"description": v.response.description or (v.description or "Variant response"), "content": {(v.response.media_type or "application/json"): {"example": v.response.body}}}
-        op = {"summary": m.name or f"Mock {m.id}", "description": (m.description or "") + f"\n\nMock-ID: {m.id}", "tags": m.tags or [], "parameters": params, "responses": responses}
-        if req_body: op["requestBody"] = req_body
-        item[m.request.method.lower()] = op
-        for t in (m.tags or []): tags.setdefault(t, {"name": t, "description": f"Grupo: {t}"})
+        full, method, op = mock_operation(scenario, m)
+        paths.setdefault(full, {})[method] = op
+        for t in (m.tags or []): tags.setdefault(t, _tag(t))
+    return {"openapi": "3.0.3", "info": _info(scenario, app_title, app_version, guide_url), "tags": list(tags.values()), "paths": paths or {}, "components": {}}
 
-    info_desc = (scenario.description or "")
-    if guide_url: info_desc += f"\n\n**Documentação:** [Guia (Markdown)]({guide_url})"
-    return {"openapi": "3.0.3", "info": {"title": f"{app_title} — Cenário {scenario.basepath}", "version": app_version, "description": info_desc}, "tags": list(tags.values()), "paths": paths or {}, "components": {}}
+class _Operation:
+    __slots__ = ("record", "path", "method", "json", "tags")
+
+    def __init__(self, scenario: Scenario, record, m: Mock):
+        self.record = record
+        self.path, self.method, op = mock_operation(scenario, m)
+        self.tags = tuple(m.tags or ())
+        self.json = _dumps(op)
+
+class _Document:
+    __slots__ = ("scenario", "revision", "ops", "body", "etag")
+
+    def __init__(self, scenario: Scenario, revision: Any, ops: Dict[str, _Operation], body: bytes):
+        self.scenario = scenario
+        self.revision = revision
+        self.ops = ops
+        self.body = body
+        self.etag = strong_etag(body)
+
+class ScenarioOpenAPICache:
+    """Documentos OpenAPI por cenário, já serializados e com ETag.
+
+    Um documento só é remontado quando o cenário ou algum mock dele muda no snapshot; na remontagem,
+    as operações dos mocks que não mudaram (mesmo registro no snapshot) são reaproveitadas já serializadas.
+    """
+
+    def __init__(self, app_title: str, app_version: str, guide_url: str):
+        self.app_title, self.app_version, self.guide_url = app_title, app_version, guide_url
+        self._docs: Dict[str, _Document] = {}
+        self.builds = 0
+
+    def document(self, snapshot, basepath: str) -> Optional[_Document]:
+        scenario = snapshot.scenario(basepath)
+        if scenario is None:
+            self._docs.pop(basepath, None)
+            return None
+        revision = snapshot.scenario_revision(basepath)
+        doc = self._docs.get(basepath)
+        if doc is None or doc.scenario is not scenario or doc.revision is not revision:
+            doc = self._docs[basepath] = self._build(snapshot, scenario, revision, doc.ops if doc else {})
+            if len(self._docs) > 2 * len(snapshot.scenarios()) + 16: self._prune(snapshot)
+        return doc
+
+    def _build(self, snapshot, scenario: Scenario, revision: Any, previous: Dict[str, _Operation]) -> _Document:
+        self.builds += 1
+        ops: Dict[str, _Operation] = {}
+        paths: Dict[str, Dict[str, str]] = {}
+        tags: Dict[str, Dict[str, str]] = {}
+        records = [r for r in snapshot.iter_scenario_records(scenario.basepath, ordered=True) if r.enabled]
+        stale = [r for r in records if (op := previous.get(r.id)) is None or op.record is not r]
+        # só os mocks novos/alterados voltam a ser modelos, todos numa única validação
+        fresh = {r.id: _Operation(scenario, r, m) for r, m in zip(stale, records_models(stale))} if stale else {}
+        for r in records:
+            op = ops[r.id] = fresh.get(r.id) or previous[r.id]
+            paths.setdefault(op.path, {})[op.method] = op.json
+            for t in op.tags: tags.setdefault(t, _tag(t))
+        head = {"openapi": "3.0.3", "info": _info(scenario, self.app_title, self.app_version, self.guide_url), "tags": list(tags.values())}
+        body = "".join([
+            _dumps(head)[:-1], ',"paths":{',
+            ",".join(_dumps(path) + ":{" + ",".join(_dumps(method) + ":" + op_json for method, op_json in item.items()) + "}" for path, item in paths.items()),
+            '},"components":{}}',
+        ])
+        return _Document(scenario, revision, ops, body.encode("utf-8"))
+
+    def _prune(self, snapshot):
+        for bp in [bp for bp in self._docs if snapshot.scenario(bp) is None]: self._docs.pop(bp, None)
+
+    def clear(self):
+        self._docs.clear()
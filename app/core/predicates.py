@@ -0,0 +1,106 @@
+from __future__ import annotations
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from ..models import ConditionPredicate, ResponseVariant
+from ..utils.jsonpath import compile_jsonpath
+
+# (headers, query, path_params, body, jwt_ctx) -> valor extraído / resultado do predicado
+Extractor = Callable[[Dict[str, str], Dict[str, str], Dict[str, str], Any, Dict[str, Any]], Any]
+Test = Callable[[Dict[str, str], Dict[str, str], Dict[str, str], Any, Dict[str, Any]], bool]
+
+_OP_COST = {"equals": 0, "in": 0, "contains": 1, "regex": 2}
+
+def contains(val, needle) -> bool:
+    try:
+        if isinstance(val, list):
+            return needle in val
+        if isinstance(val, dict):
+            return str(needle) in val.values() or needle in val.keys()
+        return str(needle) in str(val)
+    except Exception:
+        return False
+
+def _extractor(pred: ConditionPredicate) -> Tuple[Extractor, int]:
+    key = pred.key or ""
+    if pred.source == "header":
+        k = key.lower()
+        return (lambda h, q, p, b, j: h.get(k)), 0
+    if pred.source == "query":
+        return (lambda h, q, p, b, j: q.get(key)), 0
+    if pred.source == "path":
+        return (lambda h, q, p, b, j: p.get(key)), 0
+    if pred.source == "body":
+        if pred.jsonpath:
+            acc = compile_jsonpath(pred.jsonpath)
+            return (lambda h, q, p, b, j: acc(b)), 2
+        if pred.key:
+            return (lambda h, q, p, b, j: b.get(key) if isinstance(b, dict) else None), 1
+        return (lambda h, q, p, b, j: None), 0
+    if pred.source == "jwt_header":
+        return (lambda h, q, p, b, j: (j.get("header") or {}).get(key)), 1
+    if pred.source == "jwt_payload":
+        if pred.jsonpath:
+            acc = compile_jsonpath(pred.jsonpath)
+            return (lambda h, q, p, b, j: acc(j.get("payload"))), 2
+        return (lambda h, q, p, b, j: (j.get("payload") or {}).get(key)), 1
+    return (lambda h, q, p, b, j: None), 0
+
+def compile_regex(pattern: Any) -> "re.Pattern[str]":
+    try: return re.compile(str(pattern or ""))
+    except re.error as e: raise ValueError(f"Invalid regex {pattern!r}: {e}") from e
+
+def compile_predicate(pred: ConditionPredicate) -> Tuple[Test, int]:
+    """Compila o predicado em (teste, custo estimado). Regex inválida gera ValueError."""
+    get, cost = _extractor(pred)
+    cost += _OP_COST.get(pred.op, 0)
+    if pred.op == "equals":
+        value = pred.value
+        return (lambda h, q, p, b, j: get(h, q, p, b, j) == value), cost
+    if pred.op == "regex":
+        search = compile_regex(pred.value).search
+        return (lambda h, q, p, b, j: bool(search(str(get(h, q, p, b, j) or "")))), cost
+    if pred.op == "contains":
+        needle = pred.value
+        return (lambda h, q, p, b, j: contains(get(h, q, p, b, j), needle)), cost
+    if pred.op == "in":
+        if pred.values is None: return (lambda h, q, p, b, j: False), 0
+        allowed = frozenset(str(x) for x in pred.values)
+        return (lambda h, q, p, b, j: str(get(h, q, p, b, j)) in allowed), cost
+    return (lambda h, q, p, b, j: False), 0
+
+class CompiledVariant:
+    __slots__ = ("tests", "response")
+
+    def __init__(self, variant: ResponseVariant, response: Any = None):
+        compiled = [compile_predicate(p) for p in variant.when]
+        # predicados baratos primeiro; o resultado do `all` não depende da ordem
+        compiled.sort(key=lambda t: t[1])
+        self.tests: Tuple[Test, ...] = tuple(t for t, _ in compiled)
+        self.response = variant.response if response is None else response
+
+    def matches(self, headers, query, path_params, body, jwt_ctx) -> bool:
+        for t in self.tests:
+            if not t(headers, query, path_params, body, jwt_ctx): return False
+        return True
+
+class VariantPlan:
+    """Variantes de um mock compiladas na escrita; a primeira que casar vence.
+
+    `sources` diz quais partes da requisição os predicados consultam (header, query, body, ...).
+    Com `encode`, cada variante guarda `encode(variant)` no lugar do MockResponse.
+    """
+    __slots__ = ("variants", "sources")
+
+    def __init__(self, variants: Optional[Sequence[ResponseVariant]], encode: Optional[Callable[[ResponseVariant], Any]] = None):
+        self.variants: Tuple[CompiledVariant, ...] = tuple(CompiledVariant(v, encode(v) if encode else None) for v in (variants or []))
+        self.sources = frozenset(p.source for v in (variants or []) for p in v.when)
+
+    def select(self, headers, query, path_params, body, jwt_ctx) -> Optional[int]:
+        """Índice da primeira variante que casa (None se nenhuma)."""
+        for i, v in enumerate(self.variants):
+            if v.matches(headers, query, path_params, body, jwt_ctx): return i
+        return None
+
+    def pick(self, headers, query, path_params, body, jwt_ctx) -> Any:
+        i = self.select(headers, query, path_params, body, jwt_ctx)
+        return None if i is None else self.variants[i].response
@@ -0,0 +1,101 @@
+"""Profiler por amostragem do event loop, para `GET /api/profile` (PROFILER_ENABLED).
+
+Uma thread acorda a cada `interval` segundos, copia a pilha da thread do event loop
+(`sys._current_frames`) e conta pilhas iguais. Nada é instrumentado no caminho das requisições: o
+custo é o da thread amostradora (algumas dezenas de µs por amostra, disputando o GIL) e só existe
+enquanto uma coleta está em andamento. Pilhas cujo topo é o `select` do loop contam como ociosas.
+"""
+from __future__ import annotations
+import asyncio, os, sys, threading, time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+import anyio.to_thread
+
+Frame = str
+Stack = Tuple[Frame, ...]
+
+MAX_DEPTH = 128
+_IDLE = frozenset({"select", "poll", "epoll", "kqueue"})
+_ROOTS = tuple(p.rstrip(os.sep) + os.sep for p in sys.path if p)
+
+def _where(filename: str) -> str:
+    # caminho relativo ao sys.path (pacote/módulo), que é o que identifica a função na saída
+    best = max((r for r in _ROOTS if filename.startswith(r)), key=len, default="")
+    return filename[len(best):] if best else filename
+
+class Profile:
+    def __init__(self, stacks: Counter, idle: int, seconds: float, interval: float):
+        self.stacks = stacks
+        self.idle = idle
+        self.seconds = seconds
+        self.interval = interval
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values()) + self.idle
+
+    def functions(self) -> List[Dict[str, Any]]:
+        """Por função: `self` = amostras no topo da pilha; `total` = amostras em que aparece (uma vez por pilha)."""
+        own: Counter = Counter(); total: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for frame in set(stack): total[frame] += n
+        return [{"function": f, "self": own[f], "total": n} for f, n in total.most_common()]
+
+    def as_dict(self, top: int = 50) -> Dict[str, Any]:
+        busy = sum(self.stacks.values())
+        functions = sorted(self.functions(), key=lambda f: (-f["self"], -f["total"]))[:top]
+        return {"seconds": round(self.seconds, 3), "interval_ms": self.interval * 1000, "samples": self.samples, "idle": self.idle, "busy": busy,
+                "functions": functions,
+                "stacks": [{"count": n, "ratio": round(n / busy, 4), "frames": list(stack)} for stack, n in self.stacks.most_common(top)]}
+
+    def folded(self) -> str:
+        """Formato "collapsed" (raiz;...;folha contagem), aceito por flamegraph.pl e speedscope."""
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+class SamplingProfiler:
+    def __init__(self):
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def run(self, seconds: float, interval: float) -> Profile:
+        """Amostra a thread que chamou (a do event loop) por `seconds`; só uma coleta por vez."""
+        if self._running: raise RuntimeError("A profile is already being collected")
+        self._running = True
+        target = threading.get_ident()
+        stacks: Counter = Counter()
+        idle = [0]
+        stop = threading.Event()
+        labels: Dict[Any, Frame] = {}
+
+        def label(code) -> Frame:
+            name = labels.get(code)
+            if name is None: name = labels[code] = f"{code.co_name} ({_where(code.co_filename)}:{code.co_firstlineno})"
+            return name
+
+        def sample() -> None:
+            while not stop.wait(interval):
+                frame = sys._current_frames().get(target)
+                if frame is None: continue
+                if frame.f_code.co_name in _IDLE: idle[0] += 1; continue
+                stack: List[Frame] = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(label(frame.f_code)); frame = frame.f_back
+                stack.reverse()
+                stacks[tuple(stack)] += 1
+
+        thread = threading.Thread(target=sample, name="mock-profiler", daemon=True)
+        t0 = time.perf_counter()
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await anyio.to_thread.run_sync(thread.join)
+            self._running = False
+        return Profile(stacks, idle[0], time.perf_counter() - t0, interval)
+
+profiler = SamplingProfiler()
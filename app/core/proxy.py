@@ -0,0 +1,231 @@
+"""Proxy para o upstream do cenário (`upstream_url`) quando nenhum mock casa, com gravação opcional (`record`).
+
+A requisição sem mock é repassada por um `httpx.AsyncClient` compartilhado (pool de conexões por
+event loop), com os corpos em streaming nos dois sentidos: o da requisição só é lido antes quando
+o match já o leu ou quando o cenário grava, e o da resposta segue como chega (`aiter_raw`, sem
+descomprimir). Com `record`, o par requisição/resposta vira um mock do cenário (URI literal, query,
+corpo exact, status, headers filtrados) e a próxima requisição igual é respondida localmente; um mock
+equivalente já existente (`FileExistsError` do store) não é duplicado. HEAD é repassado mas não gravado:
+sem corpo na resposta, o mock gravado responderia vazio ao GET da mesma URI.
+
+Requisições GET/HEAD/OPTIONS idênticas (método, URL, headers repassados) que chegam enquanto outra
+está em andamento esperam por ela em vez de abrir outra chamada: a primeira guarda a resposta (até
+PROXY_BUFFER_BYTES) enquanto a repassa e as demais recebem a cópia. Se a resposta passar do limite
+ou a chamada falhar, cada uma faz a sua.
+"""
+from __future__ import annotations
+import asyncio, hashlib, json, logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import httpx
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from .config import PROXY_BUFFER_BYTES, PROXY_MAX_CONNECTIONS, PROXY_RECORD_DROP_HEADERS, PROXY_TIMEOUT
+from .request_context import RequestContext
+from ..models import MockCreate, MockRequestMatch, MockResponse, Scenario
+
+log = logging.getLogger(__name__)
+
+# Origem da resposta repassada: "upstream" (chamada própria) ou "shared" (cópia de uma chamada idêntica em andamento)
+HEADER = "X-Mock-Proxy"
+_HEADER = HEADER.lower().encode("latin-1")
+
+RawHeaders = List[Tuple[bytes, bytes]]
+Result = Tuple[int, RawHeaders, bytes]
+BodyStream = Callable[[], Any]
+
+_HOP_BY_HOP = frozenset({b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization", b"proxy-connection",
+                         b"te", b"trailer", b"trailers", b"transfer-encoding", b"upgrade"})
+_REQUEST_DROP = _HOP_BY_HOP | {b"host"}
+_RECORD_DROP = frozenset({"content-length", "content-type", "content-encoding", *PROXY_RECORD_DROP_HEADERS})
+_COLLAPSIBLE = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartilhado (pool de conexões) para os upstreams."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=PROXY_TIMEOUT, follow_redirects=False,
+                                    limits=httpx.Limits(max_connections=PROXY_MAX_CONNECTIONS, max_keepalive_connections=PROXY_MAX_CONNECTIONS))
+        _client_loop = loop
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None and not _client.is_closed: await _client.aclose()
+    _client = None
+
+class UpstreamError(RuntimeError):
+    """Falha ao falar com o upstream: 502 (conexão/protocolo) ou 504 (timeout)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _recordable(uri: str) -> bool:
+    # o caminho gravado vira a URI do mock e precisa ser lido como literal
+    return "{" not in uri and "*" not in uri and not uri.startswith("^")
+
+def _decode(raw: bytes, media_type: str) -> Tuple[bool, Any]:
+    """(ok, corpo) para o mock gravado: JSON quando o content-type indica, senão texto UTF-8; binário não grava."""
+    try: text = raw.decode("utf-8")
+    except UnicodeDecodeError: return False, None
+    if media_type.startswith("application/json") and raw:
+        try: return True, json.loads(text)
+        except ValueError: return False, None
+    return True, text
+
+def _header(headers: RawHeaders, name: bytes) -> Optional[str]:
+    for k, v in headers:
+        if k.lower() == name: return v.decode("latin-1")
+    return None
+
+def recorded_mock(scenario: Scenario, ctx: RequestContext, uri: str, result: Result) -> Optional[MockCreate]:
+    """Mock equivalente ao par requisição/resposta (None se não dá para reproduzir: 5xx, corpo binário ou comprimido)."""
+    status, headers, raw = result
+    if status >= 500: return None
+    encoding = _header(headers, b"content-encoding")
+    if encoding and encoding.lower() != "identity": return None
+    content_type = _header(headers, b"content-type") or ""
+    media_type = content_type.split(";")[0].strip().lower()
+    # corpo vazio é gravado como texto vazio (em JSON viraria "null")
+    if not raw or not media_type: media_type = "text/plain" if not media_type or media_type.startswith("application/json") else media_type
+    ok, body = _decode(raw, media_type)
+    if not ok: return None
+    kept: Dict[str, str] = {}
+    for k, v in headers:
+        name = k.decode("latin-1").lower()
+        if k not in _HOP_BY_HOP and name not in _RECORD_DROP and k != _HEADER: kept[name] = v.decode("latin-1")
+    request_type = ctx.header("content-type")
+    request = MockRequestMatch(method=ctx.method, uri=uri, query=dict(ctx.query) or None, body=ctx.body if ctx.raw_body else None,
+                               content_type=request_type.split(";")[0].strip() if request_type else None)
+    response = MockResponse(status_code=status, headers=kept or None, media_type=media_type, body=body)
+    return MockCreate(scenario_basepath=scenario.basepath, name=f"{ctx.method} {uri}", description=f"Recorded from {scenario.upstream_url}",
+                      tags=["recorded"], request=request, response=response)
+
+class UpstreamResponse(Response):
+    """Resposta do upstream repassada em streaming; guarda a cópia (até `limit` bytes) para quem espera a mesma chamada e para a gravação."""
+
+    def __init__(self, upstream: httpx.Response, headers: RawHeaders, extra: RawHeaders, limit: Optional[int],
+                 done: Callable[[Optional[Result]], Awaitable[None]]):
+        self.status_code = upstream.status_code
+        self.background = None
+        self.body = b""
+        self.headers_kept = headers  # headers do upstream, sem os acrescentados aqui
+        self.raw_headers = [*headers, (_HEADER, b"upstream"), *extra]
+        self.upstream = upstream
+        self.limit = limit
+        self.done = done
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        chunks: Optional[List[bytes]] = [] if self.limit is not None else None
+        size = 0; result = None
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            async for chunk in self.upstream.aiter_raw():
+                if chunks is not None:
+                    size += len(chunk)
+                    if size > self.limit: chunks = None
+                    else: chunks.append(chunk)
+                if chunk: await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+            if chunks is not None: result = (self.status_code, self.headers_kept, b"".join(chunks))
+        except httpx.HTTPError as e:
+            log.warning("upstream response interrupted: %r", e)
+        finally:
+            await self.upstream.aclose()
+            await self.done(result)
+
+class UpstreamProxy:
+    def __init__(self, buffer_bytes: int = PROXY_BUFFER_BYTES, timeout: float = PROXY_TIMEOUT):
+        self.buffer_bytes = buffer_bytes
+        self.timeout = timeout
+        self._flights: Dict[Tuple, asyncio.Future] = {}
+        self.calls = 0       # chamadas ao upstream
+        self.shared = 0      # respostas servidas da chamada idêntica de outra requisição
+        self.recorded = 0    # mocks gravados
+
+    async def forward(self, store, scenario: Scenario, ctx: RequestContext, raw_headers: RawHeaders, stream: BodyStream,
+                      extra: RawHeaders = ()) -> Response:
+        """Repassa a requisição ao `upstream_url` do cenário; `stream()` itera o corpo ainda não lido. Levanta UpstreamError."""
+        base = scenario.basepath.rstrip("/")
+        uri = ctx.path[len(base):] or "/"
+        url = scenario.upstream_url.rstrip("/") + quote(uri, safe="/:@!$&'()*+,;=~%")
+        if ctx.query_string: url += "?" + ctx.query_string
+        record = scenario.record and ctx.method != "HEAD" and _recordable(uri)
+        headers = [(k, v) for k, v in raw_headers if k not in _REQUEST_DROP]
+        if record:
+            # corpo em memória para o match exact do mock gravado; resposta sem compressão para gravar o corpo
+            headers = [(k, v) for k, v in headers if k != b"accept-encoding"] + [(b"accept-encoding", b"identity")]
+            await ctx.load_body()
+        if ctx.body_loaded:
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            content = ctx.raw_body
+        elif _header(raw_headers, b"content-length") in (None, "0") and _header(raw_headers, b"transfer-encoding") is None:
+            content = b""
+        else:
+            content = stream()
+        key = None
+        if ctx.method in _COLLAPSIBLE and isinstance(content, bytes):
+            key = (ctx.method, url, tuple(headers), hashlib.sha256(content).digest())
+        leader: Optional[asyncio.Future] = None
+        if key is not None:
+            flight = self._flights.get(key)
+            if flight is not None:
+                try: result = await asyncio.wait_for(asyncio.shield(flight), self.timeout)
+                except asyncio.TimeoutError: result = None
+                if result is not None:
+                    self.shared += 1
+                    status, headers_out, body = result
+                    response = Response(body, status)
+                    response.raw_headers = [*headers_out, (_HEADER, b"shared"), *extra]
+                    return response
+            else:
+                leader = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            upstream = await self._send(ctx.method, url, headers, content)
+        except BaseException:
+            self._land(key, leader, None)
+            raise
+
+        async def done(result: Optional[Result]) -> None:
+            self._land(key, leader, result)
+            if record and result is not None: await self._record(store, scenario, ctx, uri, result)
+
+        out = [(k, v) for k, v in upstream.headers.raw if k.lower() not in _HOP_BY_HOP]
+        limit = self.buffer_bytes if leader is not None or record else None
+        return UpstreamResponse(upstream, out, extra, limit, done)
+
+    async def _send(self, method: str, url: str, headers: RawHeaders, content) -> httpx.Response:
+        client = get_client()
+        self.calls += 1
+        try:
+            return await client.send(client.build_request(method, url, headers=headers, content=content), stream=True)
+        except httpx.TimeoutException as e:
+            raise UpstreamError(504, f"Upstream timeout: {method} {url}") from e
+        except httpx.HTTPError as e:
+            raise UpstreamError(502, f"Upstream error: {method} {url}: {e!r}") from e
+
+    def _land(self, key, leader: Optional[asyncio.Future], result: Optional[Result]) -> None:
+        if leader is None: return
+        if self._flights.get(key) is leader: del self._flights[key]
+        if not leader.done(): leader.set_result(result)
+
+    async def _record(self, store, scenario: Scenario, ctx: RequestContext, uri: str, result: Result) -> None:
+        try:
+            mock = recorded_mock(scenario, ctx, uri, result)
+            if mock is None: return
+            await store.create_mock(mock)
+            self.recorded += 1
+        except (FileExistsError, KeyError):
+            pass  # já gravado por uma requisição concorrente, ou cenário removido nesse meio tempo
+        except Exception as e:
+            log.warning("could not record %s %s: %r", ctx.method, uri, e)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "shared": self.shared, "recorded": self.recorded, "in_flight": len(self._flights)}
+
+proxy = UpstreamProxy()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from starlette.requests import cookie_parser
+
+RawHeaders = List[Tuple[bytes, bytes]]
+BodyLoader = Callable[[], Awaitable[bytes]]
+
+_UNSET = object()
+
+class RequestContext:
+    """Partes da requisição materializadas só no primeiro acesso.
+
+    Headers, query e cookies são montados a partir do scope ASGI quando algum mock/variante os consulta;
+    o corpo só é lido (`await load_body()`) e decodificado quando um mock declara `request.body` ou uma
+    variante tem predicado de body. Um upload grande para um mock que casa só por método/path nunca é lido.
+    """
+    __slots__ = ("method", "path", "variant", "_raw_headers", "_query_string", "_loader", "_headers", "_query", "_cookies", "_body_raw", "_body", "_text")
+
+    def __init__(self, method: str, path: str, raw_headers: RawHeaders, query_string: bytes = b"", body_loader: Optional[BodyLoader] = None):
+        self.method = method.upper()
+        self.path = path
+        self.variant: Optional[int] = None  # índice da variante escolhida (None = resposta padrão)
+        self._raw_headers = raw_headers
+        self._query_string = query_string
+        self._loader = body_loader
+        self._headers: Optional[Dict[str, str]] = None
+        self._query: Optional[Dict[str, str]] = None
+        self._cookies: Optional[Dict[str, str]] = None
+        self._body_raw: Optional[bytes] = None
+        self._body: Any = _UNSET
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_parts(cls, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: Any) -> "RequestContext":
+        """Contexto com as partes já materializadas (ex.: `InMemoryStore.find_match`)."""
+        ctx = cls(method, path, [])
+        ctx._query = query
+        ctx._headers = {k.lower(): v for k, v in headers.items()}
+        ctx._body_raw, ctx._body = b"", body
+        return ctx
+
+    @classmethod
+    def from_scope(cls, scope: Dict[str, Any], body_loader: Optional[BodyLoader] = None) -> "RequestContext":
+        return cls(scope["method"], scope["path"], scope["headers"], scope.get("query_string", b""), body_loader)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        if self._headers is None:
+            # ASGI já entrega os nomes em minúsculas; repetidos: vale o último, como no dict anterior
+            self._headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in self._raw_headers}
+        return self._headers
+
+    def header(self, name: str) -> Optional[str]:
+        """Um header sem montar o dict inteiro (nome em minúsculas)."""
+        if self._headers is not None: return self._headers.get(name)
+        key, found = name.encode("latin-1"), None
+        for k, v in self._raw_headers:
+            if k == key: found = v
+        return found.decode("latin-1") if found is not None else None
+
+    @property
+    def query(self) -> Dict[str, str]:
+        if self._query is None:
+            self._query = dict(parse_qsl(self._query_string.decode("latin-1"), keep_blank_values=True))
+        return self._query
+
+    @property
+    def query_string(self) -> str:
+        return self._query_string.decode("latin-1")
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        if self._cookies is None:
+            self._cookies = cookie_parser(self.header("cookie") or "")
+        return self._cookies
+
+    @property
+    def body_loaded(self) -> bool:
+        return self._body_raw is not None
+
+    async def load_body(self) -> Any:
+        if self._body_raw is None:
+            self._body_raw = await self._loader() if self._loader is not None else b""
+        return self.body
+
+    @property
+    def raw_body(self) -> Optional[bytes]:
+        """Bytes do corpo, se já lido (None caso contrário)."""
+        return self._body_raw
+
+    @property
+    def body(self) -> Any:
+        """Corpo decodificado (JSON quando o content-type indica, senão texto); exige `load_body()` antes."""
+        if self._body is _UNSET:
+            if self._body_raw is None: raise RuntimeError("Request body not loaded; await load_body() first")
+            self._body = _decode_body(self._body_raw, self.header("content-type") or "")
+        return self._body
+
+    @property
+    def text(self) -> str:
+        """Corpo bruto como texto (sem interpretar JSON); exige `load_body()` antes."""
+        if self._text is None:
+            if self._body_raw is None: raise RuntimeError("Request body not loaded; await load_body() first")
+            body = self.body
+            if self._body_raw: self._text = self._body_raw.decode("utf-8", errors="replace")
+            else: self._text = "" if body is None else body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)  # from_parts
+        return self._text
+
+def _decode_body(raw: bytes, content_type: str) -> Any:
+    if not raw: return None
+    text = raw.decode("utf-8", errors="replace")
+    if "application/json" in content_type:
+        try: return json.loads(text)
+        except json.JSONDecodeError: return text
+    return text
@@ -0,0 +1,192 @@
+from __future__ import annotations
+import gzip, hashlib, json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from starlette.responses import Response
+from ..models import MockResponse
+from .chaos import ChaosPlan
+from .config import COMPRESSION_MIN_BYTES
+from .templating import TemplatePlan, compile_json_template, compile_text_template, has_placeholders
+
+try:
+    import brotli  # opcional: pip install brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+RawHeaders = Tuple[Tuple[bytes, bytes], ...]
+
+# Codificações pré-computadas, em ordem de preferência do servidor
+CODECS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None: CODECS["br"] = lambda data: brotli.compress(data, quality=11)
+CODECS["gzip"] = lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+
+# encoder reaproveitado: json.dumps com argumentos monta um JSONEncoder novo a cada chamada
+_encode_json = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode
+
+def _serialize(body: Any, media_type: str) -> bytes:
+    if media_type.startswith("application/json"):
+        return _encode_json(body).encode("utf-8")
+    text = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+    return text.encode("utf-8")
+
+def render_body(resp: MockResponse) -> bytes:
+    return _serialize(resp.body, resp.media_type or "application/json")
+
+def compile_template(resp: MockResponse) -> TemplatePlan:
+    media_type = resp.media_type or "application/json"
+    if isinstance(resp.body, str) and not media_type.startswith("application/json"): return compile_text_template(resp.body)
+    return compile_json_template(resp.body, lambda body: _serialize(body, media_type))
+
+def _bodiless(status: int) -> bool:
+    return status < 200 or status in (204, 304)
+
+def strong_etag(body: bytes, suffix: str = "") -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + suffix + '"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match: return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+@lru_cache(maxsize=256)
+def accepted_encodings(accept_encoding: str) -> frozenset:
+    """Codificações aceitas (q > 0) num header Accept-Encoding; o resultado é cacheado por valor do header."""
+    accepted, rejected, star = set(), set(), False
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try: q = float(v)
+                except ValueError: q = 0.0
+        if name == "*": star = q > 0
+        elif q > 0: accepted.add(name)
+        else: rejected.add(name)
+    if star: accepted |= set(CODECS) - rejected
+    return frozenset(accepted)
+
+class Representation:
+    __slots__ = ("body", "etag", "raw_headers")
+
+    def __init__(self, body: bytes, etag: str, raw_headers: RawHeaders):
+        self.body = body
+        self.etag = etag
+        self.raw_headers = raw_headers
+
+class RenderedResponse:
+    """Resposta de template renderizada para uma requisição: sem ETag (nem 304) e sem versões comprimidas."""
+    __slots__ = ("status_code", "identity", "chaos")
+    source = None  # template e body_source são exclusivos
+
+    def __init__(self, status_code: int, identity: Representation, chaos: Optional[ChaosPlan] = None):
+        self.status_code = status_code
+        self.identity = identity
+        self.chaos = chaos
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Representation:
+        return self.identity
+
+    def not_modified_for(self, rep: Representation, if_none_match: Optional[str]) -> bool:
+        return False
+
+class EncodedResponse:
+    """MockResponse já serializado na escrita do mock: bytes, Content-Length e ETag forte.
+
+    Com `compress`, corpos a partir de COMPRESSION_MIN_BYTES também ganham versões gzip/br
+    pré-comprimidas, escolhidas por requisição via Accept-Encoding sem gastar CPU comprimindo.
+    Com `template` (e placeholders no corpo), `template` guarda o plano compilado e a resposta
+    de cada requisição vem de `render()`; sem a flag, `template` é None e nada muda.
+    `chaos` (latência/banda/falhas, app.core.chaos) é None para respostas entregues direto; `source`
+    (app.core.body_source) é o arquivo/gerador servido por streaming no lugar do corpo.
+    """
+    __slots__ = ("status_code", "compress", "identity", "encodings", "template", "dynamic_headers", "chaos", "source")
+
+    def __init__(self, resp: MockResponse, compress: bool = False, chaos: Optional[ChaosPlan] = None, source: Any = None):
+        self.status_code = resp.status_code
+        self.compress = compress
+        self.chaos = chaos
+        self.source = source
+        body = b"" if _bodiless(resp.status_code) else render_body(resp)
+        base = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (resp.headers or {}).items()]
+        keys = {k for k, _ in base}
+        if b"content-type" not in keys:
+            content_type = resp.media_type or "application/json"
+            if content_type.startswith("text/") and "charset=" not in content_type.lower():
+                content_type += "; charset=utf-8"
+            base.append((b"content-type", content_type.encode("latin-1")))
+        user_etag = dict(base).get(b"etag")
+
+        self.template: Optional[TemplatePlan] = None
+        if resp.template and not _bodiless(resp.status_code) and has_placeholders(resp.body): self.template = compile_template(resp)
+        self.dynamic_headers: RawHeaders = ()
+        if self.template is not None or source is not None:
+            # corpo muda a cada requisição: Content-Length (e ETag, no streaming) saem na hora, sem pré-compressão
+            self.dynamic_headers = tuple((k, v) for k, v in base if k not in (b"content-length", b"etag"))
+            compress = False
+
+        self.encodings: Dict[str, Representation] = {}
+        if compress and len(body) >= COMPRESSION_MIN_BYTES and b"content-encoding" not in keys:
+            for name, codec in CODECS.items():
+                data = codec(body)
+                if len(data) < len(body):
+                    self.encodings[name] = self._representation(data, base, keys, user_etag, name)
+        if self.encodings and b"vary" not in keys: base.append((b"vary", b"Accept-Encoding"))
+        self.identity = self._representation(body, base, keys, user_etag, None)
+
+    def _representation(self, body: bytes, base: List[Tuple[bytes, bytes]], keys: set, user_etag: Optional[bytes], encoding: Optional[str]) -> Representation:
+        raw = list(base)
+        if b"content-length" not in keys and not _bodiless(self.status_code):
+            raw.append((b"content-length", str(len(body)).encode("latin-1")))
+        if encoding:
+            raw.append((b"content-encoding", encoding.encode("latin-1")))
+            if b"vary" not in keys: raw.append((b"vary", b"Accept-Encoding"))
+        if user_etag is not None:
+            etag = user_etag.decode("latin-1")
+        else:
+            etag = strong_etag(body, "-" + encoding if encoding else "")
+            raw.append((b"etag", etag.encode("latin-1")))
+        return Representation(body, etag, tuple(raw))
+
+    @property
+    def body(self) -> bytes:
+        return self.identity.body
+
+    @property
+    def etag(self) -> str:
+        return self.identity.etag
+
+    def render(self, ctx: Any, path_params: Dict[str, str], jwt_ctx: Dict[str, Any]) -> RenderedResponse:
+        body = self.template.render(ctx, path_params, jwt_ctx)
+        return RenderedResponse(self.status_code, Representation(body, "", self.dynamic_headers + ((b"content-length", str(len(body)).encode("latin-1")),)), self.chaos)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Representation:
+        if self.encodings and accept_encoding:
+            accepted = accepted_encodings(accept_encoding)
+            for name, rep in self.encodings.items():
+                if name in accepted: return rep
+        return self.identity
+
+    def not_modified_for(self, rep: Representation, if_none_match: Optional[str]) -> bool:
+        if _bodiless(self.status_code) or self.status_code >= 300: return False
+        return etag_matches(rep.etag, if_none_match)
+
+def _extra(extra_headers: Iterable[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in extra_headers]
+
+class PreEncodedResponse(Response):
+    """Resposta que reaproveita bytes e headers de uma `Representation` sem renderizar nada."""
+
+    def __init__(self, rep: Representation, status_code: int, extra_headers: Iterable[Tuple[str, str]] = ()):
+        self.status_code = status_code
+        self.background = None
+        self.body = rep.body
+        self.raw_headers = list(rep.raw_headers) + _extra(extra_headers)
+
+class NotModifiedResponse(Response):
+    def __init__(self, rep: Representation, extra_headers: Iterable[Tuple[str, str]] = ()):
+        self.status_code = 304
+        self.background = None
+        self.body = b""
+        self.raw_headers = [(b"etag", rep.etag.encode("latin-1"))] + _extra(extra_headers)
@@ -0,0 +1,169 @@
+"""Templates de corpo de resposta (`MockResponse.template`), compilados na escrita do mock.
+
+Placeholders `{{...}}` suportados:
+  path.<nome>  query.<nome>  header.<nome> (`_` também casa com `-`, ex.: header.X_Tenant)
+  jwt.<campo>[.<campo>...]   claims do payload do JWT validado
+  jsonpath('$.expr')         valor do corpo da requisição
+  now  uuid  randint(a,b)
+
+O corpo é serializado uma única vez em trechos de bytes estáticos intercalados com slots; por
+requisição só os slots são avaliados e os trechos concatenados. Em JSON, uma string que é
+exatamente um placeholder vira o valor JSON dele (número, objeto, null...); placeholders no meio de
+um texto viram texto. Chaves de objeto e headers não são templates.
+"""
+from __future__ import annotations
+import json, random, re, uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..utils.jsonpath import compile_jsonpath, parse_jsonpath
+
+# (ctx, path_params, jwt_ctx) -> valor
+Getter = Callable[[Any, Dict[str, str], Dict[str, Any]], Any]
+Slot = Callable[[Any, Dict[str, str], Dict[str, Any]], bytes]
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(.*?)\s*\}\}")
+_CALL = re.compile(r"^(\w+)\((.*)\)$", re.S)
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+def has_placeholders(value: Any) -> bool:
+    if isinstance(value, str): return _PLACEHOLDER.search(value) is not None
+    if isinstance(value, dict): return any(has_placeholders(v) for v in value.values())
+    if isinstance(value, list): return any(has_placeholders(v) for v in value)
+    return False
+
+def _header(name: str) -> Getter:
+    exact, dashed = name.lower(), name.lower().replace("_", "-")
+    if exact == dashed: return lambda c, p, j: c.header(exact)
+    return lambda c, p, j: c.header(exact) if c.header(exact) is not None else c.header(dashed)
+
+def _jwt(path: str) -> Getter:
+    keys = tuple(path.split("."))
+    def get(c, p, j):
+        cur = j.get("payload")
+        for k in keys:
+            if not isinstance(cur, dict): return None
+            cur = cur.get(k)
+        return cur
+    return get
+
+def _unquote(arg: str) -> str:
+    arg = arg.strip()
+    if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "'\"": return arg[1:-1]
+    raise ValueError(f"Expected a quoted argument, got {arg!r}")
+
+def compile_placeholder(expr: str) -> Tuple[Getter, bool]:
+    """(getter, usa o corpo da requisição?) para a expressão entre `{{ }}`; ValueError se não suportada."""
+    if expr == "now": return (lambda c, p, j: datetime.now(timezone.utc).isoformat()), False
+    if expr == "uuid": return (lambda c, p, j: str(uuid.uuid4())), False
+    call = _CALL.match(expr)
+    if call:
+        fn, args = call.group(1), call.group(2)
+        if fn == "jsonpath":
+            path = _unquote(args); parse_jsonpath(path)
+            get = compile_jsonpath(path)
+            return (lambda c, p, j: get(c.body)), True
+        if fn == "randint":
+            try: lo, hi = (int(a) for a in args.split(","))
+            except ValueError: raise ValueError(f"randint expects two integers: {expr!r}")
+            if lo > hi: raise ValueError(f"randint range is empty: {expr!r}")
+            return (lambda c, p, j: random.randint(lo, hi)), False
+        raise ValueError(f"Unknown template function: {fn!r}")
+    source, _, name = expr.partition(".")
+    if not name: raise ValueError(f"Unknown template placeholder: {expr!r}")
+    if source == "path": return (lambda c, p, j: p.get(name)), False
+    if source == "query": return (lambda c, p, j: c.query.get(name)), False
+    if source == "header": return _header(name), False
+    if source == "jwt": return _jwt(name), False
+    raise ValueError(f"Unknown template placeholder: {expr!r}")
+
+def _text(value: Any) -> str:
+    # no meio de um texto: objetos, listas, números e booleanos em JSON; o resto (ex.: datetime) com str()
+    if value is None: return ""
+    if isinstance(value, str): return value
+    return _JSON.encode(value) if isinstance(value, (dict, list, tuple, int, float)) else str(value)
+
+def _string(text: str) -> Tuple[List[Any], bool]:
+    # texto -> partes (str estático ou getter) + se algum getter usa o corpo
+    parts: List[Any] = []; needs_body = False; pos = 0
+    for m in _PLACEHOLDER.finditer(text):
+        if m.start() > pos: parts.append(text[pos:m.start()])
+        get, body = compile_placeholder(m.group(1)); needs_body |= body
+        parts.append(get); pos = m.end()
+    if pos < len(text): parts.append(text[pos:])
+    return parts, needs_body
+
+def _text_slot(parts: List[Any]) -> Slot:
+    if len(parts) == 1 and not isinstance(parts[0], str):
+        get = parts[0]
+        return lambda c, p, j: _text(get(c, p, j)).encode("utf-8")
+    return lambda c, p, j: "".join(x if isinstance(x, str) else _text(x(c, p, j)) for x in parts).encode("utf-8")
+
+def _json_slot(parts: List[Any]) -> Slot:
+    if len(parts) == 1 and not isinstance(parts[0], str):
+        get = parts[0]
+        return lambda c, p, j: _JSON.encode(get(c, p, j)).encode("utf-8")
+    text = _text_slot(parts)
+    return lambda c, p, j: _JSON.encode(text(c, p, j).decode("utf-8")).encode("utf-8")
+
+class TemplatePlan:
+    """Corpo compilado: `statics[0] + slot0 + statics[1] + ... + statics[-1]`."""
+    __slots__ = ("statics", "slots", "needs_body")
+
+    def __init__(self, statics: Tuple[bytes, ...], slots: Tuple[Slot, ...], needs_body: bool):
+        self.statics = statics
+        self.slots = slots
+        self.needs_body = needs_body
+
+    def render(self, ctx: Any, path_params: Dict[str, str], jwt_ctx: Dict[str, Any]) -> bytes:
+        statics = self.statics
+        out = [statics[0]]
+        for i, slot in enumerate(self.slots, 1):
+            out.append(slot(ctx, path_params, jwt_ctx)); out.append(statics[i])
+        return b"".join(out)
+
+def compile_text_template(text: str) -> TemplatePlan:
+    parts, needs_body = _string(text)
+    statics, slots, pending = [], [], []
+    for x in parts:
+        if isinstance(x, str): pending.append(x)
+        else: statics.append("".join(pending).encode("utf-8")); pending = []; slots.append(_text_slot([x]))
+    statics.append("".join(pending).encode("utf-8"))
+    return TemplatePlan(tuple(statics), tuple(slots), needs_body)
+
+def compile_json_template(body: Any, serialize: Callable[[Any], bytes]) -> TemplatePlan:
+    """Compila um corpo JSON com a mesma serialização da resposta estática (`serialize`).
+
+    Cada string com placeholder é trocada por um marcador único antes de serializar; os bytes são
+    então cortados nos marcadores, de modo que os trechos estáticos saem idênticos aos pré-codificados.
+    """
+    nonce = uuid.uuid4().hex
+    slots: List[Slot] = []; needs_body = False
+
+    def mark(value: Any) -> Any:
+        nonlocal needs_body
+        if isinstance(value, dict): return {k: mark(v) for k, v in value.items()}
+        if isinstance(value, list): return [mark(v) for v in value]
+        if isinstance(value, str) and _PLACEHOLDER.search(value):
+            parts, body = _string(value); needs_body |= body
+            slots.append(_json_slot(parts))
+            return f"\x00{nonce}:{len(slots) - 1}\x00"
+        return value
+
+    data = serialize(mark(body))
+    statics = []
+    for i in range(len(slots)):
+        marker = json.dumps(f"\x00{nonce}:{i}\x00").encode("utf-8")
+        head, sep, data = data.partition(marker)
+        if not sep: raise ValueError("Template marker lost during serialization")
+        statics.append(head)
+    statics.append(data)
+    return TemplatePlan(tuple(statics), tuple(slots), needs_body)
+
+def check_template(body: Any) -> None:
+    """Valida os placeholders do corpo (na criação/alteração do mock); ValueError se algum não é suportado."""
+    if isinstance(body, str):
+        for m in _PLACEHOLDER.finditer(body): compile_placeholder(m.group(1))
+    elif isinstance(body, dict):
+        for v in body.values(): check_template(v)
+    elif isinstance(body, list):
+        for v in body: check_template(v)
@@ -0,0 +1,35 @@
+"""Tempo por fase de uma requisição de mock, devolvido no header `Server-Timing` (W3C).
+
+Ligado por cenário (`server_timing: true`) ou pela própria requisição (header SERVER_TIMING_REQUEST_HEADER,
+ex.: `X-Mock-Timing: 1`). Desligado, o catch-all não cria o `PhaseTiming` e cada ponto de medição se
+resume a um `if timing is not None`; os instantes de perf_counter() já são tomados para as métricas.
+"""
+from __future__ import annotations
+from typing import List, Optional, Tuple
+from .config import SERVER_TIMING_REQUEST_HEADER
+from .request_context import RequestContext
+
+HEADER = "Server-Timing"
+RAW_HEADER = HEADER.lower().encode("latin-1")
+
+_REQUEST_HEADER = SERVER_TIMING_REQUEST_HEADER.lower() or None
+
+class PhaseTiming:
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries: List[Tuple[str, float, Optional[str]]] = []
+
+    def add(self, name: str, seconds: float, desc: Optional[str] = None) -> None:
+        self.entries.append((name, seconds, desc))
+
+    def header(self) -> str:
+        """Valor do header: `nome;dur=ms[;desc="..."]`, na ordem em que as fases foram anotadas."""
+        return ", ".join(f'{name};dur={seconds * 1000:.3f}' + (f';desc="{desc}"' if desc else "") for name, seconds, desc in self.entries)
+
+def wanted(scenario, ctx: RequestContext) -> bool:
+    """O cenário liga o Server-Timing, ou a requisição pede com o header (qualquer valor diferente de "0")."""
+    if scenario is not None and scenario.server_timing: return True
+    if _REQUEST_HEADER is None: return False
+    value = ctx.header(_REQUEST_HEADER)
+    return value is not None and value != "0"
@@ -0,0 +1,120 @@
+"""Despacho ASGI direto para o tráfego de mocks (FAST_PATH=1).
+
+Fica à frente do roteamento do FastAPI: requisições que casam com um mock de cenário sem JWT são
+respondidas direto do snapshot do store (rotas compiladas + respostas pré-codificadas), sem injeção
+de dependências nem objetos Request. Todo o resto segue para a app completa: rotas de administração
+e docs, 404, cenários com JWT e requisições com Server-Timing.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .storage.memory import InMemoryStore, match_request
+from .routers.catch_all import _VERSION_HEADER, pick_response_for_mock
+from .core.body_source import send_source
+from .core.chaos import send_with_chaos
+from .core.journal import SentStatus, journal
+from .core.metrics import metrics
+from .core.request_context import RequestContext
+from .core.timing import wanted as timing_wanted
+
+class MockFastPath:
+    def __init__(self, app: ASGIApp, store: Callable[[], InMemoryStore], routes: Callable[[], List[Any]]):
+        self.app = app
+        self._store = store
+        self._routes = routes
+        self._reserved: Optional[Tuple[frozenset, Tuple[str, ...]]] = None
+        self.served = 0
+        self.forwarded = 0
+
+    def _reserved_paths(self) -> Tuple[frozenset, Tuple[str, ...]]:
+        # Paths atendidos por rotas próprias do FastAPI (o catch-all "/{...}" fica de fora)
+        if self._reserved is None:
+            exact, prefixes = set(), []
+            for r, path in _flat_routes(self._routes()):
+                if not path or path.startswith("/{"): continue
+                if isinstance(r, Mount): exact.add(path); prefixes.append(path.rstrip("/") + "/")
+                elif "{" in path: prefixes.append(path.split("{", 1)[0])
+                else: exact.add(path)
+            self._reserved = (frozenset(exact), tuple(prefixes))
+        return self._reserved
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        path = scope["path"]
+        exact, prefixes = self._reserved_paths()
+        if path in exact or path.startswith(prefixes): return await self._forward(scope, receive, send)
+        snap = self._store().snapshot()
+        scenario = snap.match_scenario(path)
+        if scenario is None or (scenario.jwt_location or "none") != "none": return await self._forward(scope, receive, send)
+
+        started = time.perf_counter()
+        body = _BodyReader(receive)
+        ctx = RequestContext.from_scope(scope, body.read)
+        if timing_wanted(scenario, ctx): return await self._forward(scope, receive, send)  # Server-Timing só na app completa
+        match = await match_request(snap, ctx)
+        if match is None: return await self._forward(scope, body.replay(), send)
+        matched = time.perf_counter()
+        mock, path_params, _ = match
+        encoded = await pick_response_for_mock(mock, ctx, path_params=path_params, jwt_ctx={"header": {}, "payload": {}})
+        version = (_VERSION_HEADER, str(snap.version).encode("latin-1"))
+        self.served += 1
+        chaos = encoded.chaos if scenario.chaos else None
+        sent = None
+        if journal.enabled:
+            await journal.capture_body(ctx)
+            send = sent = SentStatus(send, encoded.status_code)  # registra o status que de fato sai (304, 206/416, falha)
+        try:
+            if encoded.source is not None:
+                if metrics.enabled: metrics.served(mock.basepath, mock.id, started, matched, None, time.perf_counter())
+                return await send_source(scope, send, encoded.status_code, [*encoded.dynamic_headers, version], encoded.source, chaos)
+            rep = encoded.negotiate(ctx.header("accept-encoding"))
+            if ctx.method in ("GET", "HEAD") and encoded.not_modified_for(rep, ctx.header("if-none-match")):
+                status, headers, body = 304, [(b"etag", rep.etag.encode("latin-1")), version], b""
+            else:
+                status, headers, body = encoded.status_code, [*rep.raw_headers, version], rep.body
+            if metrics.enabled: metrics.served(mock.basepath, mock.id, started, matched, None, time.perf_counter())
+            if chaos is not None: return await send_with_chaos(send, status, headers, body, chaos)
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+        finally:
+            if sent is not None: journal.record(ctx, started, mock.basepath, mock.id, sent.status)
+
+    async def _forward(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.forwarded += 1
+        await self.app(scope, receive, send)
+
+def _flat_routes(routes: List[Any], prefix: str = "") -> Iterator[Tuple[Any, Optional[str]]]:
+    """(rota, path completo); routers incluídos de forma preguiçosa (FastAPI recentes: `original_router`) são abertos."""
+    for r in routes:
+        inner = getattr(r, "original_router", None)
+        if inner is not None:
+            yield from _flat_routes(inner.routes, prefix + r.include_context.prefix)
+            continue
+        path = getattr(r, "path", None)
+        yield r, prefix + path if path else None
+
+class _BodyReader:
+    """Lê o corpo sob demanda e guarda as mensagens consumidas para repassá-las à app completa."""
+    __slots__ = ("_receive", "_messages")
+
+    def __init__(self, receive: Receive):
+        self._receive = receive
+        self._messages: List[Message] = []
+
+    async def read(self) -> bytes:
+        chunks = []
+        while True:
+            message = await self._receive()
+            self._messages.append(message)
+            if message["type"] != "http.request": break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False): break
+        return b"".join(chunks)
+
+    def replay(self) -> Receive:
+        pending, receive = list(self._messages), self._receive
+        async def replay() -> Message:
+            return pending.pop(0) if pending else await receive()
+        return replay
@@ -1,14 +1,33 @@
 from __future__ import annotations
-from typing import Dict
+from contextlib import asynccontextmanager
+from typing import Any, Dict
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from .core.config import APP_TITLE, APP_VERSION, CORS_ALLOW_ORIGINS
+from fastapi.responses import FileResponse, JSONResponse
+from .core.config import APP_TITLE, APP_VERSION, CORS_ALLOW_ORIGINS, FAST_PATH, REDIS_URL, STORE_BACKEND, STORE_DIR
 from .storage.memory import InMemoryStore
 from .di import store_instance, get_store
 from .routers import scenarios as scenarios_router
 from .routers import mocks as mocks_router
+from .routers import bulk as bulk_router
+from .routers import requests as requests_router
+from .routers import metrics as metrics_router
+from .routers import profile as profile_router
 from .routers import catch_all as catch_all_router
+from .core.jwt_validator import close_http_client, token_cache
+from .core.journal import journal
+from .core.proxy import close_client as close_proxy_client
+from .fastpath import MockFastPath
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await store_instance.start()
+    journal.start()
+    yield
+    await journal.stop()
+    await store_instance.stop()
+    await close_http_client()
+    await close_proxy_client()
 
 app = FastAPI(
     title=APP_TITLE,
@@ -19,17 +38,35 @@ app = FastAPI(
         "**Documentação:** [Guia (Markdown)](/docs/guide.md) | [Guia (HTML)](/docs/guide.html)"
     ),
     docs_url="/docs", redoc_url="/redoc", openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
+if FAST_PATH:
+    # adicionado antes do CORS, fica por dentro dele: respostas do despacho direto também recebem os headers CORS
+    app.add_middleware(MockFastPath, store=lambda: app.dependency_overrides.get(get_store, get_store)(), routes=lambda: app.routes)
 app.add_middleware(CORSMiddleware, allow_origins=CORS_ALLOW_ORIGINS or ["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-store_instance = InMemoryStore()
+def _create_store() -> InMemoryStore:
+    if STORE_BACKEND == "redis":
+        from redis.asyncio import from_url
+        from .storage.redis_store import RedisStore
+        return RedisStore(from_url(REDIS_URL))
+    if STORE_BACKEND == "file":
+        from .storage.persistent import PersistentStore
+        return PersistentStore(STORE_DIR)
+    return InMemoryStore()
+
+store_instance = _create_store()
 app.include_router(scenarios_router.router)
 app.dependency_overrides[get_store] = lambda: store_instance
 app.dependency_overrides[scenarios_router.InMemoryStore] = lambda: store
 app.include_router(mocks_router.router)
 app.dependency_overrides[get_store] = lambda: store_instance
 app.dependency_overrides[mocks_router.InMemoryStore] = lambda: store
+app.include_router(bulk_router.router)
+app.include_router(requests_router.router)
+app.include_router(metrics_router.router)
+app.include_router(profile_router.router)
 
 from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
@@ -62,18 +99,22 @@ async def _help_redirect():
         return RedirectResponse(url="/docs/guide.html")
     return RedirectResponse(url="/docs-site/")
 
-app.include_router(catch_all_router.router)
-app.dependency_overrides[get_store] = lambda: store_instance
-app.dependency_overrides[catch_all_router.InMemoryStore] = lambda: store
 
 @app.get("/healthz/live", tags=["health"])
 async def liveness() -> Dict[str, str]:
     return {"status":"live"}
 
 @app.get("/healthz/ready", tags=["health"])
-async def readiness() -> Dict[str, str]:
+async def readiness():
+    # a carga do store termina no lifespan, antes de o servidor aceitar conexões: 503 só se ela falhou
+    if not store_instance.ready:
+        return JSONResponse({"status": "failed", "detail": getattr(store_instance, "load_error", None)}, status_code=503)
     return {"status":"ready"}
 
+@app.get("/api/jwt/cache", tags=["jwt"])
+async def jwt_cache_stats() -> Dict[str, Any]:
+    return token_cache.stats()
+
 @app.get("/docs/guide.md", response_class=FileResponse, include_in_schema=False)
 async def guide_md():
     return FileResponse("docs/guide.md", media_type="text/markdown")
@@ -103,3 +144,8 @@ def custom_openapi():
     return schema
 
 app.openapi = custom_openapi
+
+# catch-all por último: rotas registradas depois dele nunca seriam alcançadas
+app.include_router(catch_all_router.router)
+app.dependency_overrides[get_store] = lambda: store_instance
+app.dependency_overrides[catch_all_router.InMemoryStore] = lambda: store
@@ -2,7 +2,18 @@ from __future__ import annotations
 import re, uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Literal, Optional, Tuple, Union
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationInfo, model_validator
+from .utils.jsonpath import parse_jsonpath
+from .utils.paths import resolve_under
+from .core.config import MOCK_FILES_DIR
+from .core.body_match import compile_body_match
+from .core.templating import check_template
+
+# Contexto de validação para documentos que já passaram pela validação completa (ex.: JSON guardado no store)
+TRUSTED = {"trusted": True}
+
+def _trusted(info: ValidationInfo) -> bool:
+    return bool(info.context and info.context.get("trusted"))
 
 HttpMethod = Literal["GET","POST","PUT","PATCH","DELETE","OPTIONS","HEAD"]
 
@@ -22,17 +33,96 @@ class ConditionPredicate(BaseModel):
     value: Optional[Union[str,int,float,bool]] = None
     values: Optional[List[Union[str,int,float,bool]]] = None
 
+    @model_validator(mode="after")
+    def _check_compilable(self, info: ValidationInfo):
+        if _trusted(info): return self
+        if self.op == "regex":
+            try: re.compile(str(self.value or ""))
+            except re.error as e: raise ValueError(f"Invalid regex {self.value!r}: {e}")
+        if self.jsonpath is not None: parse_jsonpath(self.jsonpath)
+        return self
+
+class BodySource(BaseModel):
+    kind: Literal["file","generator"]
+    path: Optional[str] = None       # file: relativo a MOCK_FILES_DIR
+    count: int = Field(0, ge=0)      # generator: número de registros
+    record: Optional[Any] = None     # generator: formato de cada registro; "{{index}}" vira 0..count-1
+    format: Literal["ndjson","json_array"] = "ndjson"
+
+    @model_validator(mode="after")
+    def _check_source(self, info: ValidationInfo):
+        if self.kind == "file":
+            if not self.path: raise ValueError("body_source 'file' requires path")
+            if not _trusted(info) and not resolve_under(MOCK_FILES_DIR, self.path).is_file():
+                raise ValueError(f"File not found under MOCK_FILES_DIR: {self.path!r}")
+        elif self.record is None: raise ValueError("body_source 'generator' requires record")
+        return self
+
 class MockResponse(BaseModel):
     status_code: int = Field(200, ge=100, le=599)
     headers: Optional[Dict[str,str]] = None
     media_type: str = "application/json"
     body: Optional[Any] = None
     description: Optional[str] = None
+    # Placeholders {{...}} no corpo (app.core.templating); sem a flag o corpo é literal e pré-codificado
+    template: bool = False
+    # Corpo servido por streaming (arquivo ou gerador, app.core.body_source) no lugar de `body`
+    body_source: Optional[BodySource] = None
+
+    @model_validator(mode="after")
+    def _check_template(self, info: ValidationInfo):
+        if self.template and self.body_source is not None: raise ValueError("template and body_source are mutually exclusive")
+        if self.template and not _trusted(info): check_template(self.body)
+        return self
+
+    @model_validator(mode="after")
+    def _check_headers(self, info: ValidationInfo):
+        # headers e media_type vão pré-codificados em latin-1 (como o HTTP/1.1 os transmite)
+        if _trusted(info): return self
+        for name, value in [*(self.headers or {}).items(), ("media_type", self.media_type)]:
+            for part in (name, value):
+                try: part.encode("latin-1")
+                except UnicodeEncodeError: raise ValueError(f"Header {name!r}: {part!r} has characters outside latin-1 (ISO-8859-1)")
+                if "\r" in part or "\n" in part: raise ValueError(f"Header {name!r}: line breaks are not allowed")
+        return self
+
+class LatencySpec(BaseModel):
+    distribution: Literal["fixed","uniform","normal","lognormal"] = "fixed"
+    ms: float = Field(0, ge=0)                    # fixed: valor; normal: média; lognormal: mediana
+    min_ms: Optional[float] = Field(None, ge=0)   # uniform: limite inferior; demais: piso
+    max_ms: Optional[float] = Field(None, ge=0)   # uniform: limite superior; demais: teto
+    stddev_ms: float = Field(0, ge=0)             # normal
+    sigma: float = Field(0.5, ge=0)               # lognormal: desvio-padrão do log
+
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.distribution == "uniform" and (self.min_ms is None or self.max_ms is None):
+            raise ValueError("uniform latency requires min_ms and max_ms")
+        if self.min_ms is not None and self.max_ms is not None and self.min_ms > self.max_ms:
+            raise ValueError("latency min_ms must be <= max_ms")
+        return self
+
+class FaultSpec(BaseModel):
+    kind: Literal["error","drop","truncate"]
+    probability: float = Field(..., ge=0, le=1)
+    status_code: int = Field(503, ge=500, le=599)  # só para kind=error
+
+class ChaosProfile(BaseModel):
+    latency: Optional[LatencySpec] = None
+    bandwidth_bps: Optional[int] = Field(None, gt=0)  # bytes por segundo do corpo da resposta
+    faults: List[FaultSpec] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def _check_faults(self):
+        if sum(f.probability for f in self.faults) > 1: raise ValueError("Sum of fault probabilities must be <= 1")
+        return self
 
 class ResponseVariant(BaseModel):
     description: Optional[str] = None
     when: List[ConditionPredicate] = Field(default_factory=list)
     response: MockResponse
+    # None = herda o `chaos` do mock; {} desliga para esta variante
+    chaos: Optional[ChaosProfile] = None
 
 class MockRequestMatch(BaseModel):
     method: HttpMethod
@@ -42,8 +132,20 @@ class MockRequestMatch(BaseModel):
     query: Optional[Dict[str,str]] = None
     headers: Optional[Dict[str,str]] = None
     body: Optional[Any] = None
+    # Como `body` é comparado (app.core.body_match): exact, partial, jsonpath ({expr: valor}) ou regex
+    body_match: Literal["exact","partial","jsonpath","regex"] = "exact"
     params: Optional[List[RequestParam]] = Field(default_factory=list)
 
+    @model_validator(mode="after")
+    def _check_uri(self, info: ValidationInfo):
+        if _trusted(info): return self
+        # URIs literais não viram regex; as demais precisam compilar (ex.: nomes de parâmetro repetidos)
+        if "{" in self.uri or "*" in self.uri or (self.uri.startswith("^") and self.uri.endswith("$")):
+            try: pattern_to_regex_with_params(self.uri)
+            except re.error as e: raise ValueError(f"Invalid uri pattern {self.uri!r}: {e}")
+        if self.body is not None: compile_body_match(self.body_match, self.body)
+        return self
+
 class Mock(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -53,6 +155,8 @@ class Mock(BaseModel):
     tags: Optional[List[str]] = Field(default_factory=list)
     enabled: bool = True
     priority: int = 0
+    compress: Optional[bool] = None
+    chaos: Optional[ChaosProfile] = None
     request: MockRequestMatch
     response: MockResponse
     variants: Optional[List[ResponseVariant]] = Field(default_factory=list)
@@ -66,6 +170,8 @@ class MockCreate(BaseModel):
     tags: Optional[List[str]] = Field(default_factory=list)
     enabled: bool = True
     priority: int = 0
+    compress: Optional[bool] = None
+    chaos: Optional[ChaosProfile] = None
     request: MockRequestMatch
     response: MockResponse
     variants: Optional[List[ResponseVariant]] = Field(default_factory=list)
@@ -77,6 +183,8 @@ class MockUpdate(BaseModel):
     tags: Optional[List[str]] = None
     enabled: Optional[bool] = None
     priority: Optional[int] = None
+    compress: Optional[bool] = None
+    chaos: Optional[ChaosProfile] = None
     request: Optional[MockRequestMatch] = None
     response: Optional[MockResponse] = None
     variants: Optional[List[ResponseVariant]] = None
@@ -93,9 +201,20 @@ class Scenario(BaseModel):
     jwt_header_name: Optional[str] = "Authorization"
     jwt_is_bearer: Optional[bool] = True
     jwt_cookie_name: Optional[str] = None
+    compress: bool = False
+    # Liga/desliga os perfis de `chaos` de todos os mocks do cenário
+    chaos: bool = True
+    # Header Server-Timing com o tempo de cada fase (match, JWT, variante, codificação) em toda resposta
+    server_timing: bool = False
+    # Requisições sem mock são repassadas a este upstream (app.core.proxy); com `record`, a resposta vira um mock
+    upstream_url: Optional[str] = None
+    record: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+def _check_upstream_url(url: str) -> None:
+    if not re.match(r"^https?://[^/?#\s]+", url): raise ValueError(f"upstream_url must be an absolute http(s) URL: {url!r}")
+
 class ScenarioCreate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -106,6 +225,16 @@ class ScenarioCreate(BaseModel):
     jwt_header_name: Optional[str] = "Authorization"
     jwt_is_bearer: Optional[bool] = True
     jwt_cookie_name: Optional[str] = None
+    compress: Optional[bool] = False
+    chaos: Optional[bool] = True
+    server_timing: Optional[bool] = False
+    upstream_url: Optional[str] = None
+    record: Optional[bool] = False
+
+    @model_validator(mode="after")
+    def _check_upstream(self):
+        if self.upstream_url: _check_upstream_url(self.upstream_url)
+        return self
 
 class ScenarioUpdate(BaseModel):
     name: Optional[str] = None
@@ -117,6 +246,43 @@ class ScenarioUpdate(BaseModel):
     jwt_header_name: Optional[str] = None
     jwt_is_bearer: Optional[bool] = None
     jwt_cookie_name: Optional[str] = None
+    compress: Optional[bool] = None
+    chaos: Optional[bool] = None
+    server_timing: Optional[bool] = None
+    upstream_url: Optional[str] = None  # "" remove o upstream
+    record: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _check_upstream(self):
+        if self.upstream_url: _check_upstream_url(self.upstream_url)
+        return self
+
+class RequestLogEntry(BaseModel):
+    seq: int
+    timestamp: datetime
+    method: str
+    path: str
+    query: Optional[str] = None
+    scenario: Optional[str] = None
+    mock_id: Optional[str] = None
+    variant: Optional[int] = None     # índice da variante escolhida; None = resposta padrão
+    status: int
+    duration_ms: float                # até o fim do envio da resposta (com latência simulada e streaming)
+    body: Optional[str] = None
+
+class RequestLogQuery(BaseModel):
+    scenario: Optional[str] = None
+    mock_id: Optional[str] = None
+    method: Optional[str] = None
+    path: Optional[str] = None
+    unmatched: bool = False
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+class RequestVerify(RequestLogQuery):
+    count: Optional[int] = Field(None, ge=0)
+    at_least: Optional[int] = Field(None, ge=0)
+    at_most: Optional[int] = Field(None, ge=0)
 
 def ensure_leading_slash(p: str) -> str:
     return p if p.startswith("/") else "/" + p
@@ -143,16 +309,9 @@ def pattern_to_regex_with_params(pattern: str):
             regex += re.escape(ch); i += 1
     return re.compile("^" + regex + "$"), param_names
 
+_UNSCORED = re.compile(r"\{[^}]*\}|\*")
+
 def specificity_score(pattern: str) -> int:
-    score = 0; i = 0
-    while i < len(pattern):
-        ch = pattern[i]
-        if ch == "{":
-            j = pattern.find("}", i+1)
-            if j == -1: score += 1; i += 1
-            else: i = j + 1
-        elif ch == "*":
-            i += 1
-        else:
-            score += 1; i += 1
-    return score
+    # caracteres literais: tudo menos "{param}" (fechado) e "*"
+    if "{" not in pattern and "*" not in pattern: return len(pattern)
+    return len(_UNSCORED.sub("", pattern))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+import time
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import Depends, APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from ..storage.memory import InMemoryStore
+from ..di import get_store
+from ..models import ensure_leading_slash
+from ..core.bulk import MAX_REPORTED_ERRORS, BulkError, BulkItem, describe_error, export_records, iter_json_records, to_item
+
+router = APIRouter(tags=["bulk"])
+
+@router.post("/api/bulk/import")
+async def bulk_import(
+    request: Request,
+    mode: Literal["atomic", "best_effort"] = Query("atomic", description="atomic: tudo ou nada; best_effort: aplica os itens válidos"),
+    on_conflict: Literal["error", "skip", "replace"] = Query("error"),
+    store: InMemoryStore = Depends(get_store),
+) -> Dict[str, Any]:
+    """Importa cenários e mocks de um corpo NDJSON (ou array JSON) lido em streaming."""
+    t0 = time.perf_counter()
+    items: List[BulkItem] = []; errors: List[BulkError] = []; total = 0
+    try:
+        async for line, obj, parse_error in iter_json_records(request.stream()):
+            total += 1
+            if parse_error is not None: errors.append(BulkError(line, parse_error)); continue
+            try: items.append(to_item(line, obj))
+            except (ValueError, ValidationError) as e: errors.append(BulkError(line, describe_error(e)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    atomic = mode == "atomic"
+    # com erro de parse/validação no modo atômico o store só valida o restante, sem aplicar nada
+    counts, store_errors = await store.import_items(items, atomic=atomic, on_conflict=on_conflict, dry_run=atomic and bool(errors))
+    errors += store_errors
+    applied = not (atomic and errors)
+    elapsed = time.perf_counter() - t0
+    errors.sort(key=lambda e: e.line)
+    report = {
+        "mode": mode, "applied": applied, "items": total, **counts,
+        "errors": [{"line": e.line, "error": e.error} for e in errors[:MAX_REPORTED_ERRORS]],
+        "error_count": len(errors), "elapsed_ms": round(elapsed * 1e3, 2),
+        "items_per_sec": round(total / elapsed, 1) if elapsed > 0 else None, "version": store.version,
+    }
+    return JSONResponse(report, status_code=200 if applied else 422)
+
+@router.get("/api/bulk/export")
+async def bulk_export(scenario: Optional[str] = Query(None, description="Exporta só este basepath"), store: InMemoryStore = Depends(get_store)):
+    """Exporta o snapshot atual como NDJSON, serializado em blocos à medida que é enviado."""
+    snap = store.snapshot()
+    if scenario is not None:
+        s = snap.scenario(ensure_leading_slash(scenario))
+        if s is None: raise HTTPException(status_code=404, detail="Scenario not found")
+        scenarios = [s]
+    else:
+        scenarios = snap.scenarios()
+    body = export_records(scenarios, lambda bp: snap.iter_scenario_records(bp, ordered=True))
+    return StreamingResponse(body, media_type="application/x-ndjson", headers={"X-Mock-Snapshot-Version": str(snap.version)})
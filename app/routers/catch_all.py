@@ -1,77 +1,52 @@
 from __future__ import annotations
-import json
-from typing import Optional
-from fastapi import Depends, APIRouter, HTTPException, Request, Body
-from fastapi.responses import JSONResponse, PlainTextResponse
-from ..storage.memory import InMemoryStore
+import time
+from typing import Dict, Optional, Union
+from fastapi import Depends, APIRouter, HTTPException, Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from ..storage.memory import InMemoryStore, match_request
+from ..storage.runtime import MockRecord
 from ..di import get_store
-from ..models import Mock, MockResponse
-from ..utils.jsonpath import jsonpath_get
-from ..core.jwt_validator import validate_jwt
+from ..core.body_source import SourceResponse
+from ..core.chaos import ChaosResponse
+from ..core.journal import SentStatus, journal
+from ..core.jwt_validator import IssuerUnavailable, validate_jwt
+from ..core.metrics import metrics
+from ..core.proxy import UpstreamError, proxy
+from ..core.request_context import RequestContext
+from ..core.responses import EncodedResponse, NotModifiedResponse, PreEncodedResponse, RenderedResponse
+from ..core.timing import HEADER as SERVER_TIMING_HEADER, RAW_HEADER as _TIMING_HEADER, PhaseTiming, wanted as timing_wanted
 
 router = APIRouter()
 
-def _contains(val, needle) -> bool:
-    try:
-        if isinstance(val, list):
-            return needle in val
-        if isinstance(val, dict):
-            return str(needle) in val.values() or needle in val.keys()
-        return str(needle) in str(val)
-    except Exception:
-        return False
+# Versão do snapshot do store usado no match (permite confirmar que uma alteração já propagou)
+SNAPSHOT_VERSION_HEADER = "X-Mock-Snapshot-Version"
+_VERSION_HEADER = SNAPSHOT_VERSION_HEADER.lower().encode("latin-1")
 
-def eval_predicate(pred, *, headers, query, path_params, body, jwt_ctx) -> bool:
-    v = None
-    if pred.source == "header":
-        v = headers.get((pred.key or "").lower())
-    elif pred.source == "query":
-        v = query.get(pred.key or "")
-    elif pred.source == "path":
-        v = path_params.get(pred.key or "")
-    elif pred.source == "body":
-        if pred.jsonpath:
-            v = jsonpath_get(pred.jsonpath, body)
-        elif pred.key and isinstance(body, dict):
-            v = body.get(pred.key)
-    elif pred.source == "jwt_header":
-        v = (jwt_ctx.get("header") or {}).get(pred.key or "")
-    elif pred.source == "jwt_payload":
-        if pred.jsonpath:
-            v = jsonpath_get(pred.jsonpath, jwt_ctx.get("payload"))
-        else:
-            print('------------------payload')
-            print(jwt_ctx.get("payload"))
-            print('------------------pred.key')
-            print(pred.key)
-            print('------------------pred.value')
-            v = (jwt_ctx.get("payload") or {}).get(pred.key or "")
-            print(v)
-    if pred.op == "equals": return v == pred.value
-    if pred.op == "regex":
-        import re
-        try: return bool(re.search(str(pred.value or ""), str(v or "")))
-        except Exception: return False
-    if pred.op == "contains": return _contains(v, pred.value)
-    if pred.op == "in":
-        if pred.values is None: return False
-        return str(v) in {str(x) for x in pred.values}
-    return False
+_EMPTY: Dict[str, str] = {}
 
-def pick_response_for_mock(m: Mock, *, headers, query, path_params, body, jwt_ctx) -> MockResponse:
-    for v in (m.variants or []):
-        if all(eval_predicate(p, headers=headers, query=query, path_params=path_params, body=body, jwt_ctx=jwt_ctx) for p in v.when):
-            return v.response
-    return m.response
+async def pick_response_for_mock(m: MockRecord, ctx: RequestContext, *, path_params, jwt_ctx) -> Union[EncodedResponse, RenderedResponse]:
+    plan = m.plan
+    encoded = m.response
+    if plan.variants:
+        # só materializa as partes da requisição que os predicados das variantes consultam
+        src = plan.sources
+        if "body" in src: await ctx.load_body()
+        i = plan.select(ctx.headers if "header" in src else _EMPTY, ctx.query if "query" in src else _EMPTY,
+                        path_params, ctx.body if "body" in src else None, jwt_ctx)
+        if i is not None: encoded = plan.variants[i].response; ctx.variant = i
+    if encoded.template is None: return encoded
+    if encoded.template.needs_body: await ctx.load_body()
+    return encoded.render(ctx, path_params, jwt_ctx)
 
-async def maybe_validate_jwt(scenario, *, headers, cookies):
+async def maybe_validate_jwt(scenario, ctx: RequestContext, timing: Optional[PhaseTiming] = None):
     jwt_ctx = {"header": {}, "payload": {}}
     if (scenario.jwt_location or "none") == "none":
         return jwt_ctx, None
     token = None
     if scenario.jwt_location == "header":
         name = (scenario.jwt_header_name or "Authorization").lower()
-        raw = headers.get(name)
+        raw = ctx.header(name)
         if raw and (scenario.jwt_is_bearer if scenario.jwt_is_bearer is not None else True):
             parts = (raw or "").split()
             if len(parts) == 2 and parts[0].lower() == "bearer":
@@ -81,47 +56,119 @@ async def maybe_validate_jwt(scenario, *, headers, cookies):
         else:
             token = raw
     elif scenario.jwt_location == "cookie":
-        token = cookies.get(scenario.jwt_cookie_name or "")
+        token = ctx.cookies.get(scenario.jwt_cookie_name or "")
     if (scenario.jwt_location in ("header","cookie")) and not token:
         return jwt_ctx, ("missing", "JWT token not found in request")
     if token:
         try:
             if not scenario.jwt_issuer_url:
                 return jwt_ctx, ("config", "JWT issuer URL not configured for scenario")
-            jwt_ctx = await validate_jwt(token, scenario.jwt_issuer_url)
+            jwt_ctx = await validate_jwt(token, scenario.jwt_issuer_url, timing)
             return jwt_ctx, None
         except Exception as e:
             msg = str(e)
-            if "ConnectError" in msg or "ReadTimeout" in msg or "HTTP" in msg.lower():
+            if isinstance(e, IssuerUnavailable) or "ConnectError" in msg or "ReadTimeout" in msg or "HTTP" in msg.lower():
                 return jwt_ctx, ("integration", f"Error contacting JWT Issuer: {msg}")
             return jwt_ctx, ("validation", f"JWT validation error: {msg}")
     return jwt_ctx, None
 
+async def journal_request(ctx: RequestContext, started: float, scenario: Optional[str], mock_id: Optional[str], status: int) -> None:
+    await journal.capture_body(ctx)
+    journal.record(ctx, started, scenario, mock_id, status)
+
+class JournaledResponse(Response):
+    """Entrega a resposta do mock e só então a registra no journal, com o status que de fato saiu."""
+
+    def __init__(self, inner: Response, ctx: RequestContext, started: float, mock: MockRecord):
+        self.status_code = inner.status_code
+        self.background = None
+        self.body = inner.body
+        self.raw_headers = inner.raw_headers
+        self.inner = inner
+        self.ctx = ctx; self.started = started; self.mock = mock
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sent = SentStatus(send, self.status_code)
+        try: await self.inner(scope, receive, sent)
+        finally: journal.record(self.ctx, self.started, self.mock.basepath, self.mock.id, sent.status)
+
+async def forward_upstream(store: InMemoryStore, scenario, ctx: RequestContext, request: Request, started: float, matched: float,
+                           version_headers: Dict[str, str]):
+    """Sem mock: repassa ao `upstream_url` do cenário (app.core.proxy)."""
+    if journal.enabled: await journal.capture_body(ctx)
+    extra = [(_VERSION_HEADER, version_headers[SNAPSHOT_VERSION_HEADER].encode("latin-1"))]
+    try:
+        response = await proxy.forward(store, scenario, ctx, request.headers.raw, request.stream, extra)
+        status = response.status_code
+    except UpstreamError as e:
+        response = None; status = e.status; message = str(e)
+    done = time.perf_counter()
+    if metrics.enabled: metrics.forwarded(scenario.basepath, status, started, matched, done)
+    if journal.enabled: journal.record(ctx, started, scenario.basepath, None, status)
+    if timing_wanted(scenario, ctx):
+        timing = PhaseTiming(); timing.add("match", matched - started); timing.add("upstream", done - matched); timing.add("total", done - started)
+        if response is None: version_headers[SERVER_TIMING_HEADER] = timing.header()
+        else: response.raw_headers.append((_TIMING_HEADER, timing.header().encode("latin-1")))
+    if response is None: raise HTTPException(status_code=status, detail=message, headers=version_headers)
+    return response
+
 @router.api_route("/{full_path:path}", methods=["GET","POST","PUT","PATCH","DELETE","OPTIONS","HEAD"])
-async def catch_all(request: Request, full_path: str, body_raw: Optional[str] = Body(None), store: InMemoryStore = Depends(get_store)):
-    path = "/" + full_path; method = request.method.upper()
-    query = {k: v for k, v in request.query_params.items()}
-    headers = {k.lower(): v for k, v in request.headers.items()}
-    cookies = request.cookies
-    parsed_body = None
-    if body_raw:
-        ctype = headers.get("content-type","")
-        if "application/json" in ctype:
-            try: parsed_body = json.loads(body_raw)
-            except json.JSONDecodeError: parsed_body = body_raw
-        else: parsed_body = body_raw
-    match = await store.find_match(path, method, query, headers, parsed_body)
-    if not match: raise HTTPException(status_code=404, detail=f"No mock matched {method} {path}")
+async def catch_all(request: Request, full_path: str, store: InMemoryStore = Depends(get_store)):
+    started = time.perf_counter()
+    ctx = RequestContext.from_scope(request.scope, request.body)
+    ctx.path = "/" + full_path
+    snap = store.snapshot()
+    version_headers = {SNAPSHOT_VERSION_HEADER: str(snap.version)}
+    match = await match_request(snap, ctx)
+    matched = time.perf_counter()
+    if not match:
+        scenario = snap.match_scenario(ctx.path)
+        basepath = scenario.basepath if scenario else None
+        if scenario is not None and scenario.upstream_url:
+            return await forward_upstream(store, scenario, ctx, request, started, matched, version_headers)
+        if metrics.enabled: metrics.not_matched(basepath, started, matched)
+        if journal.enabled: await journal_request(ctx, started, basepath, None, 404)
+        if timing_wanted(scenario, ctx):
+            timing = PhaseTiming(); timing.add("match", matched - started); timing.add("total", time.perf_counter() - started)
+            version_headers[SERVER_TIMING_HEADER] = timing.header()
+        raise HTTPException(status_code=404, detail=f"No mock matched {ctx.method} {ctx.path}", headers=version_headers)
     mock, path_params, scenario = match
-    jwt_ctx, jwt_err = await maybe_validate_jwt(scenario, headers=headers, cookies=cookies)
+    timing = PhaseTiming() if timing_wanted(scenario, ctx) else None
+    if timing is not None: timing.add("match", matched - started)
+    jwt_ctx, jwt_err = await maybe_validate_jwt(scenario, ctx, timing)
+    validated = None
+    if (scenario.jwt_location or "none") != "none":
+        validated = time.perf_counter()
+        if metrics.enabled: metrics.jwt_checked(jwt_err[0] if jwt_err else "ok", started, matched, validated)
+        if timing is not None: timing.add("jwt", validated - matched, jwt_err[0] if jwt_err else None)
     if jwt_err:
         kind, message = jwt_err
         status = 401 if kind in ("missing","validation","config") else 502
-        raise HTTPException(status_code=status, detail=message)
-    chosen = pick_response_for_mock(mock, headers=headers, query=query, path_params=path_params, body=parsed_body, jwt_ctx=jwt_ctx)
-    status = chosen.status_code; resp_headers = chosen.headers or {}; media_type = chosen.media_type or "application/json"; body_obj = chosen.body
-    if media_type.startswith("application/json"):
-        return JSONResponse(content=body_obj, status_code=status, headers=resp_headers, media_type=media_type)
+        if journal.enabled: await journal_request(ctx, started, mock.basepath, mock.id, status)
+        if timing is not None:
+            timing.add("total", time.perf_counter() - started); version_headers[SERVER_TIMING_HEADER] = timing.header()
+        raise HTTPException(status_code=status, detail=message, headers=version_headers)
+    encoded = await pick_response_for_mock(mock, ctx, path_params=path_params, jwt_ctx=jwt_ctx)
+    if timing is not None:
+        picked = time.perf_counter()
+        timing.add("variant", picked - (matched if validated is None else validated), "default" if ctx.variant is None else str(ctx.variant))
+    chaos = encoded.chaos if scenario.chaos else None
+    if journal.enabled: await journal.capture_body(ctx)
+    if encoded.source is not None:
+        headers = [*encoded.dynamic_headers, (_VERSION_HEADER, str(snap.version).encode("latin-1"))]
+        if timing is not None:
+            timing.add("total", time.perf_counter() - started); headers.append((_TIMING_HEADER, timing.header().encode("latin-1")))
+        response = SourceResponse(encoded.source, encoded.status_code, headers, chaos)
     else:
-        text = body_obj if isinstance(body_obj, str) else json.dumps(body_obj, ensure_ascii=False)
-        return PlainTextResponse(content=text, status_code=status, headers=resp_headers, media_type=media_type)
+        rep = encoded.negotiate(ctx.header("accept-encoding"))
+        not_modified = ctx.method in ("GET", "HEAD") and encoded.not_modified_for(rep, ctx.header("if-none-match"))
+        if timing is not None:
+            done = time.perf_counter()
+            timing.add("encode", done - picked); timing.add("total", done - started)
+            version_headers[SERVER_TIMING_HEADER] = timing.header()
+        extra = version_headers.items()
+        response = NotModifiedResponse(rep, extra) if not_modified else PreEncodedResponse(rep, encoded.status_code, extra)
+        if chaos is not None: response = ChaosResponse(response, chaos)
+    if journal.enabled: response = JournaledResponse(response, ctx, started, mock)
+    if metrics.enabled: metrics.served(mock.basepath, mock.id, started, matched, validated, time.perf_counter())
+    return response
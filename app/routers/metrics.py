@@ -0,0 +1,13 @@
+from __future__ import annotations
+from fastapi import APIRouter
+from fastapi.responses import Response
+from ..core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=Response)
+async def prometheus_metrics():
+    """Métricas do tráfego de mocks no formato texto do Prometheus."""
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from ..core.config import PROFILER_ENABLED, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+from ..core.profiler import profiler
+
+router = APIRouter(tags=["profile"])
+
+@router.get("/api/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=PROFILER_MAX_SECONDS, description="duração da coleta sobre o tráfego real"),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000, description="intervalo entre amostras"),
+    top: int = Query(50, ge=1, le=1000, description="pilhas/funções mais frequentes no JSON"),
+    format: Literal["json", "folded"] = Query("json", description="folded: texto para flamegraph.pl/speedscope"),
+):
+    """Amostra a pilha do event loop por `seconds` e devolve as pilhas e funções mais frequentes (PROFILER_ENABLED)."""
+    if not PROFILER_ENABLED: raise HTTPException(status_code=404, detail="Profiler disabled (set PROFILER_ENABLED=1)")
+    if profiler.running: raise HTTPException(status_code=409, detail="A profile is already being collected")
+    result = await profiler.run(seconds, interval_ms / 1000)
+    if format == "folded": return PlainTextResponse(result.folded())
+    return result.as_dict(top)
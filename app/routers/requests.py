@@ -0,0 +1,44 @@
+from __future__ import annotations
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse, Response
+from ..core.journal import journal
+from ..models import RequestLogEntry, RequestLogQuery, RequestVerify, ensure_leading_slash
+
+router = APIRouter(tags=["requests"])
+
+def _query(q: RequestLogQuery) -> RequestLogQuery:
+    if q.scenario: q.scenario = ensure_leading_slash(q.scenario)
+    return q
+
+@router.get("/api/requests", response_model=List[RequestLogEntry])
+async def list_requests(
+    scenario: Optional[str] = None, mock_id: Optional[str] = None, method: Optional[str] = None, path: Optional[str] = None,
+    unmatched: bool = Query(False, description="só requisições que não casaram com nenhum mock (404)"),
+    since: Optional[datetime] = None, until: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, description="só as N mais recentes"),
+):
+    """Requisições registradas no journal (ordem cronológica), filtradas."""
+    q = _query(RequestLogQuery(scenario=scenario, mock_id=mock_id, method=method, path=path, unmatched=unmatched, since=since, until=until))
+    data = json.dumps([e.as_dict() for e in journal.query(q, limit)], ensure_ascii=False).encode("utf-8")
+    return Response(data, media_type="application/json")
+
+@router.post("/api/requests/verify")
+async def verify_requests(v: RequestVerify) -> Dict[str, Any]:
+    """Conta as requisições do filtro e confere `count` / `at_least` / `at_most`; 417 se não bater."""
+    n = journal.count(_query(v))
+    ok = (v.count is None or n == v.count) and (v.at_least is None or n >= v.at_least) and (v.at_most is None or n <= v.at_most)
+    result = {"ok": ok, "count": n, "expected": {k: getattr(v, k) for k in ("count", "at_least", "at_most") if getattr(v, k) is not None}}
+    return result if ok else JSONResponse(result, status_code=417)
+
+@router.get("/api/requests/stats")
+async def journal_stats() -> Dict[str, Any]:
+    return journal.stats()
+
+@router.delete("/api/requests", status_code=204)
+async def clear_requests():
+    """Esvazia o journal em memória; com JOURNAL_FILE, o que ainda não estava no arquivo é gravado antes."""
+    await journal.clear()
+    return Response(status_code=204)
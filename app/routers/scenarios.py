@@ -1,14 +1,16 @@
 from __future__ import annotations
 from typing import Any, Dict, List
-from fastapi import Depends, APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, APIRouter, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from ..storage.memory import InMemoryStore
 from ..di import get_store
-from ..models import Scenario, ScenarioCreate, ScenarioUpdate
-from ..core.openapi_builder import build_scenario_openapi
+from ..models import Scenario, ScenarioCreate, ScenarioUpdate, ensure_leading_slash
+from ..core.openapi_builder import ScenarioOpenAPICache
 from ..core.config import APP_TITLE, APP_VERSION
+from ..core.responses import etag_matches
 
 router = APIRouter(tags=["scenarios"])
+openapi_cache = ScenarioOpenAPICache(APP_TITLE, APP_VERSION, "/docs/guide.html")
 
 def swagger_urls_for(basepath: str) -> Dict[str,str]:
     return {"openapi_url": f"/scenarios{basepath}/openapi.json", "docs_url": f"/scenarios{basepath}/docs"}
@@ -44,11 +46,12 @@ SWAGGER_UI = """<!DOCTYPE html><html><head><meta charset="UTF-8"><title>Scenario
 <script>window.ui=SwaggerUIBundle({url:'%OPENAPI%',dom_id:'#swagger-ui'});</script></body></html>"""
 
 @router.get("/scenarios{basepath:path}/openapi.json")
-async def scenario_openapi(basepath: str, store: InMemoryStore = Depends(get_store)) -> Dict[str, Any]:
-    try: s = await store.get_scenario(basepath)
-    except KeyError: raise HTTPException(status_code=404, detail="Scenario not found")
-    mocks = await store.list_mocks()
-    return build_scenario_openapi(s, mocks, APP_TITLE, APP_VERSION, "/docs/guide.html")
+async def scenario_openapi(basepath: str, request: Request, store: InMemoryStore = Depends(get_store)) -> Dict[str, Any]:
+    doc = openapi_cache.document(store.snapshot(), ensure_leading_slash(basepath))
+    if doc is None: raise HTTPException(status_code=404, detail="Scenario not found")
+    headers = {"ETag": doc.etag, "Cache-Control": "no-cache"}
+    if etag_matches(doc.etag, request.headers.get("if-none-match")): return Response(status_code=304, headers=headers)
+    return Response(doc.body, media_type="application/json", headers=headers)
 
 @router.get("/scenarios{basepath:path}/docs", response_class=HTMLResponse)
 async def scenario_docs(basepath: str):
@@ -1,9 +1,17 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from ..models import Mock, MockCreate, MockUpdate, Scenario, ScenarioCreate, ScenarioUpdate
 
 class AbstractStore:
+    ready: bool
+    async def start(self) -> None: ...
+    async def stop(self) -> None: ...
+    @property
+    def version(self) -> int: ...
     async def list_mocks(self) -> List[Mock]: ...
+    def mocks_json(self) -> bytes: ...
+    def mock_json(self, mock_id: str) -> bytes: ...
+    def iter_scenario_mocks(self, basepath: str) -> Iterator[Mock]: ...
     async def get_mock(self, mock_id: str) -> Mock: ...
     async def create_mock(self, m: MockCreate) -> Mock: ...
     async def update_mock(self, mock_id: str, patch: MockUpdate) -> Mock: ...
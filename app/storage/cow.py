@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+_BITS = 6
+_FANOUT = 1 << _BITS
+_MASK = _FANOUT - 1
+_EMPTY: Dict[Any, Any] = {}
+_EMPTY_ROW: Tuple[Dict[Any, Any], ...] = (_EMPTY,) * _FANOUT
+_MISSING = object()
+
+class CowMap:
+    """Mapa imutável com compartilhamento estrutural.
+
+    As chaves ficam em 64×64 dicts endereçados pelo hash; cada escrita copia só duas tuplas de 64
+    posições e um dict folha (~n/4096 itens), então o custo por escrita quase não cresce com o tamanho.
+    """
+    __slots__ = ("_rows", "_len")
+
+    def __init__(self, rows: Optional[Tuple[Tuple[Dict[Any, Any], ...], ...]] = None, length: int = 0):
+        self._rows = rows if rows is not None else (_EMPTY_ROW,) * _FANOUT
+        self._len = length
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[Any, Any]]) -> "CowMap":
+        # só as folhas ocupadas são criadas (mapas pequenos são a maioria: um por grupo de rotas)
+        leaves: Dict[int, Dict[Any, Any]] = {}
+        for k, v in items:
+            slot = hash(k) & (_FANOUT * _FANOUT - 1)
+            leaf = leaves.get(slot)
+            if leaf is None: leaf = leaves[slot] = {}
+            leaf[k] = v
+        rows = [_EMPTY_ROW] * _FANOUT
+        for i in {slot & _MASK for slot in leaves}:
+            rows[i] = tuple(leaves.get(i | (j << _BITS), _EMPTY) for j in range(_FANOUT))
+        return cls(tuple(rows), sum(len(leaf) for leaf in leaves.values()))
+
+    def _leaf(self, key: Any) -> Dict[Any, Any]:
+        h = hash(key)
+        return self._rows[h & _MASK][(h >> _BITS) & _MASK]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self._leaf(key).get(key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._leaf(key)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def _leaves(self) -> Iterator[Dict[Any, Any]]:
+        for row in self._rows:
+            if row is _EMPTY_ROW: continue
+            for leaf in row:
+                if leaf: yield leaf
+
+    def keys(self) -> Iterator[Any]:
+        for leaf in self._leaves(): yield from leaf
+
+    def values(self) -> Iterator[Any]:
+        for leaf in self._leaves(): yield from leaf.values()
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        for leaf in self._leaves(): yield from leaf.items()
+
+    def changed_keys(self, other: "CowMap") -> Iterator[Any]:
+        """Chaves cujo valor difere (por identidade) de `other`, inclusive as que só existem num dos dois.
+
+        Linhas e folhas compartilhadas entre as versões são puladas sem olhar o conteúdo.
+        """
+        for row, other_row in zip(self._rows, other._rows):
+            if row is other_row: continue
+            for leaf, other_leaf in zip(row, other_row):
+                if leaf is other_leaf: continue
+                for k, v in leaf.items():
+                    if other_leaf.get(k, _MISSING) is not v: yield k
+                for k in other_leaf:
+                    if k not in leaf: yield k
+
+    def _replace(self, h: int, leaf: Dict[Any, Any], length: int) -> "CowMap":
+        i, j = h & _MASK, (h >> _BITS) & _MASK
+        row = list(self._rows[i]); row[j] = leaf or _EMPTY
+        rows = list(self._rows); rows[i] = tuple(row)
+        return CowMap(tuple(rows), length)
+
+    def set(self, key: Any, value: Any) -> "CowMap":
+        h = hash(key)
+        leaf = dict(self._rows[h & _MASK][(h >> _BITS) & _MASK]); grew = key not in leaf
+        leaf[key] = value
+        return self._replace(h, leaf, self._len + grew)
+
+    def delete(self, key: Any) -> "CowMap":
+        h = hash(key)
+        leaf = self._rows[h & _MASK][(h >> _BITS) & _MASK]
+        if key not in leaf: return self
+        leaf = dict(leaf); del leaf[key]
+        return self._replace(h, leaf, self._len - 1)
+
+EMPTY_MAP = CowMap()
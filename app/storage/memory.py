@@ -1,55 +1,76 @@
 from __future__ import annotations
-import asyncio, re
+import asyncio
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from ..models import (
-    Mock, MockCreate, MockUpdate, Scenario, ScenarioCreate, ScenarioUpdate,
-    pattern_to_regex_with_params, ensure_leading_slash, specificity_score
+    Mock, MockCreate, MockRequestMatch, MockUpdate, Scenario, ScenarioCreate, ScenarioUpdate,
+    ensure_leading_slash
 )
+from ..core.bulk import BulkError, BulkItem
+from ..core.body_match import RequestBodyKeys, compile_body_match
+from ..core.request_context import RequestContext
+from .route_index import RouteIndex, iter_candidates
+from .runtime import MockRecord, records_json
 
 class InMemoryStore:
+    """Store em memória.
+
+    Leitores usam o snapshot publicado (`RouteIndex`, imutável) sem lock; escritores se serializam
+    no `_lock`, montam o próximo snapshot por copy-on-write e o publicam com uma única atribuição.
+    O snapshot guarda mocks como `MockRecord` compactos; os leitores administrativos devolvem cópias Pydantic.
+    """
+
     def __init__(self):
-        self._mocks: Dict[str, Dict[str, Any]] = {}
-        self._scenarios: Dict[str, Dict[str, Any]] = {}
-        self._compiled_mock_uri: Dict[str, tuple] = {}
+        self._snapshot = RouteIndex()
         self._lock = asyncio.Lock()
+        # /healthz/ready: stores que carregam estado na partida começam com False e só passam a True se a carga der certo
+        self.ready = True
+
+    async def start(self) -> None:
+        """Ganchos do lifespan da app; o store em memória não tem o que carregar nem fechar."""
+
+    async def stop(self) -> None:
+        pass
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self) -> RouteIndex:
+        return self._snapshot
+
+    async def _publish(self, idx: RouteIndex):
+        self._snapshot = idx.published(self._snapshot.version + 1)
 
     async def list_scenarios(self) -> List[Scenario]:
-        async with self._lock:
-            return [Scenario(**d) for d in self._scenarios.values()]
+        return self._snapshot.scenarios()
 
     async def get_scenario(self, basepath: str) -> Scenario:
-        async with self._lock:
-            basepath = ensure_leading_slash(basepath)
-            s = self._scenarios.get(basepath)
-            if not s: raise KeyError(basepath)
-            return Scenario(**s)
+        s = self._snapshot.scenario(ensure_leading_slash(basepath))
+        if not s: raise KeyError(basepath)
+        return s
 
     async def create_scenario(self, sc: ScenarioCreate) -> Scenario:
         async with self._lock:
+            snap = self._snapshot
             if not sc.basepath: raise ValueError("basepath is required")
             basepath = ensure_leading_slash(sc.basepath.strip())
-            if basepath in self._scenarios: raise ValueError("Basepath already in use by another scenario")
-            scenario = Scenario(
-                id=basepath, name=sc.name, description=sc.description, basepath=basepath,
-                enabled=True if sc.enabled is None else sc.enabled,
-                jwt_issuer_url=sc.jwt_issuer_url, jwt_location=sc.jwt_location or "none",
-                jwt_header_name=sc.jwt_header_name or "Authorization",
-                jwt_is_bearer=True if sc.jwt_is_bearer is None else sc.jwt_is_bearer,
-                jwt_cookie_name=sc.jwt_cookie_name,
-            )
-            self._scenarios[basepath] = scenario.model_dump()
+            if snap.scenario(basepath): raise ValueError("Basepath already in use by another scenario")
+            scenario = _new_scenario(sc, basepath)
+            await self._publish(snap.with_scenario(scenario))
             return scenario
 
     async def update_scenario(self, basepath: str, patch: ScenarioUpdate) -> Scenario:
         async with self._lock:
+            snap = self._snapshot
             basepath = ensure_leading_slash(basepath)
-            if basepath not in self._scenarios: raise KeyError(basepath)
-            doc = self._scenarios[basepath]
+            current = snap.scenario(basepath)
+            if not current: raise KeyError(basepath)
+            doc = current.model_dump()
             new_basepath = doc["basepath"]
             if patch.basepath and patch.basepath.strip():
                 cand = ensure_leading_slash(patch.basepath.strip())
-                if cand != basepath and cand in self._scenarios:
+                if cand != basepath and snap.scenario(cand):
                     raise ValueError("Basepath already in use by another scenario")
                 new_basepath = cand
             if patch.name is not None: doc["name"] = patch.name
@@ -60,59 +81,81 @@ class InMemoryStore:
             if patch.jwt_header_name is not None: doc["jwt_header_name"] = patch.jwt_header_name
             if patch.jwt_is_bearer is not None: doc["jwt_is_bearer"] = patch.jwt_is_bearer
             if patch.jwt_cookie_name is not None: doc["jwt_cookie_name"] = patch.jwt_cookie_name
+            if patch.compress is not None: doc["compress"] = patch.compress
+            if patch.chaos is not None: doc["chaos"] = patch.chaos
+            if patch.server_timing is not None: doc["server_timing"] = patch.server_timing
+            if patch.upstream_url is not None: doc["upstream_url"] = patch.upstream_url or None
+            if patch.record is not None: doc["record"] = patch.record
             doc["updated_at"] = datetime.now(timezone.utc)
             if new_basepath != basepath:
                 doc["basepath"] = new_basepath; doc["id"] = new_basepath
-                self._scenarios.pop(basepath); self._scenarios[new_basepath] = doc
-                for mid, m in list(self._mocks.items()):
-                    if m["scenario_basepath"] == basepath:
-                        m["scenario_basepath"] = new_basepath
+                scenario = Scenario(**doc)
+                idx = snap.with_scenario(scenario, replaces=basepath)
+                for m in snap.iter_scenario_mocks(basepath):
+                    m.scenario_basepath = new_basepath; idx = idx.with_mock(m)
             else:
-                self._scenarios[basepath] = doc
-            return Scenario(**doc)
+                scenario = Scenario(**doc)
+                idx = snap.with_scenario(scenario)
+                if scenario.compress != current.compress:
+                    # re-codifica as respostas dos mocks que herdam a compressão do cenário
+                    for r in snap.iter_scenario_records(basepath):
+                        if r.compress is None: idx = idx.with_mock(r.model())
+            await self._publish(idx)
+            return scenario
 
     async def delete_scenario(self, basepath: str) -> None:
         async with self._lock:
+            snap = self._snapshot
             basepath = ensure_leading_slash(basepath)
-            if basepath in self._scenarios:
-                for mid, m in list(self._mocks.items()):
-                    if m["scenario_basepath"] == basepath:
-                        self._mocks.pop(mid, None); self._compiled_mock_uri.pop(mid, None)
-                self._scenarios.pop(basepath, None)
+            if snap.scenario(basepath):
+                idx = snap
+                for r in snap.iter_scenario_records(basepath):
+                    idx = idx.without_mock(r.id)
+                await self._publish(idx.without_scenario(basepath))
 
     async def list_mocks(self) -> List[Mock]:
-        async with self._lock:
-            return [Mock(**doc) for doc in self._mocks.values()]
+        return self._snapshot.mocks()
 
     async def get_mock(self, mock_id: str) -> Mock:
-        async with self._lock:
-            doc = self._mocks.get(mock_id)
-            if not doc: raise KeyError(mock_id)
-            return Mock(**doc)
+        m = self._snapshot.mock(mock_id)
+        if not m: raise KeyError(mock_id)
+        return m
+
+    def mocks_json(self) -> bytes:
+        """Lista de mocks já em JSON (mesmo formato de `list_mocks`), direto dos documentos do snapshot."""
+        return records_json(self._snapshot.records())
+
+    def mock_json(self, mock_id: str) -> bytes:
+        r = self._snapshot.record(mock_id)
+        if not r: raise KeyError(mock_id)
+        return r.doc
+
+    def iter_scenario_mocks(self, basepath: str) -> Iterator[Mock]:
+        """Mocks de um cenário em ordem de criação, sem materializar a lista global."""
+        return self._snapshot.iter_scenario_mocks(ensure_leading_slash(basepath), ordered=True)
 
     async def _ensure_scenario_exists(self, basepath: str) -> Scenario:
-        if ensure_leading_slash(basepath) not in self._scenarios: raise KeyError("Scenario not found")
-        return Scenario(**self._scenarios[ensure_leading_slash(basepath)])
+        s = self._snapshot.scenario(ensure_leading_slash(basepath))
+        if not s: raise KeyError("Scenario not found")
+        return s
 
     async def create_mock(self, m: MockCreate) -> Mock:
         async with self._lock:
             if not m.scenario_basepath: raise KeyError("Scenario not found")
             await self._ensure_scenario_exists(m.scenario_basepath)
-            for doc in self._mocks.values():
-                if doc["scenario_basepath"] == ensure_leading_slash(m.scenario_basepath) and \
-                   doc["request"]["method"].upper() == m.request.method.upper() and \
-                   doc["request"]["uri"] == m.request.uri:
-                    raise FileExistsError("Mock already exists for this scenario/method/uri. Use PUT to update.")
+            snap = self._snapshot
+            if _conflicting_id(snap, ensure_leading_slash(m.scenario_basepath), m.request) is not None:
+                raise FileExistsError("Mock already exists for this scenario/method/uri/body. Use PUT to update.")
             mock = Mock(**m.model_dump())
             mock.scenario_basepath = ensure_leading_slash(mock.scenario_basepath)
-            self._mocks[mock.id] = mock.model_dump()
-            self._compiled_mock_uri[mock.id] = pattern_to_regex_with_params(mock.request.uri)
+            await self._publish(snap.with_mock(mock))
             return mock
 
     async def update_mock(self, mock_id: str, patch: MockUpdate) -> Mock:
         async with self._lock:
-            if mock_id not in self._mocks: raise KeyError(mock_id)
-            doc = self._mocks[mock_id]
+            current = self._snapshot.mock(mock_id)
+            if not current: raise KeyError(mock_id)
+            doc = current.model_dump()
             if patch.scenario_basepath is not None:
                 await self._ensure_scenario_exists(patch.scenario_basepath)
                 doc["scenario_basepath"] = ensure_leading_slash(patch.scenario_basepath)
@@ -123,45 +166,133 @@ class InMemoryStore:
                 elif k == "variants" and v is not None: doc["variants"] = v
                 else: doc[k] = v
             doc["updated_at"] = datetime.now(timezone.utc)
-            self._mocks[mock_id] = doc
-            self._compiled_mock_uri[mock_id] = pattern_to_regex_with_params(doc["request"]["uri"])
-            return Mock(**doc)
+            mock = Mock(**doc)
+            await self._publish(self._snapshot.with_mock(mock))
+            return mock
 
     async def delete_mock(self, mock_id: str) -> None:
         async with self._lock:
-            self._mocks.pop(mock_id, None); self._compiled_mock_uri.pop(mock_id, None)
+            await self._publish(self._snapshot.without_mock(mock_id))
 
-    async def find_match(self, path: str, method: str, query: Dict[str,str], headers: Dict[str,str], body: Any):
+    async def import_items(self, items: Sequence[BulkItem], *, atomic: bool = True, on_conflict: str = "error", dry_run: bool = False) -> Tuple[Dict[str, int], List[BulkError]]:
+        """Aplica cenários e mocks num único snapshot.
+
+        Conflitos (basepath existente; mesmo cenário/método/uri/corpo ou mesmo id de mock) seguem `on_conflict`:
+        "error", "skip" ou "replace" (substitui mantendo id e created_at). Com `atomic`, qualquer erro
+        descarta o lote inteiro; sem ele, só os itens com erro ficam de fora. `dry_run` só valida.
+        """
         async with self._lock:
-            cands = []
-            for basepath, sdoc in self._scenarios.items():
-                if not sdoc.get("enabled", True): continue
-                bp = sdoc["basepath"]
-                if path == bp or path.startswith(bp.rstrip("/") + "/"):
-                    cands.append(Scenario(**sdoc))
-            if not cands: return None
-            scenario = sorted(cands, key=lambda s: len(s.basepath), reverse=True)[0]
-            sub = path[len(scenario.basepath):] or "/"
-            if not sub.startswith("/"): sub = "/" + sub
-            picks = []
-            for doc in self._mocks.values():
-                m = Mock(**doc)
-                if not m.enabled or m.scenario_basepath != scenario.basepath: continue
-                if m.request.method.upper() != method.upper(): continue
-                regex, _ = self._compiled_mock_uri.get(m.id) or pattern_to_regex_with_params(m.request.uri)
-                mt = regex.match(sub)
-                if not mt: continue
-                path_params = {k: mt.group(k) for k in mt.groupdict().keys()}
-                if m.request.query and any(query.get(k) != v for k,v in m.request.query.items()): continue
-                if m.request.headers and any(headers.get(k.lower()) != v for k,v in m.request.headers.items()): continue
-                if m.request.body is not None:
-                    import json as _json
-                    if isinstance(m.request.body, (dict,list)):
-                        if not isinstance(body, (dict,list)) or body != m.request.body: continue
+            snap = self._snapshot
+            counts = dict.fromkeys(("scenarios_created", "scenarios_replaced", "mocks_created", "mocks_replaced", "skipped"), 0)
+            errors: List[BulkError] = []
+            scenarios: Dict[str, Scenario] = {}
+            mocks: Dict[str, Mock] = {}
+            batch_keys: Dict[Tuple[str, str, str, Optional[bytes]], str] = {}
+            for item in items:
+                try:
+                    if isinstance(item.model, ScenarioCreate):
+                        sc = item.model
+                        if not sc.basepath: raise ValueError("basepath is required")
+                        basepath = ensure_leading_slash(sc.basepath.strip())
+                        current = scenarios.get(basepath) or snap.scenario(basepath)
+                        scenario = _new_scenario(sc, basepath)
+                        if current is not None:
+                            if on_conflict == "skip": counts["skipped"] += 1; continue
+                            if on_conflict != "replace": raise ValueError(f"Basepath already in use: {basepath}")
+                            scenario = scenario.model_copy(update={"created_at": current.created_at})
+                            counts["scenarios_replaced"] += 1
+                        else:
+                            counts["scenarios_created"] += 1
+                        scenarios[basepath] = scenario
+                        continue
+                    m = item.model
+                    basepath = ensure_leading_slash(m.scenario_basepath)
+                    if basepath not in scenarios and not snap.scenario(basepath): raise ValueError(f"Scenario not found: {basepath}")
+                    key = (basepath, m.request.method.upper(), m.request.uri, _body_sig(m.request))
+                    # conflito contra o estado de trabalho: o que o lote já gravou na chave; senão o mock do
+                    # snapshot nela, a menos que o lote já o tenha regravado (e movido) em outra chave
+                    existing_id = batch_keys.get(key)
+                    if existing_id is None:
+                        snap_id = _conflicting_id(snap, basepath, m.request)
+                        if snap_id not in mocks: existing_id = snap_id
+                    if existing_id is None and item.mock_id and (item.mock_id in mocks or snap.mock(item.mock_id)):
+                        existing_id = item.mock_id
+                    # campos rasos: submodelos já validados são reaproveitados sem nova validação
+                    doc = dict(m); doc["scenario_basepath"] = basepath
+                    if existing_id is not None:
+                        if on_conflict == "skip": counts["skipped"] += 1; continue
+                        if on_conflict != "replace": raise FileExistsError(f"Mock already exists for {key[1]} {basepath}{m.request.uri}")
+                        prev = mocks.get(existing_id) or snap.mock(existing_id)
+                        prev_key = (prev.scenario_basepath, prev.request.method.upper(), prev.request.uri, _body_sig(prev.request))
+                        if prev_key != key: batch_keys.pop(prev_key, None)
+                        mock = Mock(**doc, id=existing_id, created_at=prev.created_at)
+                        counts["mocks_replaced"] += 1
                     else:
-                        if (body if isinstance(body,str) else _json.dumps(body, separators=(',',':'), ensure_ascii=False)) != str(m.request.body): continue
-                score = m.priority * 100000 + specificity_score(m.request.uri)
-                picks.append((score, m, path_params, scenario))
-            if not picks: return None
-            picks.sort(key=lambda x: x[0], reverse=True)
-            return picks[0][1], picks[0][2], picks[0][3]
+                        mock = Mock(**doc, id=item.mock_id) if item.mock_id else Mock(**doc)
+                        counts["mocks_created"] += 1
+                    mocks[mock.id] = mock; batch_keys[key] = mock.id
+                except (ValueError, FileExistsError) as e:
+                    errors.append(BulkError(item.line, str(e)))
+            if dry_run or (atomic and errors): return counts, errors
+            if scenarios or mocks: await self._publish(snap.with_batch(scenarios.values(), mocks.values()))
+            return counts, errors
+
+    async def find_match(self, path: str, method: str, query: Dict[str,str], headers: Dict[str,str], body: Any):
+        return await match_request(self._snapshot, RequestContext.from_parts(method, path, query, headers, body))
+
+async def match_request(snap: RouteIndex, ctx: RequestContext) -> Optional[Tuple[MockRecord, Dict[str, Any], Scenario]]:
+    """(registro do mock, path_params, cenário) do primeiro mock do snapshot que casa com a requisição.
+
+    Query/headers só são materializados se algum candidato os exige, e o corpo só é lido para candidatos com `request.body`
+    (ou de cara, quando o URI tem muitos mocks exact distinguidos pelo corpo e o match vira busca por hash).
+    """
+    scenario = snap.match_scenario(ctx.path)
+    if scenario is None: return None
+    sub = ctx.path[len(scenario.basepath):] or "/"
+    if not sub.startswith("/"): sub = "/" + sub
+    groups = snap.candidate_groups(scenario.basepath, ctx.method, sub)
+    body_keys = None
+    if any(g.indexed for g in groups):
+        body_keys = RequestBodyKeys(await ctx.load_body())
+    for r, path_params in iter_candidates(groups, sub, body_keys):
+        if r.body_sig is not None:
+            if not ctx.body_loaded: await ctx.load_body()
+            if r.body_test is None and body_keys is None: body_keys = RequestBodyKeys(ctx.body)
+        if _request_matches(r, ctx, body_keys):
+            return r, path_params, scenario
+    return None
+
+def _new_scenario(sc: ScenarioCreate, basepath: str) -> Scenario:
+    return Scenario(
+        id=basepath, name=sc.name, description=sc.description, basepath=basepath,
+        enabled=True if sc.enabled is None else sc.enabled,
+        jwt_issuer_url=sc.jwt_issuer_url, jwt_location=sc.jwt_location or "none",
+        jwt_header_name=sc.jwt_header_name or "Authorization",
+        jwt_is_bearer=True if sc.jwt_is_bearer is None else sc.jwt_is_bearer,
+        jwt_cookie_name=sc.jwt_cookie_name, compress=bool(sc.compress), chaos=True if sc.chaos is None else sc.chaos,
+        server_timing=bool(sc.server_timing), upstream_url=sc.upstream_url or None, record=bool(sc.record),
+    )
+
+def _body_sig(req: MockRequestMatch) -> Optional[bytes]:
+    return compile_body_match(req.body_match, req.body)[0] if req.body is not None else None
+
+def _conflicting_id(snap: RouteIndex, basepath: str, req: MockRequestMatch) -> Optional[str]:
+    """Mock já existente com o mesmo cenário/método/uri e o mesmo match de corpo."""
+    sig = _body_sig(req)
+    for mock_id in snap.mock_ids_for(basepath, req.method, req.uri):
+        if snap.record(mock_id).body_sig == sig: return mock_id
+    return None
+
+def _request_matches(r: MockRecord, ctx: RequestContext, body_keys: Optional[RequestBodyKeys]) -> bool:
+    if r.query is not None:
+        query = ctx.query
+        for k, v in r.query:
+            if query.get(k) != v: return False
+    if r.headers is not None:
+        headers = ctx.headers
+        for k, v in r.headers:
+            if headers.get(k) != v: return False
+    if r.body_sig is not None:
+        if r.body_test is None: return body_keys.matches(r.body_sig)
+        return r.body_test(ctx.body, ctx.text)
+    return True
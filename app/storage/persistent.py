@@ -0,0 +1,311 @@
+"""Store persistido em disco (STORE_BACKEND=file): snapshot binário + journal append-only em STORE_DIR.
+
+Arquivos:
+  snapshot.bin           estado completo numa versão (cabeçalho, entradas, CRC32)
+  journal-<versão>.log   registros das escritas feitas depois do snapshot daquela versão
+
+Cada escrita publicada vira um registro do journal com o que mudou (`RouteIndex.changes_since`):
+cenários e mocks alterados com o JSON de cada um, ou removidos. Os registros vão para um buffer e
+uma tarefa em background grava e faz fsync em lote. Com STORE_FSYNC_INTERVAL=0 a escrita só
+responde depois do fsync do seu lote (as que chegam durante um fsync vão juntas no seguinte); com
+intervalo, responde na hora e o fsync roda a cada intervalo.
+
+A cada STORE_SNAPSHOT_INTERVAL segundos (se houve escrita) e no encerramento, o estado vai para um
+snapshot novo (arquivo temporário, fsync, rename) e o journal continua num arquivo novo; os antigos
+são apagados quando o snapshot está no disco.
+
+Na partida (`start`, no lifespan, antes de o servidor aceitar conexões), snapshot e journal são
+lidos numa thread: os registros são aplicados sobre os documentos, sem compilar nada, e o índice
+(regexes, respostas codificadas, buckets) é montado uma única vez com `with_docs`, com o GC pausado.
+Se a carga falha, o servidor sobe com `ready` False (/healthz/ready responde 503 "failed").
+Registro incompleto ou corrompido no fim do journal (queda no meio da gravação) é descartado.
+"""
+from __future__ import annotations
+import asyncio, gc, logging, os, struct, time, zlib
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+import anyio.to_thread
+from ..core.config import STORE_DIR, STORE_FSYNC_INTERVAL, STORE_SNAPSHOT_INTERVAL
+from ..models import Scenario
+from .memory import InMemoryStore
+from .route_index import RouteIndex
+from .runtime import MockRecord
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Entry = Tuple[int, str, Optional[bytes]]
+
+SCENARIO, MOCK = 0, 1
+SNAPSHOT_FILE = "snapshot.bin"
+_MAGIC = b"MDSNAP01"
+_SNAPSHOT = struct.Struct("<8sQ")  # magic, versão
+_RECORD = struct.Struct("<IIQ")    # tamanho do payload, CRC32 do payload, versão
+_ENTRY = struct.Struct("<BHI")     # tipo, tamanho da chave, tamanho do documento
+_REMOVED = 0xFFFFFFFF
+
+def _entries(items: Iterable[Entry]) -> bytes:
+    out: List[bytes] = []
+    for kind, key, doc in items:
+        k = key.encode("utf-8")
+        out.append(_ENTRY.pack(kind, len(k), _REMOVED if doc is None else len(doc))); out.append(k)
+        if doc is not None: out.append(doc)
+    return b"".join(out)
+
+def _iter_entries(data: bytes, pos: int, end: int) -> Iterator[Entry]:
+    while pos < end:
+        kind, klen, dlen = _ENTRY.unpack_from(data, pos); pos += _ENTRY.size
+        key = data[pos:pos + klen].decode("utf-8"); pos += klen
+        if dlen == _REMOVED:
+            yield kind, key, None
+        else:
+            yield kind, key, data[pos:pos + dlen]; pos += dlen
+
+def _record(version: int, scenarios: Dict[str, Optional[Scenario]], records: Dict[str, Optional[MockRecord]]) -> bytes:
+    # remoções primeiro; mocks na ordem de criação, que a releitura preserva
+    items: List[Entry] = [(SCENARIO, bp, None) for bp, s in scenarios.items() if s is None]
+    items += [(MOCK, mock_id, None) for mock_id, r in records.items() if r is None]
+    items += [(SCENARIO, bp, s.model_dump_json(by_alias=True).encode("utf-8")) for bp, s in scenarios.items() if s is not None]
+    items += [(MOCK, r.id, r.doc) for r in sorted((r for r in records.values() if r is not None), key=lambda r: r.seq)]
+    payload = _entries(items)
+    return _RECORD.pack(len(payload), zlib.crc32(payload), version) + payload
+
+class _State:
+    """Documentos por chave, na ordem de criação: o que o snapshot guarda e o journal altera."""
+
+    def __init__(self):
+        self.version = 0
+        self.scenarios: Dict[str, bytes] = {}
+        self.mocks: Dict[str, bytes] = {}
+
+    def apply(self, entries: Iterable[Entry]) -> None:
+        # mock alterado mantém a posição no dict (ordem de criação); novo vai para o fim
+        for kind, key, doc in entries:
+            docs = self.scenarios if kind == SCENARIO else self.mocks
+            if doc is None: docs.pop(key, None)
+            else: docs[key] = doc
+
+def _read_snapshot(path: Path, state: _State) -> None:
+    data = path.read_bytes()
+    if len(data) < _SNAPSHOT.size + 4 or zlib.crc32(memoryview(data)[:-4]) != int.from_bytes(data[-4:], "little"):
+        raise ValueError(f"Snapshot {path} is corrupted")
+    magic, version = _SNAPSHOT.unpack_from(data)
+    if magic != _MAGIC: raise ValueError(f"{path} is not a store snapshot")
+    state.apply(_iter_entries(data, _SNAPSHOT.size, len(data) - 4))
+    state.version = version
+
+def _replay(path: Path, state: _State) -> Tuple[int, int, int]:
+    """Aplica os registros seguintes à versão do estado; devolve (aplicados, bytes íntegros, tamanho do arquivo)."""
+    data = path.read_bytes()
+    view = memoryview(data)
+    pos = applied = 0
+    while pos + _RECORD.size <= len(data):
+        size, crc, version = _RECORD.unpack_from(data, pos)
+        start = pos + _RECORD.size
+        if start + size > len(data) or zlib.crc32(view[start:start + size]) != crc: break
+        pos = start + size
+        if version <= state.version: continue  # já está no snapshot
+        if version != state.version + 1:
+            log.error("Journal %s jumps from version %d to %d; ignoring the rest", path, state.version, version)
+            continue
+        state.apply(_iter_entries(data, start, pos))
+        state.version = version; applied += 1
+    return applied, pos, len(data)
+
+def _read_state(directory: Path) -> Tuple[_State, int]:
+    state = _State()
+    snapshot = directory / SNAPSHOT_FILE
+    if snapshot.exists(): _read_snapshot(snapshot, state)
+    replayed = 0
+    for path in sorted(directory.glob("journal-*.log")):
+        applied, valid, size = _replay(path, state)
+        replayed += applied
+        if valid < size:
+            log.warning("Discarding %d bytes of incomplete records at the end of %s", size - valid, path)
+            os.truncate(path, valid)
+    return state, replayed
+
+def _build(state: _State) -> RouteIndex:
+    return RouteIndex().with_docs(state.scenarios.values(), state.mocks.values())
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+def _append(fd: int, data: bytes, size: int) -> None:
+    try:
+        view = memoryview(data)
+        while view: view = view[os.write(fd, view):]
+        os.fsync(fd)
+    except BaseException:
+        os.ftruncate(fd, size)  # sem registro pela metade no meio do arquivo
+        raise
+
+def _write_snapshot(directory: Path, idx: RouteIndex) -> int:
+    items: List[Entry] = [(SCENARIO, s.basepath, s.model_dump_json(by_alias=True).encode("utf-8")) for s in idx.scenarios()]
+    items += [(MOCK, r.id, r.doc) for r in idx.records()]
+    data = _SNAPSHOT.pack(_MAGIC, idx.version) + _entries(items)
+    data += zlib.crc32(data).to_bytes(4, "little")
+    tmp = directory / (SNAPSHOT_FILE + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, directory / SNAPSHOT_FILE)
+    _fsync_dir(directory)
+    return len(data)
+
+class PersistentStore(InMemoryStore):
+    def __init__(self, directory: str = STORE_DIR, fsync_interval: float = STORE_FSYNC_INTERVAL, snapshot_interval: float = STORE_SNAPSHOT_INTERVAL):
+        super().__init__()
+        self.directory = Path(directory)
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.ready = False
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0   # última versão no buffer
+        self._durable = 0    # última versão com fsync
+        self._failed = 0     # última versão de um lote que falhou
+        self._failure: Optional[BaseException] = None
+        self._since_snapshot = 0
+        self._io = asyncio.Lock()
+        self._flushed = asyncio.Condition()
+        self._dirty = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    # ---- ciclo de vida ----
+    async def start(self) -> None:
+        """Carrega snapshot + journal e só então retorna.
+
+        É chamado no lifespan, antes de o servidor aceitar conexões: nada mais roda no processo
+        durante a carga, então o GC fica pausado enquanto o índice é montado (só objetos novos e
+        vivos) e, no fim, `gc.freeze` tira da coleta tudo o que foi carregado até aqui.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        enabled = gc.isenabled()
+        gc.disable()
+        try: await self._load()
+        finally:
+            if enabled: gc.enable()
+            gc.freeze()
+
+    async def stop(self) -> None:
+        self._stopping.set(); self._dirty.set()
+        while self._tasks: await self._tasks.pop(0)
+        if not self.ready: return
+        await self.flush()
+        if self._since_snapshot: await self.save_snapshot()
+        os.close(self._fd); self._fd = None
+
+    async def _load(self) -> None:
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                state, replayed = await anyio.to_thread.run_sync(_read_state, self.directory)
+                idx = await anyio.to_thread.run_sync(_build, state)
+            except Exception as e:
+                log.exception("Could not load the mock store from %s", self.directory)
+                self.load_error = str(e)
+                return
+            self._snapshot = idx.published(state.version)
+            self._durable = self._buffered = state.version
+            self._since_snapshot = replayed
+            self._open_journal(state.version)
+            self.load_seconds = time.perf_counter() - started
+            self.ready = True
+        log.info("Loaded %d scenarios and %d mocks (version %d, %d journal records) from %s in %.2fs",
+                 len(state.scenarios), len(state.mocks), state.version, replayed, self.directory, self.load_seconds)
+        self._tasks += [asyncio.create_task(self._flusher()), asyncio.create_task(self._snapshotter())]
+
+    async def _pause(self, seconds: float) -> bool:
+        """Espera `seconds` ou o encerramento; True se encerrando."""
+        try: await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError: return False
+        return True
+
+    async def _flusher(self) -> None:
+        while not self._stopping.is_set():
+            await self._dirty.wait()
+            if self.fsync_interval: await self._pause(self.fsync_interval)
+            self._dirty.clear()
+            try: await self.flush()
+            except Exception:
+                log.exception("Could not write the store journal; retrying")
+                await self._pause(1.0); self._dirty.set()
+
+    async def _snapshotter(self) -> None:
+        while not await self._pause(self.snapshot_interval):
+            if not self._since_snapshot: continue
+            try: await self.save_snapshot()
+            except Exception: log.exception("Could not write the store snapshot")
+
+    # ---- disco ----
+    def _open_journal(self, version: int) -> None:
+        if self._fd is not None: os.close(self._fd)
+        self._fd = os.open(self.directory / f"journal-{version:020d}.log", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        _fsync_dir(self.directory)
+
+    async def flush(self) -> None:
+        """Grava e faz fsync dos registros pendentes do journal."""
+        async with self._io:
+            if not self._buffer: return
+            data, version = b"".join(self._buffer), self._buffered
+            self._buffer = []
+            try:
+                await anyio.to_thread.run_sync(_append, self._fd, data, self._size)
+                self._size += len(data); self._durable = version
+            except BaseException as e:
+                self._buffer.insert(0, data)  # volta para a próxima tentativa
+                self._failed, self._failure = version, e
+                raise
+            finally:
+                async with self._flushed: self._flushed.notify_all()
+
+    async def save_snapshot(self) -> None:
+        """Grava o estado atual num snapshot novo e apaga os journals que ele cobre."""
+        async with self._io:
+            idx = self._snapshot
+            # o que ainda está no buffer vai para o journal novo (na releitura, versões <= a do snapshot são puladas)
+            old = [p for p in self.directory.glob("journal-*.log") if p.name != f"journal-{idx.version:020d}.log"]
+            self._open_journal(idx.version)
+            self._since_snapshot = 0
+        try:
+            size = await anyio.to_thread.run_sync(_write_snapshot, self.directory, idx)
+        except BaseException:
+            self._since_snapshot += 1
+            raise
+        for p in old: p.unlink(missing_ok=True)
+        log.info("Store snapshot at version %d written (%d bytes)", idx.version, size)
+
+    # ---- escrita ----
+    async def _publish(self, idx: RouteIndex):
+        if not self.ready: raise RuntimeError(f"Mock store could not be loaded: {self.load_error}")
+        scenarios, records = idx.changes_since(self._snapshot)
+        if not scenarios and not records: return
+        await super()._publish(idx)
+        version = self._snapshot.version
+        self._buffer.append(_record(version, scenarios, records))
+        self._buffered = version; self._since_snapshot += 1
+        self._dirty.set()
+
+    async def _persisted(self, op: Callable[..., Awaitable[T]], *args: Any, **kw: Any) -> T:
+        result = await op(*args, **kw)
+        if not self.fsync_interval:
+            version = self._buffered
+            async with self._flushed:
+                await self._flushed.wait_for(lambda: self._durable >= version or self._failed >= version)
+            if self._durable < version: raise RuntimeError(f"Change applied but not yet persisted: {self._failure}")
+        return result
+
+    async def create_scenario(self, *a, **kw): return await self._persisted(super().create_scenario, *a, **kw)
+    async def update_scenario(self, *a, **kw): return await self._persisted(super().update_scenario, *a, **kw)
+    async def delete_scenario(self, *a, **kw): return await self._persisted(super().delete_scenario, *a, **kw)
+    async def create_mock(self, *a, **kw): return await self._persisted(super().create_mock, *a, **kw)
+    async def update_mock(self, *a, **kw): return await self._persisted(super().update_mock, *a, **kw)
+    async def delete_mock(self, *a, **kw): return await self._persisted(super().delete_mock, *a, **kw)
+    async def import_items(self, *a, **kw): return await self._persisted(super().import_items, *a, **kw)
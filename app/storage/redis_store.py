@@ -0,0 +1,199 @@
+"""Store compartilhado via Redis (STORE_BACKEND=redis), para vários workers/réplicas com o mesmo conjunto de mocks.
+
+O Redis guarda os documentos e cada processo mantém o seu snapshot compilado (`RouteIndex`) em
+memória: o match nunca vai à rede, e as escritas reaproveitam toda a validação do `InMemoryStore`.
+
+Layout (prefixo REDIS_PREFIX):
+  <p>:scenarios  hash basepath -> JSON do cenário
+  <p>:mocks      hash id -> JSON do mock
+  <p>:order      zset id -> ordem de criação (desempate do match)
+  <p>:version    versão global; o snapshot local usa o mesmo número
+  <p>:log        lista (mais recente primeiro) com as chaves alteradas em cada versão
+  <p>:events     canal pub/sub com a versão nova a cada escrita
+
+Escrita: o snapshot local é alinhado à versão do Redis, a operação monta o próximo snapshot e as
+diferenças vão numa transação com WATCH na versão; se outro nó escreveu no meio, sincroniza e
+repete. Leitura remota: cada aviso no canal agenda uma sincronização; avisos que chegam durante
+uma sincronização viram uma só. A sincronização busca no log só as chaves alteradas desde a versão
+local (recarga completa se o log não cobre o intervalo). Como pub/sub pode perder mensagens
+(reconexão), a versão também é conferida a cada REDIS_SYNC_INTERVAL segundos.
+"""
+from __future__ import annotations
+import asyncio, json, logging, random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+from ..core.config import REDIS_LOG_SIZE, REDIS_PREFIX, REDIS_SYNC_INTERVAL
+from .memory import InMemoryStore
+from .route_index import RouteIndex
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ordem global de criação = versão * _RANK + posição no lote
+_RANK = 1 << 20
+_MAX_ATTEMPTS = 10
+
+class StaleSnapshot(Exception):
+    """A versão do Redis mudou entre a sincronização e a escrita."""
+
+def _int(raw: Optional[bytes]) -> int:
+    return int(raw) if raw else 0
+
+class RedisStore(InMemoryStore):
+    def __init__(self, redis: Redis, prefix: str = REDIS_PREFIX, sync_interval: float = REDIS_SYNC_INTERVAL):
+        super().__init__()
+        self.redis = redis
+        self.sync_interval = sync_interval
+        self._k_scenarios, self._k_mocks, self._k_order = f"{prefix}:scenarios", f"{prefix}:mocks", f"{prefix}:order"
+        self._k_version, self._k_log, self.channel = f"{prefix}:version", f"{prefix}:log", f"{prefix}:events"
+        self._pending = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self.syncs = 0
+        self.reloads = 0
+
+    # ---- ciclo de vida ----
+    async def start(self) -> None:
+        await self.sync()
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._poll()), asyncio.create_task(self._syncer())]
+
+    async def stop(self) -> None:
+        # além do cancel, a flag: um cancelamento que chegue durante um comando do Redis pode ser absorvido pelo cliente
+        self._closing = True; self._pending.set()
+        for t in self._tasks: t.cancel()
+        for t in self._tasks:
+            try: await t
+            except asyncio.CancelledError: pass
+        self._tasks = []
+        await self.redis.aclose()
+
+    async def _listen(self) -> None:
+        while not self._closing:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._pending.set()  # o que mudou enquanto não estava inscrito
+                async for message in pubsub.listen():
+                    if message["type"] == "message" and _int(message["data"]) > self._snapshot.version: self._pending.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Redis pub/sub disconnected (%s); retrying", e)
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            self._pending.set()
+
+    async def _syncer(self) -> None:
+        while True:
+            await self._pending.wait()
+            if self._closing: return
+            self._pending.clear()
+            try: await self.sync()
+            except Exception as e:
+                log.warning("Redis store sync failed (%s)", e)
+                await asyncio.sleep(1.0)
+
+    # ---- leitura do Redis ----
+    async def sync(self) -> None:
+        """Traz o snapshot local para a versão atual do Redis."""
+        async with self._lock:
+            await self._sync_locked()
+
+    async def _sync_locked(self) -> None:
+        for _ in range(_MAX_ATTEMPTS):
+            local = self._snapshot.version
+            async with self.redis.pipeline(transaction=True) as pipe:
+                version, entries = await pipe.get(self._k_version).lrange(self._k_log, 0, REDIS_LOG_SIZE - 1).execute()
+            version = _int(version)
+            if version == local: return
+            changes = [json.loads(e) for e in entries]
+            changes = [c for c in changes if c["v"] > local]
+            if local == 0 or version < local or not changes or changes[-1]["v"] != local + 1: return await self._reload()
+            scenario_keys = sorted({bp for c in changes for bp in c["s"]})
+            mock_ids = sorted({i for c in changes for i in c["m"]})
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.get(self._k_version)
+                if scenario_keys: pipe.hmget(self._k_scenarios, scenario_keys)
+                if mock_ids: pipe.hmget(self._k_mocks, mock_ids); pipe.zmscore(self._k_order, mock_ids)
+                res = await pipe.execute()
+            if _int(res[0]) != version: continue  # outra escrita no meio: busca o log de novo
+            res = res[1:]
+            scenario_docs = res.pop(0) if scenario_keys else []
+            mock_docs, ranks = (res[0], res[1]) if mock_ids else ([], [])
+            self._snapshot = self._applied(self._snapshot, dict(zip(scenario_keys, scenario_docs)), list(zip(mock_ids, mock_docs, ranks))).published(version)
+            self.syncs += 1
+            return
+        await self._reload()
+
+    @staticmethod
+    def _applied(idx: RouteIndex, scenarios: Dict[str, Optional[bytes]], mocks: List[Tuple[str, Optional[bytes], Optional[float]]]) -> RouteIndex:
+        for bp, doc in scenarios.items():
+            if doc is None: idx = idx.without_scenario(bp)
+        for mock_id, doc, _ in mocks:
+            if doc is None: idx = idx.without_mock(mock_id)
+        present = sorted((m for m in mocks if m[1] is not None), key=lambda m: m[2] or 0)
+        upserted = [doc for doc in scenarios.values() if doc is not None]
+        if upserted or present: idx = idx.with_docs(upserted, [doc for _, doc, _ in present])
+        return idx
+
+    async def _reload(self) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            version, scenarios, mocks, order = await (pipe.get(self._k_version).hgetall(self._k_scenarios)
+                                                      .hgetall(self._k_mocks).zrange(self._k_order, 0, -1).execute())
+        ordered = [mocks[i] for i in order if i in mocks]
+        self._snapshot = RouteIndex().with_docs(scenarios.values(), ordered).published(_int(version))
+        self.reloads += 1
+
+    # ---- escrita ----
+    async def _publish(self, idx: RouteIndex):
+        old = self._snapshot
+        scenarios, records = idx.changes_since(old)
+        if not scenarios and not records: return
+        version = old.version + 1
+        added = sorted((r for mock_id, r in records.items() if r is not None and old.record(mock_id) is None), key=lambda r: r.seq)
+        saved = {bp: s.model_dump_json(by_alias=True) for bp, s in scenarios.items() if s is not None}
+        removed = [bp for bp, s in scenarios.items() if s is None]
+        docs = {mock_id: r.doc for mock_id, r in records.items() if r is not None}
+        deleted = [mock_id for mock_id, r in records.items() if r is None]
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(self._k_version)
+                if _int(await pipe.get(self._k_version)) != old.version: raise StaleSnapshot()
+                pipe.multi()
+                if saved: pipe.hset(self._k_scenarios, mapping=saved)
+                if removed: pipe.hdel(self._k_scenarios, *removed)
+                if docs: pipe.hset(self._k_mocks, mapping=docs)
+                if deleted: pipe.hdel(self._k_mocks, *deleted); pipe.zrem(self._k_order, *deleted)
+                if added: pipe.zadd(self._k_order, {r.id: version * _RANK + i for i, r in enumerate(added)}, nx=True)
+                pipe.set(self._k_version, version)
+                pipe.lpush(self._k_log, json.dumps({"v": version, "s": list(scenarios), "m": list(records)}))
+                pipe.ltrim(self._k_log, 0, REDIS_LOG_SIZE - 1)
+                pipe.publish(self.channel, version)
+                await pipe.execute()
+        except WatchError:
+            raise StaleSnapshot()
+        self._snapshot = idx.published(version)
+
+    async def _write(self, op: Callable[..., Awaitable[T]], *args: Any, **kw: Any) -> T:
+        for attempt in range(_MAX_ATTEMPTS):
+            await self.sync()
+            try: return await op(*args, **kw)
+            except StaleSnapshot:
+                # espera aleatória crescente: sem ela, dois nós escrevendo sem parar invalidam um ao outro
+                await asyncio.sleep(random.uniform(0, 0.002 * 2 ** attempt))
+        raise RuntimeError("Concurrent writes kept invalidating this change; try again")
+
+    async def create_scenario(self, *a, **kw): return await self._write(super().create_scenario, *a, **kw)
+    async def update_scenario(self, *a, **kw): return await self._write(super().update_scenario, *a, **kw)
+    async def delete_scenario(self, *a, **kw): return await self._write(super().delete_scenario, *a, **kw)
+    async def create_mock(self, *a, **kw): return await self._write(super().create_mock, *a, **kw)
+    async def update_mock(self, *a, **kw): return await self._write(super().update_mock, *a, **kw)
+    async def delete_mock(self, *a, **kw): return await self._write(super().delete_mock, *a, **kw)
+    async def import_items(self, *a, **kw): return await self._write(super().import_items, *a, **kw)
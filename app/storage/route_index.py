@@ -0,0 +1,357 @@
+from __future__ import annotations
+import bisect, heapq
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from ..models import TRUSTED, Mock, Scenario
+from ..core.body_match import RequestBodyKeys, is_text_key
+from .cow import CowMap, EMPTY_MAP
+from .runtime import MockRecord, docs_models, first_segment, records_models
+
+def _basepath_segments(basepath: str) -> List[str]:
+    return basepath.rstrip("/").split("/")[1:]
+
+def basepath_matches(basepath: str, path: str) -> bool:
+    return path == basepath or path.startswith(basepath.rstrip("/") + "/")
+
+def _route_key(r: MockRecord) -> Tuple[int, int]:
+    return (-r.score, r.seq)
+
+# A partir de quantos mocks exact de corpo no mesmo grupo o match vira busca por hash
+BODY_INDEX_MIN = 8
+
+class BodyIndex(NamedTuple):
+    """Rotas exact de um grupo por assinatura do corpo; `others` são as demais, na ordem do grupo."""
+    by_sig: Dict[bytes, Tuple[MockRecord, ...]]
+    others: Tuple[MockRecord, ...]
+    has_text: bool  # alguma assinatura de corpo texto (o corpo recebido precisa das duas chaves)
+
+_NO_INDEX = BodyIndex({}, (), False)
+
+def _body_index(routes: Tuple[MockRecord, ...]) -> BodyIndex:
+    if len(routes) < BODY_INDEX_MIN: return _NO_INDEX
+    by_sig: Dict[bytes, List[MockRecord]] = {}; others = []
+    for r in routes:
+        if r.body_sig is not None and r.body_test is None: by_sig.setdefault(r.body_sig, []).append(r)
+        else: others.append(r)
+    if len(routes) - len(others) < BODY_INDEX_MIN: return _NO_INDEX
+    return BodyIndex({k: tuple(v) for k, v in by_sig.items()}, tuple(others), any(is_text_key(k) for k in by_sig))
+
+class RouteGroup:
+    """Rotas de um grupo (mesmo URI literal ou mesmo primeiro segmento) em ordem de precedência.
+
+    Com muitos mocks distinguidos só pelo corpo (modo exact), o grupo já nasce com um índice
+    assinatura → rotas (montado junto com o snapshot, nunca na leitura); `select` então devolve só as
+    rotas cujo corpo pode casar, na mesma ordem.
+    """
+    __slots__ = ("routes", "index")
+
+    def __init__(self, routes: Tuple[MockRecord, ...]):
+        self.routes = routes
+        self.index = _body_index(routes)
+
+    def __iter__(self) -> Iterator[MockRecord]:
+        return iter(self.routes)
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    @property
+    def indexed(self) -> bool:
+        return bool(self.index.by_sig)
+
+    def select(self, body_keys: Optional[RequestBodyKeys]) -> Iterable[MockRecord]:
+        by_sig, others, has_text = self.index
+        if not by_sig or body_keys is None: return self.routes
+        hits = [by_sig[k] for k in ((body_keys.json_key(), body_keys.text_key()) if has_text else (body_keys.json_key(),)) if k in by_sig]
+        if not hits: return others
+        return heapq.merge(others, *hits, key=_route_key)
+
+def _inserted(group: Optional[RouteGroup], r: MockRecord) -> RouteGroup:
+    lst = list(group.routes) if group is not None else []
+    bisect.insort(lst, r, key=_route_key)
+    return RouteGroup(tuple(lst))
+
+class _Bucket:
+    __slots__ = ("literal", "templated")
+
+    def __init__(self, literal: CowMap = EMPTY_MAP, templated: CowMap = EMPTY_MAP):
+        self.literal = literal
+        self.templated = templated
+
+    def with_route(self, r: MockRecord) -> "_Bucket":
+        if r.literal:
+            uri = r.uri
+            return _Bucket(self.literal.set(uri, _inserted(self.literal.get(uri), r)), self.templated)
+        return _Bucket(self.literal, self.templated.set(r.group, _inserted(self.templated.get(r.group), r)))
+
+    def without_route(self, r: MockRecord) -> Optional["_Bucket"]:
+        literal, templated = self.literal, self.templated
+        if r.literal:
+            uri = r.uri
+            rest = tuple(x for x in literal.get(uri, ()) if x is not r)
+            literal = literal.set(uri, RouteGroup(rest)) if rest else literal.delete(uri)
+        else:
+            rest = tuple(x for x in templated.get(r.group, ()) if x is not r)
+            templated = templated.set(r.group, RouteGroup(rest)) if rest else templated.delete(r.group)
+        if not literal and not templated: return None
+        return _Bucket(literal, templated)
+
+class _PrefixNode:
+    __slots__ = ("children", "scenarios")
+
+    def __init__(self):
+        self.children: Dict[str, _PrefixNode] = {}
+        self.scenarios: List[Scenario] = []
+
+def _build_trie(scenarios: Iterable[Scenario]) -> _PrefixNode:
+    root = _PrefixNode()
+    for s in scenarios:
+        node = root
+        for seg in _basepath_segments(s.basepath):
+            node = node.children.setdefault(seg, _PrefixNode())
+        node.scenarios.append(s)
+        node.scenarios.sort(key=lambda x: len(x.basepath), reverse=True)
+    return root
+
+class RouteIndex:
+    """Snapshot imutável e versionado da tabela de roteamento.
+
+    Prefixos de basepath ficam numa trie por segmento e os mocks em buckets por (cenário, método).
+    Índices secundários (cenário → ids e (cenário, MÉTODO, uri) → ids) mantêm CRUD, checagem de
+    duplicidade, renomeação e exclusão em cascata proporcionais só aos mocks afetados.
+    As operações `with_*`/`without_*` devolvem um novo snapshot que compartilha tudo o que não mudou,
+    então leitores usam uma instância sem lock enquanto escritores montam e publicam a próxima.
+    """
+    __slots__ = ("version", "_scenarios", "_trie", "_routes", "_buckets", "_by_scenario", "_by_key", "_seq")
+
+    def __init__(self, version: int = 0, scenarios: Optional[Dict[str, Scenario]] = None, trie: Optional[_PrefixNode] = None,
+                 routes: CowMap = EMPTY_MAP, buckets: Optional[Dict[Tuple[str, str], _Bucket]] = None,
+                 by_scenario: Optional[Dict[str, CowMap]] = None, by_key: CowMap = EMPTY_MAP, seq: int = 0):
+        self.version = version
+        self._scenarios = scenarios if scenarios is not None else {}
+        self._trie = trie if trie is not None else _build_trie(self._scenarios.values())
+        self._routes = routes
+        self._buckets = buckets if buckets is not None else {}
+        self._by_scenario = by_scenario if by_scenario is not None else {}
+        self._by_key = by_key
+        self._seq = seq
+
+    def _evolve(self, **kw) -> "RouteIndex":
+        fields = dict(version=self.version, scenarios=self._scenarios, trie=self._trie, routes=self._routes, buckets=self._buckets,
+                      by_scenario=self._by_scenario, by_key=self._by_key, seq=self._seq)
+        fields.update(kw)
+        return RouteIndex(**fields)
+
+    def published(self, version: int) -> "RouteIndex":
+        return self._evolve(version=version)
+
+    # ---- leitura ----
+    def scenario(self, basepath: str) -> Optional[Scenario]:
+        return self._scenarios.get(basepath)
+
+    def scenarios(self) -> List[Scenario]:
+        return list(self._scenarios.values())
+
+    def compress_for(self, mock: Mock) -> bool:
+        if mock.compress is not None: return mock.compress
+        s = self._scenarios.get(mock.scenario_basepath)
+        return bool(s and s.compress)
+
+    def record(self, mock_id: str) -> Optional[MockRecord]:
+        return self._routes.get(mock_id)
+
+    def mock(self, mock_id: str) -> Optional[Mock]:
+        r = self._routes.get(mock_id)
+        return r.model() if r is not None else None
+
+    def records(self) -> List[MockRecord]:
+        return sorted(self._routes.values(), key=lambda r: r.seq)
+
+    def mocks(self) -> List[Mock]:
+        return records_models(self.records())
+
+    def iter_scenario_records(self, basepath: str, ordered: bool = False) -> Iterator[MockRecord]:
+        records = (self._routes.get(mock_id) for mock_id in self._by_scenario.get(basepath, EMPTY_MAP).keys())
+        return iter(sorted(records, key=lambda r: r.seq)) if ordered else records
+
+    def iter_scenario_mocks(self, basepath: str, ordered: bool = False) -> Iterator[Mock]:
+        return (r.model() for r in self.iter_scenario_records(basepath, ordered))
+
+    def scenario_revision(self, basepath: str) -> CowMap:
+        """Token opaco que muda (identidade) sempre que algum mock do cenário é escrito."""
+        return self._by_scenario.get(basepath, EMPTY_MAP)
+
+    def count_scenario_mocks(self, basepath: str) -> int:
+        return len(self._by_scenario.get(basepath, EMPTY_MAP))
+
+    def mock_ids_for(self, basepath: str, method: str, uri: str) -> Tuple[str, ...]:
+        """Ids dos mocks com a chave (cenário, MÉTODO, uri); normalmente zero ou um."""
+        return self._by_key.get((basepath, method.upper(), uri), ())
+
+    def match_scenario(self, path: str) -> Optional[Scenario]:
+        stack, node = [self._trie], self._trie
+        for seg in path.split("/")[1:]:
+            node = node.children.get(seg)
+            if node is None: break
+            stack.append(node)
+        for node in reversed(stack):
+            for s in node.scenarios:
+                if s.enabled and basepath_matches(s.basepath, path): return s
+        return None
+
+    def candidate_groups(self, basepath: str, method: str, sub: str) -> List[RouteGroup]:
+        """Grupos de rotas que podem casar com `sub` (URI literal, primeiro segmento e genéricos)."""
+        b = self._buckets.get((basepath, method.upper()))
+        if b is None: return []
+        groups = []
+        lit = b.literal.get(sub)
+        if lit: groups.append(lit)
+        if b.templated:
+            seg = first_segment(sub)
+            grouped = b.templated.get(seg) if seg is not None else None
+            if grouped: groups.append(grouped)
+            anywhere = b.templated.get(None)
+            if anywhere: groups.append(anywhere)
+        return groups
+
+    def candidates(self, basepath: str, method: str, sub: str) -> Iterator[Tuple[MockRecord, Dict[str, Any]]]:
+        """Rotas que casam com `sub`, na ordem de precedência (score desc, ordem de criação)."""
+        return iter_candidates(self.candidate_groups(basepath, method, sub), sub)
+
+    def changes_since(self, old: "RouteIndex") -> Tuple[Dict[str, Optional[Scenario]], Dict[str, Optional[MockRecord]]]:
+        """Cenários (por basepath) e registros (por id) que mudaram desde `old`; None = removido."""
+        scenarios = {bp: s for bp, s in self._scenarios.items() if old._scenarios.get(bp) is not s}
+        scenarios.update((bp, None) for bp in old._scenarios if bp not in self._scenarios)
+        return scenarios, {mock_id: self._routes.get(mock_id) for mock_id in self._routes.changed_keys(old._routes)}
+
+    # ---- escrita (copy-on-write) ----
+    def with_scenario(self, scenario: Scenario, replaces: Optional[str] = None) -> "RouteIndex":
+        scenarios = dict(self._scenarios)
+        if replaces is not None: scenarios.pop(replaces, None)
+        scenarios[scenario.basepath] = scenario
+        return self._evolve(scenarios=scenarios, trie=_build_trie(scenarios.values()))
+
+    def without_scenario(self, basepath: str) -> "RouteIndex":
+        if basepath not in self._scenarios: return self
+        scenarios = dict(self._scenarios); scenarios.pop(basepath)
+        return self._evolve(scenarios=scenarios, trie=_build_trie(scenarios.values()))
+
+    def with_mock(self, mock: Mock, doc: Optional[bytes] = None) -> "RouteIndex":
+        prev = self._routes.get(mock.id)
+        seq, next_seq = (prev.seq, self._seq) if prev is not None else (self._seq, self._seq + 1)
+        r = MockRecord(mock, seq, self.compress_for(mock), doc)
+        buckets = dict(self._buckets)
+        if prev is not None: _unbucket(buckets, prev)
+        if r.enabled:
+            key = (r.basepath, r.method)
+            buckets[key] = buckets.get(key, _Bucket()).with_route(r)
+        by_scenario, by_key = dict(self._by_scenario), self._by_key
+        if prev is not None: by_key = _unindex(by_scenario, by_key, prev)
+        by_key = _index(by_scenario, by_key, r)
+        return self._evolve(routes=self._routes.set(r.id, r), buckets=buckets, by_scenario=by_scenario, by_key=by_key, seq=next_seq)
+
+    def without_mock(self, mock_id: str) -> "RouteIndex":
+        prev = self._routes.get(mock_id)
+        if prev is None: return self
+        buckets = dict(self._buckets); _unbucket(buckets, prev)
+        by_scenario = dict(self._by_scenario)
+        by_key = _unindex(by_scenario, self._by_key, prev)
+        return self._evolve(routes=self._routes.delete(mock_id), buckets=buckets, by_scenario=by_scenario, by_key=by_key)
+
+    def with_batch(self, scenarios: Iterable[Scenario], mocks: Iterable[Mock], docs: Optional[Dict[str, bytes]] = None) -> "RouteIndex":
+        """Aplica cenários e mocks (novos ou substitutos, por basepath/id) de uma vez.
+
+        Lotes grandes em relação ao índice são montados numa única reconstrução; lotes pequenos
+        seguem pelo caminho incremental de `with_mock`. `docs` (id -> JSON do mock) reaproveita
+        documentos já serializados.
+        """
+        scenarios, mocks = list(scenarios), list(mocks)
+        all_scenarios = dict(self._scenarios)
+        for s in scenarios: all_scenarios[s.basepath] = s
+        base = self._evolve(scenarios=all_scenarios, trie=_build_trie(all_scenarios.values()))
+        # cenários substituídos podem ter mudado `compress`: re-codifica os mocks que herdam
+        touched = {r.id: r.model() for s in scenarios if s.basepath in self._scenarios
+                   for r in self.iter_scenario_records(s.basepath) if r.compress is None}
+        touched.update((m.id, m) for m in mocks)
+        if len(touched) * 8 < len(self._routes):
+            idx = base
+            for m in touched.values(): idx = idx.with_mock(m, docs.get(m.id) if docs else None)
+            return idx
+        routes: Dict[str, MockRecord] = dict(self._routes.items())
+        seq, docs = self._seq, docs or {}
+        for m in touched.values():
+            prev = routes.get(m.id)
+            if prev is None: routes[m.id] = MockRecord(m, seq, base.compress_for(m), docs.get(m.id)); seq += 1
+            else: routes[m.id] = MockRecord(m, prev.seq, base.compress_for(m), docs.get(m.id))
+        return _rebuilt(base, routes, seq)
+
+    def with_docs(self, scenarios: Iterable[bytes], mocks: Iterable[bytes]) -> "RouteIndex":
+        """`with_batch` a partir dos documentos JSON (como guardados em `MockRecord.doc`), na ordem de criação."""
+        docs = list(mocks)
+        models = docs_models(docs)
+        return self.with_batch([Scenario.model_validate_json(d, context=TRUSTED) for d in scenarios], models,
+                               {m.id: d for m, d in zip(models, docs)})
+
+def iter_candidates(groups: List[RouteGroup], sub: str, body_keys: Optional[RequestBodyKeys] = None) -> Iterator[Tuple[MockRecord, Dict[str, Any]]]:
+    """Rotas dos grupos que casam com `sub`, em ordem de precedência; com `body_keys`, grupos
+    indexados por corpo só entregam as rotas exact cuja assinatura está entre as chaves."""
+    if not groups: return
+    lists = [g.select(body_keys) for g in groups]
+    it = lists[0] if len(lists) == 1 else heapq.merge(*lists, key=_route_key)
+    parts = None
+    for r in it:
+        if r.literal:
+            yield r, {}
+            continue
+        segments = r.segments
+        if segments is None:
+            mt = r.regex.match(sub)
+            if mt: yield r, mt.groupdict()
+            continue
+        if parts is None: parts = sub.split("/")
+        if len(parts) != segments.count or segments.pick(parts) != segments.literals: continue
+        params = segments.bind(parts)
+        if params is not None: yield r, params
+
+def _rebuilt(base: RouteIndex, routes: Dict[str, MockRecord], seq: int) -> RouteIndex:
+    literal: Dict[Tuple[str, str], Dict[str, List[MockRecord]]] = {}
+    templated: Dict[Tuple[str, str], Dict[Optional[str], List[MockRecord]]] = {}
+    by_scenario: Dict[str, List[Tuple[str, bool]]] = {}
+    by_key: Dict[Tuple[str, str, str], List[MockRecord]] = {}
+    for r in routes.values():
+        by_scenario.setdefault(r.basepath, []).append((r.id, True))
+        by_key.setdefault(r.key, []).append(r)
+        if not r.enabled: continue
+        bkey = (r.basepath, r.method)
+        if r.literal: literal.setdefault(bkey, {}).setdefault(r.uri, []).append(r)
+        else: templated.setdefault(bkey, {}).setdefault(r.group, []).append(r)
+    def frozen(groups: Dict[Any, List[MockRecord]]) -> CowMap:
+        return CowMap.from_items((k, RouteGroup(tuple(sorted(v, key=_route_key)))) for k, v in groups.items())
+    buckets = {k: _Bucket(frozen(literal.get(k, {})), frozen(templated.get(k, {}))) for k in set(literal) | set(templated)}
+    return base._evolve(
+        routes=CowMap.from_items(routes.items()), buckets=buckets,
+        by_scenario={bp: CowMap.from_items(ids) for bp, ids in by_scenario.items()},
+        by_key=CowMap.from_items((k, (v[0].id,) if len(v) == 1 else tuple(r.id for r in sorted(v, key=lambda r: r.seq))) for k, v in by_key.items()),
+        seq=seq,
+    )
+
+def _unbucket(buckets: Dict[Tuple[str, str], _Bucket], r: MockRecord):
+    if not r.enabled: return
+    key = (r.basepath, r.method)
+    b = buckets.get(key)
+    if b is None: return
+    b = b.without_route(r)
+    if b is None: buckets.pop(key, None)
+    else: buckets[key] = b
+
+def _index(by_scenario: Dict[str, CowMap], by_key: CowMap, r: MockRecord) -> CowMap:
+    by_scenario[r.basepath] = by_scenario.get(r.basepath, EMPTY_MAP).set(r.id, True)
+    return by_key.set(r.key, by_key.get(r.key, ()) + (r.id,))
+
+def _unindex(by_scenario: Dict[str, CowMap], by_key: CowMap, r: MockRecord) -> CowMap:
+    ids = by_scenario.get(r.basepath)
+    if ids is not None:
+        ids = ids.delete(r.id)
+        if ids: by_scenario[r.basepath] = ids
+        else: by_scenario.pop(r.basepath, None)
+    rest = tuple(x for x in by_key.get(r.key, ()) if x != r.id)
+    return by_key.set(r.key, rest) if rest else by_key.delete(r.key)
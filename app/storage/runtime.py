@@ -0,0 +1,128 @@
+from __future__ import annotations
+import sys
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pydantic import TypeAdapter
+from ..models import TRUSTED, Mock, MockResponse, pattern_to_regex_with_params, specificity_score
+from ..core.body_match import compile_body_match
+from ..core.body_source import compile_source
+from ..core.chaos import ChaosPlan, compile_chaos
+from ..core.predicates import VariantPlan
+from ..core.responses import EncodedResponse
+
+def is_literal_uri(uri: str) -> bool:
+    if uri.startswith("^") and uri.endswith("$"): return False
+    return "{" not in uri and "*" not in uri
+
+def first_segment(path: str) -> Optional[str]:
+    if not path.startswith("/"): return None
+    return path[1:].split("/", 1)[0]
+
+def template_group(uri: str) -> Optional[str]:
+    # Chave do primeiro segmento literal; None = precisa ser testado contra qualquer path
+    if uri.startswith("^") and uri.endswith("$"): return None
+    seg = first_segment(uri)
+    if seg is None or "{" in seg or "*" in seg: return None
+    return seg
+
+class SegmentTemplate:
+    """URI só com segmentos literais e "{param}" inteiros, casada por comparação de segmentos (sem regex).
+
+    `pick` extrai de uma vez (itemgetter) os segmentos do caminho nas posições literais, comparados
+    com `literals`; os parâmetros só são lidos (`bind`) quando os literais casam.
+    """
+    __slots__ = ("count", "pick", "literals", "names", "values")
+
+    def __init__(self, segments: List[Optional[str]], params: Tuple[Tuple[int, str], ...]):
+        positions = [i for i, seg in enumerate(segments) if seg is not None]
+        self.count = len(segments)
+        self.pick = itemgetter(*positions)
+        # itemgetter de uma posição devolve o item, de várias uma tupla
+        self.literals = segments[positions[0]] if len(positions) == 1 else tuple(segments[i] for i in positions)
+        self.names = tuple(name for _, name in params)
+        self.values = itemgetter(*(i for i, _ in params))
+
+    def bind(self, parts: List[str]) -> Optional[Dict[str, str]]:
+        """Parâmetros do caminho já casado nos literais; None se algum segmento de parâmetro é vazio (como o [^/]+ da regex)."""
+        values = self.values(parts)
+        if len(self.names) == 1: return {self.names[0]: values} if values else None
+        return None if "" in values else dict(zip(self.names, values))
+
+def segment_template(uri: str) -> Optional[SegmentTemplate]:
+    """Template de segmentos inteiros para `uri`; None para curinga, "{param}" no meio de um segmento ou regex."""
+    if (uri.startswith("^") and uri.endswith("$")) or "*" in uri: return None
+    segments: List[Optional[str]] = []; params: List[Tuple[int, str]] = []
+    for i, seg in enumerate(uri.split("/")):
+        if seg.startswith("{") and seg.endswith("}") and seg.count("{") == 1 and seg.count("}") == 1:
+            segments.append(None); params.append((i, seg[1:-1] or f"p{len(params)}"))
+        elif "{" in seg or "}" in seg: return None
+        else: segments.append(seg)
+    if not params or len(segments) == len(params) or len({name for _, name in params}) != len(params): return None
+    return SegmentTemplate(segments, tuple(params))
+
+_NO_VARIANTS = VariantPlan(None)  # compartilhado pelos mocks sem variantes (imutável)
+_MOCK_LIST = TypeAdapter(List[Mock])
+
+def _encode(resp: MockResponse, compress: bool, chaos: Optional[ChaosPlan]) -> EncodedResponse:
+    return EncodedResponse(resp, compress, chaos, compile_source(resp.body_source))
+
+def _pairs(d, lower: bool = False) -> Optional[Tuple[Tuple[str, str], ...]]:
+    if not d: return None
+    return tuple((sys.intern(k.lower() if lower else k), v) for k, v in d.items())
+
+class MockRecord:
+    """Representação de runtime de um mock: só o que o match e a resposta usam, montada na escrita.
+
+    Método, basepath e nomes de header/query são internados; o match de corpo e as respostas
+    (padrão e variantes, com o plano de chaos de cada uma) já vêm compilados/codificados. O modelo Pydantic completo fica serializado em `doc` e só é reconstruído na
+    borda da API administrativa (`model()`).
+    """
+    __slots__ = ("id", "basepath", "method", "uri", "enabled", "priority", "compress", "query", "headers", "body_sig", "body_test",
+                 "plan", "response", "doc", "literal", "segments", "regex", "group", "score", "seq")
+
+    def __init__(self, mock: Mock, seq: int, compress: bool = False, doc: Optional[bytes] = None):
+        req = mock.request
+        self.id = mock.id
+        self.basepath = sys.intern(mock.scenario_basepath)
+        self.method = sys.intern(req.method.upper())
+        self.uri = req.uri
+        self.enabled = mock.enabled
+        self.priority = mock.priority
+        self.compress = mock.compress
+        self.query = _pairs(req.query)
+        self.headers = _pairs(req.headers, lower=True)
+        # body_sig: modo + corpo canônico (None = não olha o corpo); body_test None = exact (compara body_sig)
+        self.body_sig, self.body_test = compile_body_match(req.body_match, req.body) if req.body is not None else (None, None)
+        # variantes sem `chaos` herdam o do mock
+        chaos = compile_chaos(mock.chaos)
+        self.plan = VariantPlan(mock.variants, encode=lambda v: _encode(v.response, compress, chaos if v.chaos is None else compile_chaos(v.chaos))) \
+            if mock.variants else _NO_VARIANTS
+        self.response = _encode(mock.response, compress, chaos)
+        # `doc` já serializado (carga de store persistido/Redis) evita re-serializar o modelo
+        self.doc = doc if doc is not None else mock.model_dump_json(by_alias=True).encode("utf-8")
+        self.literal = is_literal_uri(req.uri)
+        # templates de segmentos inteiros casam sem regex (e não pagam a compilação na carga); os demais usam `regex`
+        self.segments = None if self.literal else segment_template(req.uri)
+        self.regex = None if self.literal or self.segments is not None else pattern_to_regex_with_params(req.uri)[0]
+        self.group = None if self.literal else template_group(req.uri)
+        self.score = mock.priority * 100000 + specificity_score(req.uri)
+        self.seq = seq
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.basepath, self.method, self.uri)
+
+    def model(self) -> Mock:
+        """Cópia Pydantic do mock (para a API administrativa); alterá-la não afeta o snapshot."""
+        return Mock.model_validate_json(self.doc, context=TRUSTED)
+
+def records_json(records: Iterable[MockRecord]) -> bytes:
+    """Array JSON com os documentos dos registros, sem passar pelos modelos."""
+    return b"[" + b",".join(r.doc for r in records) + b"]"
+
+def records_models(records: Iterable[MockRecord]) -> List[Mock]:
+    return docs_models(r.doc for r in records)
+
+def docs_models(docs: Iterable[bytes]) -> List[Mock]:
+    # uma única validação para o array inteiro sai bem mais barata que uma por mock
+    return _MOCK_LIST.validate_json(b"[" + b",".join(docs) + b"]", context=TRUSTED)
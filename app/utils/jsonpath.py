@@ -1,26 +1,142 @@
-from typing import Any
-def jsonpath_get(expr: str, obj: Any) -> Any:
-    if not isinstance(expr, str) or not expr.startswith('$.'): return None
-    parts = expr[2:].split('.'); cur = obj
-    for part in parts:
-        if '[' in part:
-            name, rest = part.split('[', 1)
-            if name:
-                if not isinstance(cur, dict): return None
-                cur = cur.get(name)
-            while rest:
-                if not rest.startswith(']'):
-                    idx_str, rest = rest.split(']', 1)
-                    try: idx = int(idx_str)
-                    except: return None
-                    if not isinstance(cur, list) or idx >= len(cur): return None
-                    cur = cur[idx]
-                    if rest.startswith('['): rest = rest[1:]
-                    else: break
-                else:
-                    rest = rest[1:]
+"""JSONPath compilado.
+
+Gramática suportada (subconjunto):
+  $                     raiz
+  .nome  ['nome']       chave (a forma com aspas aceita '.', '[', espaços etc.)
+  [n]                   índice, inclusive negativo ([-1] = último)
+  .*  [*]               todos os filhos (valores de objeto ou itens de lista)
+  [?(@.campo)]          filhos que possuem `campo`
+  [?(@.campo op valor)] filhos cujo `campo` satisfaz op (==, !=, <, <=, >, >=);
+                        valor: 'texto', "texto", número, true, false ou null
+
+Caminhos sem curinga/filtro devolvem um único valor (ou None); com curinga/filtro
+devolvem a lista de valores encontrados (ou None se nenhum).
+"""
+import json, operator, re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+Accessor = Callable[[Any], Any]
+Step = Tuple[str, Any]
+
+_FILTER_RE = re.compile(r"^@(?P<path>[^\s=!<>]*)\s*(?:(?P<op>==|!=|<=|>=|<|>)\s*(?P<lit>.+?))?\s*$")
+_OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+def _none(obj: Any) -> Any:
+    return None
+
+def _literal(text: str) -> Any:
+    if len(text) >= 2 and text[0] == text[-1] == "'": return text[1:-1]
+    try: return json.loads(text)
+    except ValueError: raise ValueError(f"Invalid filter literal: {text}")
+
+def _quoted(expr: str, i: int) -> Tuple[str, int]:
+    # expr[i] é a aspa de abertura; devolve (texto, índice após a aspa de fechamento)
+    q, out, i = expr[i], [], i + 1
+    while i < len(expr):
+        c = expr[i]
+        if c == "\\" and i + 1 < len(expr): out.append(expr[i + 1]); i += 2; continue
+        if c == q: return "".join(out), i + 1
+        out.append(c); i += 1
+    raise ValueError("Unterminated quoted key")
+
+def _filter(body: str) -> Step:
+    m = _FILTER_RE.match(body.strip())
+    if not m: raise ValueError(f"Unsupported filter: {body}")
+    get = _compile("$" + m.group("path")) if m.group("path") else (lambda x: x)
+    if not m.group("op"): return ("filter", lambda node: get(node) is not None)
+    op, lit = _OPS[m.group("op")], _literal(m.group("lit"))
+
+    def test(node: Any) -> bool:
+        v = get(node)
+        if v is None and lit is not None: return False
+        try: return bool(op(v, lit))
+        except TypeError: return False
+    return ("filter", test)
+
+def parse_jsonpath(expr: str) -> List[Step]:
+    """Tokeniza a expressão em passos; ValueError se ela não for suportada."""
+    if not isinstance(expr, str) or not expr.startswith("$"): raise ValueError(f"JSONPath must start with '$': {expr!r}")
+    steps: List[Step] = []
+    i, n = 1, len(expr)
+    while i < n:
+        c = expr[i]
+        if c == ".":
+            i += 1
+            if i < n and expr[i] == "[": continue
+            if i < n and expr[i] == "*": steps.append(("wild", None)); i += 1; continue
+            j = i
+            while j < n and expr[j] not in ".[": j += 1
+            if j == i: raise ValueError(f"Empty key in JSONPath: {expr!r}")
+            steps.append(("key", expr[i:j])); i = j
+        elif c == "[":
+            i += 1
+            if i < n and expr[i] in "'\"":
+                key, i = _quoted(expr, i)
+                steps.append(("key", key))
+            elif expr.startswith("*", i):
+                steps.append(("wild", None)); i += 1
+            elif expr.startswith("?(", i):
+                j = expr.find(")]", i)
+                if j == -1: raise ValueError(f"Unterminated filter in JSONPath: {expr!r}")
+                steps.append(_filter(expr[i + 2:j])); i = j + 1
+            else:
+                j = expr.find("]", i)
+                if j == -1: raise ValueError(f"Unterminated index in JSONPath: {expr!r}")
+                steps.append(("idx", int(expr[i:j].strip()))); i = j
+            if i >= n or expr[i] != "]": raise ValueError(f"Expected ']' in JSONPath: {expr!r}")
+            i += 1
         else:
-            if not isinstance(cur, dict): return None
-            cur = cur.get(part)
-        if cur is None: return None
-    return cur
+            raise ValueError(f"Unexpected {c!r} in JSONPath: {expr!r}")
+    return steps
+
+def _children(node: Any) -> List[Any]:
+    if isinstance(node, dict): return list(node.values())
+    if isinstance(node, list): return node
+    return []
+
+def _build(steps: List[Step]) -> Accessor:
+    if not any(kind in ("wild", "filter") for kind, _ in steps):
+        def get(obj: Any) -> Any:
+            cur = obj
+            for kind, arg in steps:
+                if kind == "key":
+                    if not isinstance(cur, dict): return None
+                    cur = cur.get(arg)
+                else:
+                    if not isinstance(cur, list) or not -len(cur) <= arg < len(cur): return None
+                    cur = cur[arg]
+                if cur is None: return None
+            return cur
+        return get
+
+    def get_all(obj: Any) -> Any:
+        cur = [obj]
+        for kind, arg in steps:
+            nxt = []
+            for node in cur:
+                if kind == "key":
+                    if isinstance(node, dict) and node.get(arg) is not None: nxt.append(node[arg])
+                elif kind == "idx":
+                    if isinstance(node, list) and -len(node) <= arg < len(node) and node[arg] is not None: nxt.append(node[arg])
+                elif kind == "wild":
+                    nxt.extend(x for x in _children(node) if x is not None)
+                else:
+                    nxt.extend(x for x in _children(node) if arg(x))
+            if not nxt: return None
+            cur = nxt
+        return cur
+    return get_all
+
+def _compile(expr: str) -> Accessor:
+    return _build(parse_jsonpath(expr))
+
+@lru_cache(maxsize=4096)
+def compile_jsonpath(expr: str) -> Accessor:
+    """Acessor reutilizável para a expressão (cache LRU por string); expressões inválidas devolvem sempre None."""
+    try: return _compile(expr)
+    except ValueError: return _none
+
+def jsonpath_get(expr: str, obj: Any) -> Any:
+    if not isinstance(expr, str): return None
+    return compile_jsonpath(expr)(obj)
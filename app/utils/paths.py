@@ -0,0 +1,9 @@
+from pathlib import Path
+
+def resolve_under(base: str, relative: str) -> Path:
+    """`relative` resolvido dentro de `base`; ValueError se for absoluto ou escapar do diretório (`..`, symlink)."""
+    if not relative or Path(relative).is_absolute(): raise ValueError(f"Path must be relative to the files directory: {relative!r}")
+    root = Path(base).resolve()
+    path = (root / relative).resolve()
+    if not path.is_relative_to(root): raise ValueError(f"Path escapes the files directory: {relative!r}")
+    return path
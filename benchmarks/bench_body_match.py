@@ -0,0 +1,57 @@
+"""Match por corpo com muitos mocks POST no mesmo endpoint (suítes de contrato).
+
+Compara a busca por hash (padrão), a varredura linear comparando assinaturas (índice desligado) e a
+comparação anterior (igualdade profunda do dict esperado contra o recebido, candidato a candidato).
+Uso: python -m benchmarks.bench_body_match [--mocks 100,500] [--lookups 20000]
+"""
+from __future__ import annotations
+import argparse, asyncio, random, time
+from app.core.bulk import BulkItem
+from app.core.request_context import RequestContext
+from app.models import MockCreate, ScenarioCreate
+from app.storage import route_index
+from app.storage.memory import InMemoryStore, match_request
+
+def body_for(i: int) -> dict:
+    return {"operation": "transfer", "account": {"id": f"acc-{i}", "branch": "0001"}, "amount": 100 + i, "tags": ["a", "b"]}
+
+async def seed(n: int) -> InMemoryStore:
+    store = InMemoryStore()
+    items = [BulkItem(0, ScenarioCreate(basepath="/contract"))]
+    items += [BulkItem(0, MockCreate.model_validate({"scenario_basepath": "/contract", "request": {"method": "POST", "uri": "/transfers", "body": body_for(i)},
+                                                     "response": {"status_code": 201, "body": {"id": i}}})) for i in range(n)]
+    await store.import_items(items)
+    return store
+
+async def run(label: str, snap, bodies, legacy_specs=None) -> float:
+    t0 = time.perf_counter()
+    for body in bodies:
+        if legacy_specs is not None:
+            # como antes: candidatos em ordem, igualdade profunda contra cada corpo esperado
+            assert next((spec for spec in legacy_specs if isinstance(body, (dict, list)) and body == spec), None) is not None
+            continue
+        ctx = RequestContext.from_parts("POST", "/contract/transfers", {}, {"content-type": "application/json"}, body)
+        assert await match_request(snap, ctx) is not None
+    dt = (time.perf_counter() - t0) / len(bodies)
+    print(f"  {label:<34} {dt * 1e6:9.2f} us/req")
+    return dt
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mocks", default="100,500")
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+    for n in (int(x) for x in args.mocks.split(",")):
+        store = await seed(n)
+        rnd = random.Random(n)
+        bodies = [body_for(rnd.randrange(n)) for _ in range(args.lookups)]
+        print(f"{n} mocks no mesmo endpoint")
+        await run("hash lookup (índice)", store.snapshot(), bodies)
+        saved = route_index.BODY_INDEX_MIN; route_index.BODY_INDEX_MIN = 1 << 30
+        try: await run("varredura linear de assinaturas", (await seed(n)).snapshot(), bodies)
+        finally: route_index.BODY_INDEX_MIN = saved
+        await run("igualdade profunda (anterior)*", None, bodies, legacy_specs=[body_for(i) for i in range(n)])
+    print("* só o laço de comparação, sem roteamento nem contexto da requisição")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Carga de uma suíte de mocks: um POST /api/mocks por mock x um único POST /api/bulk/import (NDJSON).
+
+Roda a app ASGI em processo (sem rede), cada modo num store vazio, e mede também o GET /api/bulk/export.
+Uso: python -m benchmarks.bench_bulk [--mocks 20000] [--scenarios 50]
+"""
+from __future__ import annotations
+import argparse, asyncio, json, time
+import httpx
+import app.main as main_module
+from app.main import app
+from app.di import get_store
+from app.storage.memory import InMemoryStore
+
+def suite(n: int, scenarios: int):
+    scs = [{"kind": "scenario", "basepath": f"/svc{s}/v1"} for s in range(scenarios)]
+    mocks = [{"kind": "mock", "scenario_basepath": f"/svc{i % scenarios}/v1",
+              "request": {"method": "GET", "uri": f"/res{i}/{{id}}" if i % 4 == 0 else f"/res{i}/items"},
+              "response": {"body": {"i": i}}} for i in range(n)]
+    return scs, mocks
+
+def fresh_store() -> InMemoryStore:
+    store = main_module.store_instance = InMemoryStore()
+    app.dependency_overrides[get_store] = lambda: store
+    return store
+
+async def one_by_one(client: httpx.AsyncClient, scs, mocks) -> float:
+    t0 = time.perf_counter()
+    for s in scs: (await client.post("/api/scenarios", json=s)).raise_for_status()
+    for m in mocks: (await client.post("/api/mocks", json=m)).raise_for_status()
+    return time.perf_counter() - t0
+
+async def bulk(client: httpx.AsyncClient, scs, mocks) -> float:
+    async def body():
+        batch = []
+        for rec in scs + mocks:
+            batch.append(json.dumps(rec))
+            if len(batch) == 500: yield ("\n".join(batch) + "\n").encode(); batch = []
+        if batch: yield "\n".join(batch).encode()
+    t0 = time.perf_counter()
+    r = await client.post("/api/bulk/import", content=body(), headers={"Content-Type": "application/x-ndjson"})
+    dt = time.perf_counter() - t0
+    assert r.status_code == 200 and r.json()["mocks_created"] == len(mocks), r.text[:500]
+    return dt
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mocks", type=int, default=20000)
+    ap.add_argument("--scenarios", type=int, default=50)
+    args = ap.parse_args()
+    scs, mocks = suite(args.mocks, args.scenarios)
+    n = len(scs) + len(mocks)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        fresh_store(); dt = await one_by_one(client, scs, mocks)
+        print(f"{'one POST per item':<22} {dt:8.2f} s {n / dt:10.0f} items/s")
+        store = fresh_store(); dt = await bulk(client, scs, mocks)
+        print(f"{'bulk import (NDJSON)':<22} {dt:8.2f} s {n / dt:10.0f} items/s")
+        t0 = time.perf_counter(); size = 0
+        async with client.stream("GET", "/api/bulk/export") as r:
+            async for chunk in r.aiter_bytes(): size += len(chunk)
+        dt = time.perf_counter() - t0
+        print(f"{'bulk export':<22} {dt:8.2f} s {n / dt:10.0f} items/s {size / 2**20:8.1f} MiB")
+        assert len(store.snapshot().mocks()) == len(mocks)
+
+if __name__ == "__main__":
+    asyncio.run(main())
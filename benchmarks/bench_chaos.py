@@ -0,0 +1,53 @@
+"""Milhares de respostas atrasadas (e com banda limitada) ao mesmo tempo, direto na app ASGI.
+
+Mede o tempo total contra o mesmo lote sem chaos + a latência configurada (quanto mais perto, menos
+as respostas esperam umas pelas outras) e a memória alocada no pico por resposta em andamento.
+Uso: python -m benchmarks.bench_chaos [--concurrency 5000] [--delay-ms 200] [--bandwidth 20000]
+"""
+from __future__ import annotations
+import argparse, asyncio, time, tracemalloc
+from app.main import app, store_instance as store
+from app.models import ChaosProfile, LatencySpec, MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+
+def scope_for(path: str) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+
+async def call(path: str, statuses: list):
+    async def receive(): return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start": statuses.append(message["status"])
+    await app(scope_for(path), receive, send)
+
+async def run(label: str, path: str, n: int, expected: float):
+    statuses: list = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(call(path, statuses) for _ in range(n)))
+    dt = time.perf_counter() - t0
+    # memória numa segunda rodada (tracemalloc distorce o tempo)
+    tracemalloc.start()
+    await asyncio.gather(*(call(path, statuses) for _ in range(n)))
+    peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    assert statuses == [200] * 2 * n, set(statuses)
+    print(f"{label:<36} {n} respostas em {dt:6.2f} s (+{expected:.2f} s de chaos)  pico {peak / n / 1024:6.1f} KiB/resposta")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=5000)
+    ap.add_argument("--delay-ms", type=float, default=200)
+    ap.add_argument("--bandwidth", type=int, default=20000, help="bytes/s por resposta")
+    args = ap.parse_args()
+    body = {"data": "x" * 10_000}
+    await store.create_scenario(ScenarioCreate(basepath="/chaos"))
+    await store.create_mock(MockCreate(scenario_basepath="/chaos", request=MockRequestMatch(method="GET", uri="/plain"), response=MockResponse(body=body)))
+    await store.create_mock(MockCreate(scenario_basepath="/chaos", request=MockRequestMatch(method="GET", uri="/delay"), response=MockResponse(body=body),
+                                       chaos=ChaosProfile(latency=LatencySpec(ms=args.delay_ms))))
+    await store.create_mock(MockCreate(scenario_basepath="/chaos", request=MockRequestMatch(method="GET", uri="/throttle"), response=MockResponse(body=body),
+                                       chaos=ChaosProfile(bandwidth_bps=args.bandwidth)))
+    await run("sem chaos", "/chaos/plain", args.concurrency, 0)
+    await run(f"latência fixa {args.delay_ms:.0f} ms", "/chaos/delay", args.concurrency, args.delay_ms / 1000)
+    await run(f"banda {args.bandwidth} B/s (~10 KB)", "/chaos/throttle", args.concurrency, 10_011 / args.bandwidth)
+
+if __name__ == "__main__":
+    asyncio.run(main())
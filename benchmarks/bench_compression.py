@@ -0,0 +1,42 @@
+"""Compressão de respostas: sem compressão x gzip por requisição (GZipMiddleware) x pré-comprimido na escrita.
+
+Roda a app ASGI em processo (sem rede) e reporta requisições/s e bytes enviados por resposta.
+Uso: python -m benchmarks.bench_compression [--kb 200] [--requests 500]
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+import httpx
+from starlette.middleware.gzip import GZipMiddleware
+from app.main import app, store_instance as store
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from benchmarks.bench_response_encoding import make_payload
+
+async def seed(kb: int):
+    body = make_payload(kb)
+    await store.create_scenario(ScenarioCreate(basepath="/bench-plain"))
+    await store.create_scenario(ScenarioCreate(basepath="/bench-zip", compress=True))
+    for bp in ("/bench-plain", "/bench-zip"):
+        await store.create_mock(MockCreate(scenario_basepath=bp, request=MockRequestMatch(method="GET", uri="/catalog"), response=MockResponse(body=body)))
+
+async def run(label: str, asgi, path: str, n: int):
+    sent = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi), base_url="http://bench") as client:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            r = await client.get(path, headers={"Accept-Encoding": "gzip"})
+            sent += int(r.headers["content-length"])  # bytes no fio (antes da descompressão do cliente)
+        dt = time.perf_counter() - t0
+    print(f"{label:<34} {n / dt:10.0f} req/s {sent / n / 1024:10.1f} KB/resp")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kb", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=500)
+    args = ap.parse_args()
+    await seed(args.kb)
+    await run("uncompressed", app, "/bench-plain/catalog", args.requests)
+    await run("gzip per request (middleware)", GZipMiddleware(app, minimum_size=1024), "/bench-plain/catalog", args.requests)
+    await run("precompressed at write time", app, "/bench-zip/catalog", args.requests)
+
+if __name__ == "__main__":
+    asyncio.run(main())
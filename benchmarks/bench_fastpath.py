@@ -0,0 +1,50 @@
+"""Requisições/s do tráfego de mocks: app FastAPI completa x despacho ASGI direto (MockFastPath).
+
+Chama a app ASGI diretamente (scope/receive/send mínimos, sem servidor nem cliente HTTP), então o
+número reflete só o custo do lado do servidor. Rode sem FAST_PATH no ambiente, para que `app` seja a app completa.
+Uso: python -m benchmarks.bench_fastpath [--requests 20000] [--mocks 1000]
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+from app.main import app, store_instance as store
+from app.di import get_store
+from app.fastpath import MockFastPath
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+
+async def seed(n: int):
+    await store.create_scenario(ScenarioCreate(basepath="/bench"))
+    for i in range(n):
+        uri = f"/res{i}/{{id}}" if i % 2 else f"/res{i}"
+        await store.create_mock(MockCreate(scenario_basepath="/bench", request=MockRequestMatch(method="GET", uri=uri), response=MockResponse(body={"id": i, "ok": True})))
+
+def scope_for(path: str) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"bench"), (b"accept", b"*/*"), (b"user-agent", b"bench")],
+            "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+
+async def run(label: str, asgi, paths, n: int):
+    async def receive(): return {"type": "http.request", "body": b"", "more_body": False}
+    status = []
+    async def send(message):
+        if message["type"] == "http.response.start": status.append(message["status"])
+    t0 = time.perf_counter()
+    for i in range(n):
+        await asgi(scope_for(paths[i % len(paths)]), receive, send)
+    dt = time.perf_counter() - t0
+    assert set(status) == {200}, set(status)
+    print(f"{label:<24} {n / dt:10.0f} req/s {dt / n * 1e6:8.1f} us/req")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=20000)
+    ap.add_argument("--mocks", type=int, default=1000)
+    args = ap.parse_args()
+    await seed(args.mocks)
+    paths = [f"/bench/res{i}/42" if i % 2 else f"/bench/res{i}" for i in range(args.mocks)]
+    fast = MockFastPath(app, store=lambda: app.dependency_overrides.get(get_store, get_store)(), routes=lambda: app.routes)
+    await run("FastAPI catch-all", app, paths, args.requests)
+    await run("fast path (MockFastPath)", fast, paths, args.requests)
+
+if __name__ == "__main__":
+    asyncio.run(main())
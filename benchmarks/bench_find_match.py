@@ -0,0 +1,49 @@
+"""Latência de InMemoryStore.find_match em função do número de mocks.
+
+Uso: python -m benchmarks.bench_find_match [--sizes 10,100,1000,10000,100000] [--lookups 20000]
+"""
+from __future__ import annotations
+import argparse, asyncio, random, time
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.memory import InMemoryStore
+
+SCENARIOS = 50
+
+async def seed(n: int) -> InMemoryStore:
+    store = InMemoryStore()
+    for s in range(SCENARIOS):
+        await store.create_scenario(ScenarioCreate(basepath=f"/svc{s}/v1"))
+    for i in range(n):
+        uri = f"/res{i}/{{id}}" if i % 4 == 0 else f"/res{i}/items"
+        await store.create_mock(MockCreate(
+            scenario_basepath=f"/svc{i % SCENARIOS}/v1",
+            request=MockRequestMatch(method="GET", uri=uri),
+            response=MockResponse(body={"i": i}),
+        ))
+    return store
+
+async def run(n: int, lookups: int) -> tuple:
+    t0 = time.perf_counter(); store = await seed(n); seed_s = time.perf_counter() - t0
+    rnd = random.Random(n)
+    paths = []
+    for _ in range(lookups):
+        i = rnd.randrange(n)
+        paths.append(f"/svc{i % SCENARIOS}/v1/res{i}/" + ("42" if i % 4 == 0 else "items"))
+    t0 = time.perf_counter()
+    for p in paths:
+        assert await store.find_match(p, "GET", {}, {}, None) is not None
+    per_lookup = (time.perf_counter() - t0) / lookups
+    return seed_s, per_lookup
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,100,1000,10000,100000")
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+    print(f"{'mocks':>8} {'seed (s)':>10} {'find_match (us)':>16}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        seed_s, per = asyncio.run(run(n, args.lookups))
+        print(f"{n:>8} {seed_s:>10.2f} {per * 1e6:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Custo do journal de requisições por entrada e memória sob tráfego contínuo.
+
+Grava N entradas (bem acima da capacidade) para medir o custo de `record`, e compara a memória do
+journal com o buffer recém-cheio e depois de mais 10x a capacidade: o ring buffer não cresce.
+Uso: python -m benchmarks.bench_journal [--capacity 10000] [--requests 1000000] [--body-bytes 256]
+"""
+from __future__ import annotations
+import argparse, gc, time, tracemalloc
+from app.core.journal import RequestJournal
+from app.core.request_context import RequestContext
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--capacity", type=int, default=10000)
+    ap.add_argument("--requests", type=int, default=1_000_000)
+    ap.add_argument("--body-bytes", type=int, default=256)
+    args = ap.parse_args()
+    body = b'{"operation":"transfer","amount":100,"account":{"id":"acc-1","branch":"0001"},"note":"' + b"x" * 400 + b'"}'
+    ctxs = []
+    for i in range(1000):
+        ctx = RequestContext("POST", f"/svc/v1/transfers/{i}", [(b"content-type", b"application/json")], b"trace=1")
+        ctx._body_raw = body
+        ctxs.append(ctx)
+    for body_bytes in (0, args.body_bytes):
+        journal = RequestJournal(args.capacity, body_bytes)
+        t0 = time.perf_counter()
+        for i in range(args.requests): journal.record(ctxs[i % 1000], t0, "/svc/v1", "mock-id", 201)
+        dt = (time.perf_counter() - t0) / args.requests
+        # memória: journal novo sob tracemalloc, ao encher o buffer e depois de mais 10x a capacidade
+        gc.collect(); tracemalloc.start(); base = tracemalloc.get_traced_memory()[0]
+        journal = RequestJournal(args.capacity, body_bytes)
+        for i in range(args.capacity): journal.record(ctxs[i % 1000], t0, "/svc/v1", "mock-id", 201)
+        full = tracemalloc.get_traced_memory()[0] - base
+        for i in range(10 * args.capacity): journal.record(ctxs[i % 1000], t0, "/svc/v1", "mock-id", 201)
+        gc.collect(); after = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        print(f"corpo {body_bytes:>4} B/entrada: {dt * 1e6:5.2f} us/entrada ({1 / dt / 1000:5.0f} mil entradas/s); "
+              f"memória com o buffer cheio {full / 2**20:5.2f} MiB, após +{10 * args.capacity} entradas {after / 2**20:5.2f} MiB")
+
+if __name__ == "__main__":
+    main()
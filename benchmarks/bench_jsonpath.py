@@ -0,0 +1,73 @@
+"""JSONPath: tokenização por chamada (implementação anterior) x acessor compilado em cache.
+
+Uso: python -m benchmarks.bench_jsonpath [--depth 12] [--width 500] [--iterations 50000]
+"""
+from __future__ import annotations
+import argparse, time
+from app.utils.jsonpath import compile_jsonpath, jsonpath_get
+
+def legacy_jsonpath_get(expr, obj):
+    # Implementação anterior: re-tokeniza a expressão a cada chamada
+    if not isinstance(expr, str) or not expr.startswith('$.'): return None
+    parts = expr[2:].split('.'); cur = obj
+    for part in parts:
+        if '[' in part:
+            name, rest = part.split('[', 1)
+            if name:
+                if not isinstance(cur, dict): return None
+                cur = cur.get(name)
+            while rest:
+                if not rest.startswith(']'):
+                    idx_str, rest = rest.split(']', 1)
+                    try: idx = int(idx_str)
+                    except: return None
+                    if not isinstance(cur, list) or idx >= len(cur): return None
+                    cur = cur[idx]
+                    if rest.startswith('['): rest = rest[1:]
+                    else: break
+                else:
+                    rest = rest[1:]
+        else:
+            if not isinstance(cur, dict): return None
+            cur = cur.get(part)
+        if cur is None: return None
+    return cur
+
+def make_body(depth: int, width: int) -> dict:
+    leaf = {"items": [{"sku": f"SKU-{i}", "qty": i % 7, "tags": ["a", "b"]} for i in range(width)]}
+    node = leaf
+    for d in range(depth, 0, -1):
+        node = {**{f"k{i}": i for i in range(width)}, f"level{d}": node}
+    return node
+
+def bench(label: str, fn, iterations: int):
+    t0 = time.perf_counter()
+    for _ in range(iterations): fn()
+    per = (time.perf_counter() - t0) / iterations
+    print(f"{label:<44} {per * 1e6:10.2f} us")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--depth", type=int, default=12)
+    ap.add_argument("--width", type=int, default=500)
+    ap.add_argument("--iterations", type=int, default=50000)
+    args = ap.parse_args()
+    body = make_body(args.depth, args.width)
+    prefix = "$." + ".".join(f"level{d}" for d in range(1, args.depth + 1))
+    point = prefix + ".items[3].sku"
+    assert legacy_jsonpath_get(point, body) == jsonpath_get(point, body) == "SKU-3"
+    acc = compile_jsonpath(point)
+    print(f"depth={args.depth} width={args.width}")
+    bench("legacy (tokenize per call)", lambda: legacy_jsonpath_get(point, body), args.iterations)
+    bench("jsonpath_get (LRU-cached compile)", lambda: jsonpath_get(point, body), args.iterations)
+    bench("pre-compiled accessor", lambda: acc(body), args.iterations)
+    few = max(1, args.iterations // 50)
+    wild = compile_jsonpath(prefix + ".items[*].sku")
+    filt = compile_jsonpath(prefix + ".items[?(@.qty >= 5)].sku")
+    neg = compile_jsonpath(prefix + "['items'][-1].tags[-1]")
+    bench(f"wildcard over {args.width} items", lambda: wild(body), few)
+    bench(f"filter over {args.width} items", lambda: filt(body), few)
+    bench("quoted key + negative indices", lambda: neg(body), args.iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Validação RS256: varredura de todas as chaves do JWKS (anterior) x índice por kid x cache de tokens verificados.
+
+Usa chaves RSA geradas localmente e um JWKS pré-carregado no cache (sem rede).
+Uso: python -m benchmarks.bench_jwt [--keys 5] [--tokens 300] [--requests 20000]
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from app.core import jwt_validator
+from app.core.jwt_validator import jwks_cache, token_cache, validate_jwt
+
+ISSUER = "https://issuer.bench.local/realms/demo"
+
+def make_keys(n: int):
+    priv, jwks = [], {"keys": []}
+    for i in range(n):
+        k = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = k.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        pub = k.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        jwks["keys"].append({**jwk.construct(pub, "RS256").to_dict(), "kid": f"k{i}", "alg": "RS256", "use": "sig"})
+        priv.append(pem)
+    return priv, jwks
+
+def legacy_validate(token: str, jwks: dict):
+    # Laço anterior: tenta jwt.decode contra cada chave do JWKS, em sequência
+    last_err = None
+    for key in jwks.get("keys", []):
+        try:
+            payload = jwt.decode(token, key, algorithms=[key.get("alg", "RS256")], options={"verify_aud": False}, issuer=ISSUER)
+            return {"header": jwt.get_unverified_header(token), "payload": payload}
+        except Exception as e:
+            last_err = e
+    raise last_err
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=5)
+    ap.add_argument("--tokens", type=int, default=300)
+    ap.add_argument("--requests", type=int, default=20000)
+    args = ap.parse_args()
+    priv, jwks = make_keys(args.keys)
+    jwks_cache.set(ISSUER, jwks)
+    signer, kid = priv[-1], f"k{args.keys - 1}"
+    exp = int(time.time()) + 3600
+    tokens = [jwt.encode({"sub": f"user-{i}", "iss": ISSUER, "exp": exp}, signer, algorithm="RS256", headers={"kid": kid}) for i in range(args.tokens)]
+    slow = max(1, args.requests // 20)
+
+    t0 = time.perf_counter()
+    for i in range(slow): legacy_validate(tokens[i % len(tokens)], jwks)
+    legacy = slow / (time.perf_counter() - t0)
+
+    token_cache.maxsize = 0
+    t0 = time.perf_counter()
+    for i in range(slow): await validate_jwt(tokens[i % len(tokens)], ISSUER)
+    indexed = slow / (time.perf_counter() - t0)
+
+    token_cache.maxsize = jwt_validator.JWT_CACHE_SIZE; token_cache.clear(); token_cache.hits = token_cache.misses = 0
+    t0 = time.perf_counter()
+    for i in range(args.requests): await validate_jwt(tokens[i % len(tokens)], ISSUER)
+    cached = args.requests / (time.perf_counter() - t0)
+
+    print(f"keys in JWKS={args.keys} (token signed by the last one), distinct tokens={args.tokens}")
+    print(f"legacy scan of every key : {legacy:10.0f} validations/s")
+    print(f"kid-indexed, no cache    : {indexed:10.0f} validations/s")
+    print(f"kid-indexed + token cache: {cached:10.0f} validations/s   {token_cache.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
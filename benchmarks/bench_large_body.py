@@ -0,0 +1,72 @@
+"""Custo de POSTs com corpo grande (1–5 MB) quando o mock não olha o corpo x quando olha.
+
+Chama a app ASGI diretamente, com o corpo entregue em blocos de 64 KiB. "eager" reproduz o
+comportamento anterior (corpo lido e decodificado como JSON antes do match) na frente da mesma app.
+Uso: python -m benchmarks.bench_large_body [--requests 200] [--sizes 1,5]
+"""
+from __future__ import annotations
+import argparse, asyncio, json, time
+from app.main import app, store_instance as store
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+
+CHUNK = 64 * 1024
+
+async def seed(bp: str, body: bytes):
+    await store.create_scenario(ScenarioCreate(basepath=bp))
+    await store.create_mock(MockCreate(scenario_basepath=bp, request=MockRequestMatch(method="POST", uri="/upload"), response=MockResponse(status_code=201, body={"ok": True})))
+    await store.create_mock(MockCreate(scenario_basepath=bp, request=MockRequestMatch(method="POST", uri="/match", body=json.loads(body)), response=MockResponse(status_code=201, body={"ok": True})))
+
+def payload(mb: int) -> bytes:
+    item = {"id": 0, "name": "x" * 80, "tags": ["a", "b", "c"]}
+    n = mb * 1024 * 1024 // len(json.dumps(item))
+    return json.dumps({"kind": "bench", "items": [dict(item, id=i) for i in range(n)]}).encode()
+
+def scope_for(path: str, size: int) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"content-length", str(size).encode())],
+            "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+
+def eager(asgi):
+    # como antes: lê e decodifica o corpo inteiro antes de qualquer match
+    async def wrapper(scope, receive, send):
+        messages, chunks = [], []
+        while True:
+            message = await receive(); messages.append(message)
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False): break
+        json.loads(b"".join(chunks))
+        async def replay(): return messages.pop(0)
+        await asgi(scope, replay, send)
+    return wrapper
+
+async def run(label: str, asgi, path: str, body: bytes, n: int):
+    status = []
+    async def send(message):
+        if message["type"] == "http.response.start": status.append(message["status"])
+    t0 = time.perf_counter()
+    for _ in range(n):
+        chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+        async def receive():
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        await asgi(scope_for(path, len(body)), receive, send)
+    dt = time.perf_counter() - t0
+    assert set(status) == {201}, set(status)
+    print(f"{label:<34} {n / dt:8.1f} req/s {dt / n * 1e3:8.2f} ms/req")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--sizes", default="1,5", help="tamanhos do corpo em MB")
+    args = ap.parse_args()
+    for mb in (int(s) for s in args.sizes.split(",")):
+        body = payload(mb)
+        bp = f"/bench{mb}"; await seed(bp, body)
+        print(f"-- corpo {len(body) / 1e6:.1f} MB")
+        await run("eager, mock só por path", eager(app), bp + "/upload", body, args.requests)
+        await run("lazy, mock só por path", app, bp + "/upload", body, args.requests)
+        await run("lazy, mock com predicado de body", app, bp + "/match", body, args.requests)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""RSS durante muitos downloads grandes simultâneos de mocks com `body_source` (arquivo e gerador).
+
+Chama a app ASGI diretamente; o cliente descarta os bytes recebidos. A RSS do processo é amostrada
+durante os downloads: com streaming ela fica estável, em vez de crescer com tamanho x concorrência.
+Uso: python -m benchmarks.bench_large_download [--file-mb 256] [--records 1000000] [--concurrency 16]
+"""
+from __future__ import annotations
+import argparse, asyncio, os, resource, tempfile, time
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:  # fora do Linux: pico desde o início do processo
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def scope_for(path: str) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+
+async def download(app, path: str) -> int:
+    received = 0
+    async def receive(): return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body": received += len(message.get("body", b""))
+    await app(scope_for(path), receive, send)
+    return received
+
+async def run(app, label: str, path: str, n: int, expected: int):
+    samples, done = [rss_mb()], asyncio.Event()
+    async def sample():
+        while not done.is_set():
+            samples.append(rss_mb()); await asyncio.sleep(0.05)
+    sampler = asyncio.create_task(sample())
+    t0 = time.perf_counter()
+    sizes = await asyncio.gather(*(download(app, path) for _ in range(n)))
+    dt = time.perf_counter() - t0
+    done.set(); await sampler
+    assert sizes == [expected] * n, sizes[:3]
+    total = expected * n / 2**20
+    print(f"{label:<30} {n} x {expected / 2**20:6.1f} MiB em {dt:6.2f} s ({total / dt:7.1f} MiB/s)  "
+          f"RSS início {samples[0]:6.1f} MiB, pico {max(samples):6.1f} MiB (+{max(samples) - samples[0]:.1f})")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--file-mb", type=int, default=256)
+    ap.add_argument("--records", type=int, default=1_000_000)
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+    files = tempfile.mkdtemp()
+    os.environ["MOCK_FILES_DIR"] = files
+    with open(os.path.join(files, "export.bin"), "wb") as f: f.truncate(args.file_mb * 2**20)
+    from app.main import app, store_instance as store
+    from app.models import BodySource, MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+    await store.create_scenario(ScenarioCreate(basepath="/dl"))
+    await store.create_mock(MockCreate(scenario_basepath="/dl", request=MockRequestMatch(method="GET", uri="/file"),
+                                       response=MockResponse(media_type="application/octet-stream", body_source=BodySource(kind="file", path="export.bin"))))
+    record = {"id": "{{index}}", "sku": "SKU-{{index}}", "description": "Item exportado", "price": 19.9, "tags": ["a", "b"]}
+    await store.create_mock(MockCreate(scenario_basepath="/dl", request=MockRequestMatch(method="GET", uri="/records"),
+                                       response=MockResponse(media_type="application/x-ndjson", body_source=BodySource(kind="generator", count=args.records, record=record))))
+    gen_size = store.snapshot().records()[-1].response.source.size
+    await run(app, "arquivo (pread em fatias)", "/dl/file", args.concurrency, args.file_mb * 2**20)
+    await run(app, "gerador NDJSON", "/dl/records", args.concurrency, gen_size)
+    os.remove(os.path.join(files, "export.bin"))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Memória por mock (tracemalloc) e vazão do match + escolha de variante com o store carregado.
+
+Os mocks têm o formato típico de um cenário real: nome, descrição, tags, match por header e query,
+corpo de resposta com alguns campos e duas variantes condicionais.
+Uso: python -m benchmarks.bench_memory [--mocks 20000] [--lookups 50000]
+"""
+from __future__ import annotations
+import argparse, asyncio, gc, random, time, tracemalloc
+from app.core.bulk import BulkItem
+from app.models import MockCreate, ScenarioCreate
+from app.core.request_context import RequestContext
+from app.routers.catch_all import pick_response_for_mock
+from app.storage.memory import InMemoryStore, match_request
+
+SCENARIOS = 20
+
+def mock_for(i: int) -> MockCreate:
+    uri = f"/orders{i}/{{id}}" if i % 4 == 0 else f"/orders{i}/items"
+    body = {"id": i, "status": "PAID", "total": 199.9, "currency": "BRL", "customer": {"id": f"c{i}", "name": "Fulano de Tal"}, "items": [{"sku": "A1", "qty": 2}]}
+    return MockCreate.model_validate({
+        "scenario_basepath": f"/svc{i % SCENARIOS}/v1", "name": f"Pedido {i}", "description": "Consulta de pedido", "tags": ["orders", "v1"],
+        "request": {"method": "GET", "uri": uri, "headers": {"X-Tenant": "acme"}, "query": {"expand": "items"}},
+        "response": {"status_code": 200, "headers": {"X-Mock": "orders"}, "body": body},
+        "variants": [
+            {"when": [{"source": "header", "key": "X-Env", "op": "equals", "value": "hml"}], "response": {"status_code": 200, "body": dict(body, status="PENDING")}},
+            {"when": [{"source": "query", "key": "fail", "op": "in", "values": ["1", "true"]}], "response": {"status_code": 503, "body": {"error": "unavailable"}}},
+        ],
+    })
+
+async def seed(n: int) -> InMemoryStore:
+    store = InMemoryStore()
+    items = [BulkItem(0, ScenarioCreate(basepath=f"/svc{s}/v1")) for s in range(SCENARIOS)]
+    items += [BulkItem(0, mock_for(i)) for i in range(n)]
+    counts, errors = await store.import_items(items)
+    assert not errors, errors[:3]
+    return store
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mocks", type=int, default=20000)
+    ap.add_argument("--lookups", type=int, default=50000)
+    args = ap.parse_args()
+    n = args.mocks
+
+    gc.collect(); tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = await seed(n)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"mocks: {n}  memória: {(after - before) / 2**20:.1f} MiB  ({(after - before) / n:.0f} bytes/mock)")
+
+    rnd = random.Random(n)
+    requests = []
+    for _ in range(args.lookups):
+        i = rnd.randrange(n)
+        path = f"/svc{i % SCENARIOS}/v1/orders{i}/" + ("42" if i % 4 == 0 else "items")
+        env = rnd.choice((b"prd", b"hml"))
+        requests.append((path, [(b"host", b"bench"), (b"x-tenant", b"acme"), (b"x-env", env), (b"accept", b"*/*")]))
+    snap = store.snapshot(); jwt_ctx = {"header": {}, "payload": {}}
+    t0 = time.perf_counter()
+    for path, headers in requests:
+        ctx = RequestContext("GET", path, headers, b"expand=items")
+        mock, path_params, _ = await match_request(snap, ctx)
+        await pick_response_for_mock(mock, ctx, path_params=path_params, jwt_ctx=jwt_ctx)
+    dt = time.perf_counter() - t0
+    print(f"match + variante: {args.lookups / dt:.0f} req/s ({dt / args.lookups * 1e6:.2f} us/req)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
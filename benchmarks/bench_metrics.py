@@ -0,0 +1,36 @@
+"""Custo das métricas por requisição e da exposição em /metrics.
+
+Mede `served` (contador por mock + 3 observações de histograma) sobre N mocks distintos, o contador
+de 404 e o tempo para gerar o texto do Prometheus com as séries criadas.
+Uso: python -m benchmarks.bench_metrics [--mocks 1000] [--requests 1000000]
+"""
+from __future__ import annotations
+import argparse, time
+from app.core.metrics import MockMetrics
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mocks", type=int, default=1000)
+    ap.add_argument("--requests", type=int, default=1_000_000)
+    args = ap.parse_args()
+    m = MockMetrics(True, max_series=args.mocks)
+    keys = [(f"/svc{i % 20}", f"mock-{i:06d}") for i in range(args.mocks)]
+    n, k = args.requests, len(keys)
+    t = time.perf_counter()
+    for i in range(n): pass
+    loop = time.perf_counter() - t
+    t = time.perf_counter()
+    for i in range(n):
+        s, mid = keys[i % k]
+        m.served(s, mid, 0.0, 0.00003, None, 0.00005)
+    served = (time.perf_counter() - t - loop) / n
+    t = time.perf_counter()
+    for i in range(n): m.not_matched("/svc1", 0.0, 0.00002)
+    unmatched = (time.perf_counter() - t - loop) / n
+    t = time.perf_counter(); text = m.render(); render = time.perf_counter() - t
+    print(f"served (contador + histogramas): {served * 1e9:6.0f} ns/requisição")
+    print(f"404 (contador + histogramas)   : {unmatched * 1e9:6.0f} ns/requisição")
+    print(f"/metrics com {len(m.requests.values)} séries por mock: {render * 1e3:6.2f} ms, {len(text) / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
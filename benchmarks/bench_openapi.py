@@ -0,0 +1,46 @@
+"""OpenAPI por cenário: montagem a cada requisição (lista global de mocks) x documento em cache com ETag.
+
+Uso: python -m benchmarks.bench_openapi [--scenarios 300] [--mocks-per-scenario 30] [--requests 2000]
+"""
+from __future__ import annotations
+import argparse, asyncio, json, random, time
+from app.core.config import APP_TITLE, APP_VERSION
+from app.core.openapi_builder import ScenarioOpenAPICache, build_scenario_openapi
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.memory import InMemoryStore
+
+async def seed(scenarios: int, per: int) -> InMemoryStore:
+    store = InMemoryStore()
+    for s in range(scenarios):
+        await store.create_scenario(ScenarioCreate(basepath=f"/svc{s}"))
+        for i in range(per):
+            await store.create_mock(MockCreate(scenario_basepath=f"/svc{s}", tags=["t%d" % (i % 5)],
+                request=MockRequestMatch(method="GET", uri=f"/res{i}/{{id}}"), response=MockResponse(body={"id": i, "items": list(range(10))})))
+    return store
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", type=int, default=300)
+    ap.add_argument("--mocks-per-scenario", type=int, default=30)
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+    store = await seed(args.scenarios, args.mocks_per_scenario)
+    rnd = random.Random(0)
+    targets = [f"/svc{rnd.randrange(args.scenarios)}" for _ in range(args.requests)]
+
+    mocks = await store.list_mocks()  # fora do laço: mede só a varredura da lista global + montagem
+    t0 = time.perf_counter()
+    for bp in targets:
+        s = await store.get_scenario(bp)
+        json.dumps(build_scenario_openapi(s, mocks, APP_TITLE, APP_VERSION, "/docs/guide.html"), ensure_ascii=False).encode()
+    legacy = (time.perf_counter() - t0) / len(targets)
+
+    cache = ScenarioOpenAPICache(APP_TITLE, APP_VERSION, "/docs/guide.html")
+    t0 = time.perf_counter()
+    for bp in targets: cache.document(store.snapshot(), bp).body
+    cached = (time.perf_counter() - t0) / len(targets)
+    print(f"{'rebuild per request':<28} {legacy * 1e6:10.1f} us/req")
+    print(f"{'cached (incl. first builds)':<28} {cached * 1e6:10.1f} us/req  ({cache.builds} builds)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Seleção de variantes: avaliação interpretada (por requisição) x plano compilado na escrita.
+
+Uso: python -m benchmarks.bench_predicates [--variants 40] [--iterations 20000]
+"""
+from __future__ import annotations
+import argparse, re, time
+from app.core.predicates import VariantPlan, contains
+from app.models import ConditionPredicate, MockResponse, ResponseVariant
+from app.utils.jsonpath import jsonpath_get
+
+def eval_predicate(pred, *, headers, query, path_params, body, jwt_ctx) -> bool:
+    # Avaliador original (relê o predicado a cada requisição), mantido como referência
+    v = None
+    if pred.source == "header": v = headers.get((pred.key or "").lower())
+    elif pred.source == "query": v = query.get(pred.key or "")
+    elif pred.source == "path": v = path_params.get(pred.key or "")
+    elif pred.source == "body":
+        if pred.jsonpath: v = jsonpath_get(pred.jsonpath, body)
+        elif pred.key and isinstance(body, dict): v = body.get(pred.key)
+    elif pred.source == "jwt_header": v = (jwt_ctx.get("header") or {}).get(pred.key or "")
+    elif pred.source == "jwt_payload":
+        if pred.jsonpath: v = jsonpath_get(pred.jsonpath, jwt_ctx.get("payload"))
+        else: v = (jwt_ctx.get("payload") or {}).get(pred.key or "")
+    if pred.op == "equals": return v == pred.value
+    if pred.op == "regex":
+        try: return bool(re.search(str(pred.value or ""), str(v or "")))
+        except Exception: return False
+    if pred.op == "contains": return contains(v, pred.value)
+    if pred.op == "in":
+        if pred.values is None: return False
+        return str(v) in {str(x) for x in pred.values}
+    return False
+
+def interpreted_pick(variants, **ctx):
+    for v in variants:
+        if all(eval_predicate(p, **ctx) for p in v.when): return v.response
+    return None
+
+def make_variants(n: int):
+    out = []
+    for i in range(n):
+        when = [
+            ConditionPredicate(source="jwt_payload", jsonpath="$.realm_access.roles", op="contains", value=f"role-{i}"),
+            ConditionPredicate(source="header", key="X-Tenant", op="regex", value=rf"^tenant-({i}|{i + 1000})$"),
+            ConditionPredicate(source="query", key="plan", op="in", values=["gold", "silver", f"p{i}"]),
+            ConditionPredicate(source="body", jsonpath="$.order.items[0].sku", op="equals", value=f"SKU-{i}"),
+        ]
+        out.append(ResponseVariant(when=when, response=MockResponse(status_code=200, body={"variant": i})))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--variants", type=int, default=40)
+    ap.add_argument("--iterations", type=int, default=20000)
+    args = ap.parse_args()
+    variants = make_variants(args.variants)
+    last = args.variants - 1
+    ctx = dict(
+        headers={"x-tenant": f"tenant-{last}"}, query={"plan": "gold"}, path_params={},
+        body={"order": {"items": [{"sku": f"SKU-{last}"}]}},
+        jwt_ctx={"header": {}, "payload": {"realm_access": {"roles": [f"role-{last}"]}}},
+    )
+    t0 = time.perf_counter(); plan = VariantPlan(variants); compile_s = time.perf_counter() - t0
+    expected = interpreted_pick(variants, **ctx)
+    assert expected is not None and plan.pick(**ctx) is expected
+
+    t0 = time.perf_counter()
+    for _ in range(args.iterations): interpreted_pick(variants, **ctx)
+    interp = (time.perf_counter() - t0) / args.iterations
+    t0 = time.perf_counter()
+    for _ in range(args.iterations): plan.pick(**ctx)
+    compiled = (time.perf_counter() - t0) / args.iterations
+
+    print(f"variants={args.variants} predicates={4 * args.variants} (match on the last variant)")
+    print(f"compile once   : {compile_s * 1e6:10.1f} us")
+    print(f"interpreted    : {interp * 1e6:10.1f} us/request")
+    print(f"compiled       : {compiled * 1e6:10.1f} us/request  ({interp / compiled:.1f}x)")
+
+if __name__ == "__main__":
+    main()
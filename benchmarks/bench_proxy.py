@@ -0,0 +1,123 @@
+"""Custo do proxy para o upstream (`upstream_url`) comparado à chamada direta ao mesmo upstream.
+
+O upstream é o app ASGI `upstream` deste módulo, servido por um uvicorn em outro processo (porta
+local); responde JSON pequeno, corpos grandes em /big/{KiB} e atrasa com ?delay_ms=. "direct" é um
+`httpx.AsyncClient` com pool chamando o upstream; "proxied" é a app chamada diretamente (ASGI, como
+no bench_fastpath), que repassa pelo cliente compartilhado do proxy: a diferença é o custo do lado
+do mock (match que falha, cabeçalhos, streaming). Mede também: gravação (primeira requisição vai ao
+upstream, as seguintes são respondidas pelo mock gravado), requisições idênticas concorrentes (quantas
+chamadas chegam ao upstream) e o streaming de um corpo grande.
+Uso: python -m benchmarks.bench_proxy [--requests 2000] [--concurrency 20] [--big-kib 4096] [--port 18765]
+"""
+from __future__ import annotations
+import argparse, asyncio, json, os, subprocess, sys, time
+from urllib.parse import parse_qs
+import httpx
+
+_calls = [0]
+
+async def upstream(scope, receive, send):
+    """Upstream de teste: /calls devolve quantas requisições recebeu; /big/{KiB} devolve KiB bytes; o resto ecoa método/caminho."""
+    if scope["type"] != "http": return
+    size = 0
+    while True:
+        message = await receive()
+        size += len(message.get("body", b""))
+        if not message.get("more_body"): break
+    path = scope["path"]
+    query = parse_qs(scope["query_string"].decode())
+    if path == "/calls":
+        body, kind = json.dumps({"calls": _calls[0]}).encode(), b"application/json"
+    else:
+        _calls[0] += 1
+        if "delay_ms" in query: await asyncio.sleep(int(query["delay_ms"][0]) / 1000)
+        if path.startswith("/big/"): body, kind = b"x" * (int(path[5:]) * 1024), b"application/octet-stream"
+        else: body, kind = json.dumps({"method": scope["method"], "path": path, "received": size}).encode(), b"application/json"
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", kind), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+def start_upstream(port: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "benchmarks.bench_proxy:upstream", "--port", str(port), "--log-level", "warning", "--no-access-log", "--lifespan", "off"]
+    proc = subprocess.Popen(cmd, env={**os.environ, "PYTHONPATH": os.getcwd()})
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/calls", timeout=0.5); return proc
+        except httpx.HTTPError: time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("upstream did not start")
+
+def scope_for(path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query,
+            "headers": [(b"host", b"bench"), (b"accept", b"*/*"), (b"user-agent", b"bench")],
+            "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+
+async def call(app, path: str, query: bytes = b"") -> tuple:
+    """(status, header X-Mock-Proxy, bytes do corpo) de uma requisição GET feita direto na app ASGI."""
+    out = {"size": 0}
+    async def receive(): return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]; out["proxy"] = dict(message["headers"]).get(b"x-mock-proxy")
+        else: out["size"] += len(message.get("body", b""))
+    await app(scope_for(path, query), receive, send)
+    return out["status"], out["proxy"], out["size"]
+
+async def timed(label: str, n: int, concurrency: int, one) -> float:
+    async def worker(k: int):
+        for i in range(k, n, concurrency): await one(i)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(k) for k in range(concurrency)))
+    dt = time.perf_counter() - t0
+    print(f"{label:<34} {n / dt:8.0f} req/s {dt / n * 1e6:9.1f} us/req")
+    return dt
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--big-kib", type=int, default=4096)
+    ap.add_argument("--port", type=int, default=18765)
+    args = ap.parse_args()
+    from app.core.proxy import close_client, proxy
+    from app.main import app, store_instance as store
+    from app.models import ScenarioCreate
+    proc = start_upstream(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        await store.create_scenario(ScenarioCreate(basepath="/live", upstream_url=base))
+        await store.create_scenario(ScenarioCreate(basepath="/rec", upstream_url=base, record=True))
+        n, c = args.requests, args.concurrency
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)) as direct:
+            async def via_direct(i): assert (await direct.get(f"{base}/items/{i}")).status_code == 200
+            async def via_proxy(i): assert (await call(app, f"/live/items/{i}"))[:2] == (200, b"upstream")
+            for label, one in (("direct (pooled httpx)", via_direct), ("proxied", via_proxy)):
+                await timed(label, n // 5, c, one)  # aquecimento (conexões do pool)
+                await timed(f"{label}, {c} concurrent", n, c, one)
+                await timed(f"{label}, sequential", n // 4, 1, one)
+
+            async def record_miss(i): assert (await call(app, f"/rec/items/{i}"))[:2] == (200, b"upstream")
+            async def record_hit(i): assert (await call(app, f"/rec/items/{i % (n // 4)}"))[:2] == (200, None)
+            await timed("record: first call (upstream)", n // 4, 1, record_miss)
+            await timed("record: replay (recorded mock)", n, 1, record_hit)
+
+            before = (await direct.get(f"{base}/calls")).json()["calls"]
+            shared = proxy.shared
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(call(app, "/live/slow", b"delay_ms=100") for _ in range(c * 5)))
+            dt = time.perf_counter() - t0
+            after = (await direct.get(f"{base}/calls")).json()["calls"]
+            assert all(r[0] == 200 for r in results)
+            print(f"{c * 5} identical concurrent misses: {after - before} upstream call(s), {proxy.shared - shared} shared, {dt * 1000:.0f} ms")
+
+            big = args.big_kib
+            t0 = time.perf_counter(); r = await direct.get(f"{base}/big/{big}"); d_direct = time.perf_counter() - t0
+            t0 = time.perf_counter(); status, _, size = await call(app, f"/live/big/{big}"); d_proxy = time.perf_counter() - t0
+            assert len(r.content) == size == big * 1024 and status == 200
+            print(f"{big} KiB body: direct {big / 1024 / d_direct:7.0f} MiB/s, proxied {big / 1024 / d_proxy:7.0f} MiB/s")
+    finally:
+        await close_client()
+        proc.terminate(); proc.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""RedisStore x InMemoryStore: vazão do match, latência de escrita e propagação entre nós.
+
+Os dois stores recebem os mesmos mocks (importação em lote) e o match roda no snapshot local de
+cada um: com o Redis, nenhuma ida à rede por requisição. Depois mede a escrita (ida e volta ao
+Redis) e o tempo até um segundo nó enxergar a mudança, uma escrita por vez e numa rajada concorrente
+(as sincronizações do segundo nó se juntam).
+Sem --redis-url usa fakeredis (pip install fakeredis), no mesmo processo.
+Uso: python -m benchmarks.bench_redis_store [--mocks 10000] [--lookups 20000] [--writes 200] [--redis-url redis://localhost:6379/15]
+"""
+from __future__ import annotations
+import argparse, asyncio, random, statistics, time
+from app.core.bulk import BulkItem
+from app.core.request_context import RequestContext
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.memory import InMemoryStore, match_request
+from app.storage.redis_store import RedisStore
+
+SCENARIOS = 50
+
+def client_factory(url):
+    if url:
+        from redis.asyncio import from_url
+        return lambda: from_url(url)
+    import fakeredis
+    from fakeredis.aioredis import FakeRedis
+    server = fakeredis.FakeServer()
+    return lambda: FakeRedis(server=server)
+
+def items(n: int):
+    out = [BulkItem(s + 1, ScenarioCreate(basepath=f"/svc{s}/v1")) for s in range(SCENARIOS)]
+    for i in range(n):
+        uri = f"/res{i}/{{id}}" if i % 4 == 0 else f"/res{i}/items"
+        out.append(BulkItem(SCENARIOS + i + 1, MockCreate(scenario_basepath=f"/svc{i % SCENARIOS}/v1", request=MockRequestMatch(method="GET", uri=uri),
+                                                          response=MockResponse(body={"i": i}))))
+    return out
+
+async def match_rate(store: InMemoryStore, ctxs) -> float:
+    t0 = time.perf_counter()
+    for ctx in ctxs: assert await match_request(store.snapshot(), ctx) is not None
+    return len(ctxs) / (time.perf_counter() - t0)
+
+async def main_async(args):
+    new_client = client_factory(args.redis_url)
+    flush = new_client(); await flush.delete(*[f"benchredis:{k}" for k in ("scenarios", "mocks", "order", "version", "log")]); await flush.aclose()
+    memory = InMemoryStore()
+    a, b = RedisStore(new_client(), prefix="benchredis"), RedisStore(new_client(), prefix="benchredis")
+    await a.start(); await b.start()
+    batch = items(args.mocks)
+    await memory.import_items(batch)
+    t0 = time.perf_counter(); await a.import_items(batch); seed = time.perf_counter() - t0
+    t0 = time.perf_counter(); c = RedisStore(new_client(), prefix="benchredis"); await c.sync(); load = time.perf_counter() - t0
+
+    rnd = random.Random(1)
+    ctxs = []
+    for _ in range(args.lookups):
+        i = rnd.randrange(args.mocks)
+        ctxs.append(RequestContext.from_parts("GET", f"/svc{i % SCENARIOS}/v1/res{i}/" + ("42" if i % 4 == 0 else "items"), {}, {}, None))
+    print(f"{args.mocks} mocks: importação no Redis {seed:.2f} s; nó novo carrega em {load:.2f} s")
+    for label, store in (("InMemoryStore", memory), ("RedisStore (nó A)", a), ("RedisStore (nó C)", c)):
+        await match_rate(store, ctxs[:1000])
+        rates = [await match_rate(store, ctxs) for _ in range(3)]
+        print(f"  match {label:<18}: {max(rates):>9.0f} req/s")
+
+    async def visible(version: int):
+        while b.version < version: await asyncio.sleep(0)
+    write, seen = [], []
+    for i in range(args.writes):
+        t0 = time.perf_counter()
+        await a.create_mock(MockCreate(scenario_basepath="/svc0/v1", request=MockRequestMatch(method="POST", uri=f"/w{i}"), response=MockResponse()))
+        t1 = time.perf_counter(); await visible(a.version); t2 = time.perf_counter()
+        write.append(t1 - t0); seen.append(t2 - t0)
+    print(f"  escrita (uma por vez): {statistics.median(write) * 1e3:.2f} ms mediana; visível no nó B em {statistics.median(seen) * 1e3:.2f} ms")
+    syncs, t0 = b.syncs + b.reloads, time.perf_counter()
+    await asyncio.gather(*(a.create_mock(MockCreate(scenario_basepath="/svc1/v1", request=MockRequestMatch(method="POST", uri=f"/r{i}"), response=MockResponse()))
+                           for i in range(args.writes)))
+    await visible(a.version)
+    print(f"  rajada de {args.writes} escritas concorrentes: visível no nó B em {(time.perf_counter() - t0) * 1e3:.0f} ms, "
+          f"com {b.syncs + b.reloads - syncs} sincronizações")
+    await a.stop(); await b.stop(); await c.redis.aclose()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mocks", type=int, default=10000)
+    ap.add_argument("--lookups", type=int, default=20000)
+    ap.add_argument("--writes", type=int, default=200)
+    ap.add_argument("--redis-url", default=None)
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
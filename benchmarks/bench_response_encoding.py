@@ -0,0 +1,38 @@
+"""Custo por requisição de montar a resposta: JSONResponse (serializa a cada hit) x bytes pré-codificados.
+
+Uso: python -m benchmarks.bench_response_encoding [--kb 200] [--iterations 2000]
+"""
+from __future__ import annotations
+import argparse, time
+from fastapi.responses import JSONResponse
+from app.core.responses import EncodedResponse, PreEncodedResponse
+from app.models import MockResponse
+
+def make_payload(kb: int) -> dict:
+    items, size = [], 0
+    while size < kb * 1024:
+        item = {"id": len(items), "name": f"Produto {len(items)}", "price": 19.9, "tags": ["a", "b", "c"], "active": True}
+        items.append(item); size += 90
+    return {"items": items, "total": len(items)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kb", type=int, default=200)
+    ap.add_argument("--iterations", type=int, default=2000)
+    args = ap.parse_args()
+    resp = MockResponse(status_code=200, body=make_payload(args.kb))
+    t0 = time.perf_counter(); encoded = EncodedResponse(resp); once = time.perf_counter() - t0
+    headers = {"X-Mock-Snapshot-Version": "1"}
+    t0 = time.perf_counter()
+    for _ in range(args.iterations): JSONResponse(content=resp.body, status_code=200, headers=headers)
+    per_json = (time.perf_counter() - t0) / args.iterations
+    t0 = time.perf_counter()
+    for _ in range(args.iterations): PreEncodedResponse(encoded.identity, 200, headers.items())
+    per_pre = (time.perf_counter() - t0) / args.iterations
+    print(f"payload={len(encoded.body) / 1024:.0f} KB")
+    print(f"encode once at write time : {once * 1e3:9.2f} ms")
+    print(f"JSONResponse per request  : {per_json * 1e6:9.1f} us")
+    print(f"pre-encoded per request   : {per_pre * 1e6:9.1f} us  ({per_json / per_pre:.0f}x)")
+
+if __name__ == "__main__":
+    main()
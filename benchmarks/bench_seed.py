@@ -0,0 +1,50 @@
+"""Custo das operações administrativas do InMemoryStore em função do número de mocks.
+
+Mede a carga (create_mock em sequência), a checagem de duplicidade, a renomeação de um cenário
+e a exclusão em cascata de outro. Com os índices secundários, as três últimas dependem só do
+número de mocks do cenário afetado, não do total.
+
+Uso: python -m benchmarks.bench_seed [--sizes 1000,10000,100000] [--scenarios 50]
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate, ScenarioUpdate
+from app.storage.memory import InMemoryStore
+
+def mock_for(i: int, scenarios: int) -> MockCreate:
+    uri = f"/res{i}/{{id}}" if i % 4 == 0 else f"/res{i}/items"
+    return MockCreate(scenario_basepath=f"/svc{i % scenarios}/v1", request=MockRequestMatch(method="GET", uri=uri), response=MockResponse(body={"i": i}))
+
+async def run(n: int, scenarios: int) -> dict:
+    store = InMemoryStore()
+    for s in range(scenarios):
+        await store.create_scenario(ScenarioCreate(basepath=f"/svc{s}/v1"))
+    payloads = [mock_for(i, scenarios) for i in range(n)]
+    t0 = time.perf_counter()
+    for p in payloads: await store.create_mock(p)
+    seed_s = time.perf_counter() - t0
+
+    dup = payloads[n // 2]; tries = 1000
+    t0 = time.perf_counter()
+    for _ in range(tries):
+        try: await store.create_mock(dup)
+        except FileExistsError: pass
+    dup_us = (time.perf_counter() - t0) / tries * 1e6
+
+    t0 = time.perf_counter(); await store.update_scenario("/svc0/v1", ScenarioUpdate(basepath="/renamed/v1")); rename_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter(); await store.delete_scenario("/svc1/v1"); delete_ms = (time.perf_counter() - t0) * 1e3
+    assert store.snapshot().count_scenario_mocks("/renamed/v1") == len(range(0, n, scenarios))
+    return {"seed_s": seed_s, "per_mock_us": seed_s / n * 1e6, "dup_us": dup_us, "rename_ms": rename_ms, "delete_ms": delete_ms, "per_scenario": n // scenarios}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--scenarios", type=int, default=50)
+    args = ap.parse_args()
+    print(f"{'mocks':>8} {'seed (s)':>9} {'create (us)':>12} {'dup check (us)':>15} {'rename (ms)':>12} {'cascade del (ms)':>17} {'mocks/scenario':>15}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        r = asyncio.run(run(n, args.scenarios))
+        print(f"{n:>8} {r['seed_s']:>9.2f} {r['per_mock_us']:>12.1f} {r['dup_us']:>15.1f} {r['rename_ms']:>12.1f} {r['delete_ms']:>17.1f} {r['per_scenario']:>15}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Match de URIs com parâmetro: comparação de segmentos (`SegmentTemplate`) contra a regex compilada.
+
+URIs só com segmentos inteiros (`/items/{id}/v3`) casam por comparação de segmentos desde o user-022
+(a carga do PersistentStore deixa de compilar uma regex por mock). Aqui o mesmo store é medido dos
+dois jeitos, trocando nos registros o template pela regex de `pattern_to_regex_with_params`:
+  - scan: K mocks no mesmo grupo (mesmo primeiro segmento literal) e a requisição casando com o
+    último, o pior caso, em que todos os candidatos são testados;
+  - single: um mock por grupo, o caso comum;
+  - build: custo de preparar a URI na escrita/carga (template contra compilar a regex).
+Uso: python -m benchmarks.bench_segment_match [--candidates 1,8,32,128] [--lookups 20000]
+"""
+from __future__ import annotations
+import argparse, asyncio, re, time
+from typing import List, Tuple
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate, pattern_to_regex_with_params
+from app.storage.memory import InMemoryStore
+from app.storage.runtime import segment_template
+
+BASEPATH = "/svc"
+
+def scan_uri(k: int) -> str:
+    return f"/items/{{id}}/v{k}"
+
+async def scan_store(candidates: int) -> Tuple[InMemoryStore, str]:
+    """Store com `candidates` mocks em /items/{id}/v<k> e o caminho que casa só com o último."""
+    store = InMemoryStore()
+    await store.create_scenario(ScenarioCreate(basepath=BASEPATH))
+    for k in range(candidates):
+        await store.create_mock(MockCreate(scenario_basepath=BASEPATH, request=MockRequestMatch(method="GET", uri=scan_uri(k)), response=MockResponse(body={"k": k})))
+    return store, f"{BASEPATH}/items/42/v{candidates - 1}"
+
+async def single_store(groups: int) -> Tuple[InMemoryStore, List[str]]:
+    store = InMemoryStore()
+    await store.create_scenario(ScenarioCreate(basepath=BASEPATH))
+    for g in range(groups):
+        await store.create_mock(MockCreate(scenario_basepath=BASEPATH, request=MockRequestMatch(method="GET", uri=f"/res{g}/{{org}}/items/{{id}}"),
+                                           response=MockResponse(body={"g": g})))
+    return store, [f"{BASEPATH}/res{g}/acme/items/42" for g in range(groups)]
+
+def use_regex(store: InMemoryStore) -> None:
+    """Troca, nos registros do snapshot, o template de segmentos pela regex (como antes do user-022)."""
+    for r in store.snapshot().records():
+        if r.segments is not None: r.regex = pattern_to_regex_with_params(r.uri)[0]; r.segments = None
+
+async def per_lookup(store: InMemoryStore, paths: List[str], lookups: int) -> float:
+    """Menor µs por find_match de 3 rodadas (a primeira só aquece)."""
+    for p in paths: assert await store.find_match(p, "GET", {}, {}, None) is not None, p
+    seq = [paths[i % len(paths)] for i in range(lookups)]
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for p in seq: await store.find_match(p, "GET", {}, {}, None)
+        best = min(best, (time.perf_counter() - t0) / lookups * 1e6)
+    return best
+
+async def compare(store: InMemoryStore, paths: List[str], lookups: int) -> Tuple[float, float]:
+    segments = await per_lookup(store, paths, lookups)
+    use_regex(store)
+    return segments, await per_lookup(store, paths, lookups)
+
+def build_us(n: int = 5000) -> Tuple[float, float]:
+    uris = [f"/res{i}/{{org}}/items/{{id}}" for i in range(n)]
+    t0 = time.perf_counter()
+    for u in uris: segment_template(u)
+    seg = (time.perf_counter() - t0) / n * 1e6
+    re.purge()
+    t0 = time.perf_counter()
+    for u in uris: pattern_to_regex_with_params(u)
+    return seg, (time.perf_counter() - t0) / n * 1e6
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", default="1,8,32,128")
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+    print(f"{'case':<22} {'segments (us)':>14} {'regex (us)':>11} {'regex/segments':>15}")
+    for k in [int(x) for x in args.candidates.split(",")]:
+        store, path = await scan_store(k)
+        seg, rx = await compare(store, [path], args.lookups)
+        print(f"{f'scan, {k} candidates':<22} {seg:>14.2f} {rx:>11.2f} {rx / seg:>14.2f}x")
+    store, paths = await single_store(1000)
+    seg, rx = await compare(store, paths, args.lookups)
+    print(f"{'single, 1000 groups':<22} {seg:>14.2f} {rx:>11.2f} {rx / seg:>14.2f}x")
+    seg, rx = build_us()
+    print(f"{'build (per URI)':<22} {seg:>14.2f} {rx:>11.2f} {rx / seg:>14.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""Custo do Server-Timing e do profiler por amostragem.
+
+Mede a decisão por requisição com o recurso desligado (`timing.wanted`: flag do cenário + busca do
+header nos headers brutos), o custo de anotar as fases e montar o header quando ligado e a vazão
+da app (chamada ASGI direta, como no bench_fastpath) desligado, ligado pelo header e com uma coleta
+do profiler em andamento.
+
+Uso: python -m benchmarks.bench_server_timing [--requests 5000] [--iterations 200000]
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+from app.core.profiler import profiler
+from app.core.request_context import RequestContext
+from app.core.timing import PhaseTiming, wanted
+from app.main import app, store_instance as store
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+
+HEADERS = [(b"host", b"bench"), (b"accept", b"*/*"), (b"user-agent", b"bench"), (b"accept-encoding", b"gzip, br"), (b"x-request-id", b"abc")]
+
+def micro(n: int):
+    scenario = store.snapshot().scenario("/bench")
+    ctx = RequestContext("GET", "/bench/x", HEADERS)
+    t0 = time.perf_counter()
+    for _ in range(n): wanted(scenario, ctx)
+    off = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        t = PhaseTiming(); t.add("match", 0.00001); t.add("variant", 0.000002, "default"); t.add("encode", 0.000003); t.add("total", 0.00002); t.header()
+    on = (time.perf_counter() - t0) / n
+    print(f"disabled check (wanted)   {off * 1e6:8.2f} us/req")
+    print(f"phases + header (enabled) {on * 1e6:8.2f} us/req")
+
+async def run(label: str, n: int, extra=()):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http", "path": "/bench/res",
+             "raw_path": b"/bench/res", "root_path": "", "query_string": b"", "headers": [*HEADERS, *extra],
+             "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+    async def receive(): return {"type": "http.request", "body": b"", "more_body": False}
+    timed = []
+    async def send(message):
+        if message["type"] == "http.response.start": timed.append(any(k == b"server-timing" for k, _ in message["headers"]))
+    t0 = time.perf_counter()
+    for _ in range(n): await app(dict(scope), receive, send)
+    dt = time.perf_counter() - t0
+    assert all(timed) == bool(extra) and any(timed) == bool(extra)
+    print(f"{label:<26} {n / dt:8.0f} req/s {dt / n * 1e6:8.1f} us/req")
+    return dt
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--iterations", type=int, default=200000)
+    args = ap.parse_args()
+    await store.create_scenario(ScenarioCreate(basepath="/bench"))
+    await store.create_mock(MockCreate(scenario_basepath="/bench", request=MockRequestMatch(method="GET", uri="/res"), response=MockResponse(body={"ok": True})))
+    micro(args.iterations)
+    await run("app, timing off", args.requests // 5)  # aquecimento
+    await run("app, timing off", args.requests)
+    await run("app, X-Mock-Timing: 1", args.requests, [(b"x-mock-timing", b"1")])
+    task = asyncio.create_task(profiler.run(3600, 0.005))
+    await asyncio.sleep(0)
+    await run("app, profiler at 5 ms", args.requests)
+    task.cancel()
+    try: await task
+    except asyncio.CancelledError: pass
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Renderização de corpos com template: plano compilado x percorrer e re-serializar a árvore JSON.
+
+O corpo tem uma lista de itens estáticos e poucos placeholders, como um retorno de listagem
+paginada. "ingênuo" reproduz a abordagem direta: substituir os placeholders numa cópia da
+árvore e serializar tudo de novo a cada requisição.
+Uso: python -m benchmarks.bench_templating [--items 10,200] [--iterations 20000]
+"""
+from __future__ import annotations
+import argparse, json, re, time
+from app.core.request_context import RequestContext
+from app.core.responses import EncodedResponse
+from app.models import MockResponse
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(.*?)\s*\}\}")
+
+def body_for(n: int) -> dict:
+    return {"account": "{{path.id}}", "page": "{{query.page}}", "requestId": "req-{{header.X_Request_Id}}",
+            "items": [{"id": i, "description": "Lançamento de exemplo", "amount": 10.5 + i, "tags": ["a", "b"]} for i in range(n)]}
+
+def naive(body, ctx, path_params):
+    def value(expr):
+        source, _, name = expr.partition(".")
+        if source == "path": return path_params.get(name)
+        if source == "query": return ctx.query.get(name)
+        return ctx.header(name.lower().replace("_", "-"))
+    def walk(v):
+        if isinstance(v, dict): return {k: walk(x) for k, x in v.items()}
+        if isinstance(v, list): return [walk(x) for x in v]
+        if isinstance(v, str) and "{{" in v:
+            m = _PLACEHOLDER.fullmatch(v)
+            if m: return value(m.group(1))
+            return _PLACEHOLDER.sub(lambda m: str(value(m.group(1)) or ""), v)
+        return v
+    return json.dumps(walk(body), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", default="10,200")
+    ap.add_argument("--iterations", type=int, default=20000)
+    args = ap.parse_args()
+    for n in (int(x) for x in args.items.split(",")):
+        body = body_for(n)
+        encoded = EncodedResponse(MockResponse(body=body, template=True))
+        ctx = RequestContext("GET", "/acc/42", [(b"x-request-id", b"abc")], b"page=3")
+        params = {"id": "42"}
+        assert json.loads(encoded.render(ctx, params, {}).identity.body) == json.loads(naive(body, ctx, params))
+        size = len(naive(body, ctx, params))
+        print(f"{n} itens ({size / 1024:.1f} KiB)")
+        for label, fn in (("ingênuo (percorre + serializa)", lambda: naive(body, ctx, params)),
+                          ("plano compilado", lambda: encoded.render(ctx, params, {}))):
+            t0 = time.perf_counter()
+            for _ in range(args.iterations): fn()
+            dt = (time.perf_counter() - t0) / args.iterations
+            print(f"  {label:<32} {dt * 1e6:9.2f} us/resp")
+
+if __name__ == "__main__":
+    main()
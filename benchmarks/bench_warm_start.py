@@ -0,0 +1,101 @@
+"""Partida a quente do PersistentStore: tempo até /healthz/ready com N mocks em disco.
+
+Grava N mocks (mesmo formato do bench_seed: 1 em cada 4 com parâmetro na URI) num diretório
+temporário, encerra o store (snapshot) e mede a carga: leitura do snapshot + journal e montagem do
+índice (regexes, respostas codificadas, buckets). Mede também a carga só pelo journal (queda antes
+de qualquer snapshot, um registro por create_mock) e a latência de escrita com fsync por lote.
+
+Uso: python -m benchmarks.bench_warm_start [--sizes 10000,100000] [--journal 10000] [--writers 1,16]
+"""
+from __future__ import annotations
+import argparse, asyncio, gc, shutil, statistics, tempfile, time
+from pathlib import Path
+from app.core.bulk import BulkItem
+from app.models import ScenarioCreate
+from app.storage.persistent import PersistentStore
+from .bench_seed import mock_for
+
+SCENARIOS = 50
+
+async def opened(directory: str, **kw) -> PersistentStore:
+    store = PersistentStore(directory, **kw)
+    await store.start()  # só retorna com a carga concluída (ou falha)
+    if not store.ready: raise SystemExit(store.load_error)
+    return store
+
+def size_mb(directory: str) -> float:
+    return sum(p.stat().st_size for p in Path(directory).iterdir()) / 1e6
+
+async def warm(n: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="warm-")
+    try:
+        store = await opened(directory)
+        items = [BulkItem(s + 1, ScenarioCreate(basepath=f"/svc{s}/v1")) for s in range(SCENARIOS)]
+        items += [BulkItem(SCENARIOS + i + 1, mock_for(i, SCENARIOS)) for i in range(n)]
+        await store.import_items(items)
+        await store.stop()
+        del store, items; gc.collect()
+        disk = size_mb(directory)
+        t0 = time.perf_counter()
+        store = await opened(directory)
+        ready_s = time.perf_counter() - t0
+        assert len(store.snapshot().records()) == n
+        await store.stop()
+        return {"ready_s": ready_s, "disk_mb": disk}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+async def replay(n: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="journal-")
+    try:
+        store = await opened(directory, snapshot_interval=3600)
+        for s in range(SCENARIOS): await store.create_scenario(ScenarioCreate(basepath=f"/svc{s}/v1"))
+        for i in range(n): await store.create_mock(mock_for(i, SCENARIOS))
+        # sem stop: simula a queda antes do primeiro snapshot
+        t0 = time.perf_counter()
+        other = await opened(directory)
+        ready_s = time.perf_counter() - t0
+        assert len(other.snapshot().records()) == n
+        return {"ready_s": ready_s, "records": n + SCENARIOS, "disk_mb": size_mb(directory)}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+async def writes(writers: int, per_writer: int = 200) -> dict:
+    directory = tempfile.mkdtemp(prefix="writes-")
+    try:
+        store = await opened(directory, snapshot_interval=3600)
+        for s in range(SCENARIOS): await store.create_scenario(ScenarioCreate(basepath=f"/svc{s}/v1"))
+        lat = []
+        async def writer(w: int):
+            for i in range(per_writer):
+                t0 = time.perf_counter()
+                await store.create_mock(mock_for(w * per_writer + i, SCENARIOS))
+                lat.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        await asyncio.gather(*[writer(w) for w in range(writers)])
+        elapsed = time.perf_counter() - t0
+        await store.stop()
+        lat.sort()
+        return {"writes_s": len(lat) / elapsed, "p50_ms": statistics.median(lat) * 1e3, "p99_ms": lat[int(len(lat) * 0.99)] * 1e3}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--journal", type=int, default=10000)
+    ap.add_argument("--writers", default="1,16")
+    args = ap.parse_args()
+    print(f"{'mocks':>8} {'disk (MB)':>10} {'ready (s)':>10}   snapshot")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        r = asyncio.run(warm(n))
+        print(f"{n:>8} {r['disk_mb']:>10.1f} {r['ready_s']:>10.2f}")
+    r = asyncio.run(replay(args.journal))
+    print(f"{args.journal:>8} {r['disk_mb']:>10.1f} {r['ready_s']:>10.2f}   só journal ({r['records']} registros)")
+    print(f"\n{'writers':>8} {'writes/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}   fsync antes de responder (os.fsync em {tempfile.gettempdir()})")
+    for w in [int(x) for x in args.writers.split(",")]:
+        r = asyncio.run(writes(w))
+        print(f"{w:>8} {r['writes_s']:>10.0f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
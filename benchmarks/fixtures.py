@@ -0,0 +1,136 @@
+"""Cargas sintéticas determinísticas para a suíte (benchmarks.suite): N cenários x M mocks.
+
+As URIs alternam entre os formatos aceitos (literal, um parâmetro, vários parâmetros, curinga e
+regex ancorada); parte dos mocks tem variantes com predicados de header/query/corpo/JWT e parte
+tem corpo grande. Os JWTs são assinados com uma chave RSA local e o JWKS é servido por um
+transporte httpx em memória (`set_http_client`), sem rede: o caminho de descoberta do issuer é o real.
+"""
+from __future__ import annotations
+import time
+from typing import Dict, List, Optional, Tuple
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from app.core.bulk import BulkItem
+from app.core.jwt_validator import set_http_client
+from app.models import ConditionPredicate, MockCreate, MockRequestMatch, MockResponse, ResponseVariant, ScenarioCreate
+
+URI_KINDS = ("literal", "param", "params", "wildcard", "regex")
+
+def uri_for(i: int) -> str:
+    kind = i % len(URI_KINDS)
+    if kind == 0: return f"/res{i}/items"
+    if kind == 1: return f"/res{i}/{{id}}"
+    if kind == 2: return f"/res{i}/{{org}}/items/{{id}}"
+    if kind == 3: return f"/res{i}/files/*"
+    return f"^/res{i}/v[0-9]+$"
+
+def path_for(i: int) -> str:
+    """Caminho (sem basepath) que casa com `uri_for(i)`."""
+    kind = i % len(URI_KINDS)
+    if kind == 0: return f"/res{i}/items"
+    if kind == 1: return f"/res{i}/42"
+    if kind == 2: return f"/res{i}/acme/items/42"
+    if kind == 3: return f"/res{i}/files/a/b.txt"
+    return f"/res{i}/v2"
+
+def basepath(s: int) -> str:
+    return f"/svc{s}/v1"
+
+def large_body(kib: int) -> dict:
+    items = [{"id": i, "name": f"Produto {i}", "price": 19.9 + i, "tags": ["a", "b", "c"], "active": True} for i in range(kib * 1024 // 90 + 1)]
+    return {"items": items, "total": len(items)}
+
+def variants(n: int, jwt_claims: bool = False) -> List[ResponseVariant]:
+    """n variantes; a requisição de `variant_request(n)` só casa com a última (todas são avaliadas)."""
+    out = []
+    for k in range(n):
+        when = [ConditionPredicate(source="header", key="X-Tenant", op="regex", value=rf"^tenant-({k}|{k + 1000})$"),
+                ConditionPredicate(source="query", key="plan", op="in", values=["gold", "silver", f"p{k}"]),
+                ConditionPredicate(source="body", jsonpath="$.order.items[0].sku", op="equals", value=f"SKU-{k}")]
+        if jwt_claims: when.append(ConditionPredicate(source="jwt_payload", jsonpath="$.realm_access.roles", op="contains", value=f"role-{k}"))
+        out.append(ResponseVariant(when=when, response=MockResponse(body={"variant": k})))
+    return out
+
+def variant_request(n: int) -> Tuple[Dict[str, str], Dict[str, str], dict]:
+    """(headers, query, corpo) que casam com a última das `variants(n)`."""
+    last = n - 1
+    return {"x-tenant": f"tenant-{last}"}, {"plan": "gold"}, {"order": {"items": [{"sku": f"SKU-{last}"}]}}
+
+class Workload:
+    """Cenários `/svc{s}/v1` com `mocks` mocks GET distribuídos entre eles.
+
+    1 em cada `variant_every` mocks tem `variant_count` variantes (POST, corpo com o SKU), 1 em cada
+    `large_every` tem corpo de `large_kib` KiB; com `issuer`, o último cenário exige JWT.
+    """
+
+    def __init__(self, scenarios: int = 50, mocks: int = 10000, variant_every: int = 10, variant_count: int = 20,
+                 large_every: int = 100, large_kib: int = 64, issuer: Optional[str] = None):
+        self.scenarios = scenarios; self.mocks = mocks
+        self.variant_every = variant_every; self.variant_count = variant_count
+        self.large_every = large_every; self.large_kib = large_kib
+        self.issuer = issuer
+
+    def has_variants(self, i: int) -> bool:
+        return self.variant_every > 0 and i % self.variant_every == self.variant_every - 1
+
+    def is_large(self, i: int) -> bool:
+        return self.large_every > 0 and i % self.large_every == self.large_every // 2
+
+    def needs_jwt(self, i: int) -> bool:
+        return self.issuer is not None and i % self.scenarios == self.scenarios - 1
+
+    def path(self, i: int) -> str:
+        return basepath(i % self.scenarios) + path_for(i)
+
+    def method(self, i: int) -> str:
+        return "POST" if self.has_variants(i) else "GET"
+
+    def scenario(self, s: int) -> ScenarioCreate:
+        if self.issuer is not None and s == self.scenarios - 1:
+            return ScenarioCreate(basepath=basepath(s), jwt_issuer_url=self.issuer, jwt_location="header")
+        return ScenarioCreate(basepath=basepath(s))
+
+    def mock(self, i: int) -> MockCreate:
+        body = large_body(self.large_kib) if self.is_large(i) else {"i": i, "ok": True}
+        extra = {}
+        if self.has_variants(i): extra["variants"] = variants(self.variant_count, jwt_claims=self.needs_jwt(i))
+        return MockCreate(scenario_basepath=basepath(i % self.scenarios), request=MockRequestMatch(method=self.method(i), uri=uri_for(i)),
+                          response=MockResponse(body=body), **extra)
+
+    def items(self) -> List[BulkItem]:
+        out = [BulkItem(s + 1, self.scenario(s)) for s in range(self.scenarios)]
+        out += [BulkItem(self.scenarios + i + 1, self.mock(i)) for i in range(self.mocks)]
+        return out
+
+    async def seed(self, store) -> None:
+        _, errors = await store.import_items(self.items())
+        if errors: raise SystemExit(f"seed failed: {errors[:3]}")
+
+class LocalIssuer:
+    """Issuer OIDC local: chave RSA gerada na hora, discovery e JWKS respondidos por um `httpx.MockTransport`."""
+
+    def __init__(self, url: str = "https://issuer.bench.local/realms/bench", kid: str = "bench-1"):
+        self.url = url.rstrip("/")
+        self.kid = kid
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        public = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        self.jwks = {"keys": [{**jwk.construct(public, "RS256").to_dict(), "kid": kid, "alg": "RS256", "use": "sig"}]}
+        self.requests = 0
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if request.url.path.endswith("/.well-known/openid-configuration"):
+            return httpx.Response(200, json={"issuer": self.url, "jwks_uri": f"{self.url}/protocol/openid-connect/certs"})
+        if request.url.path.endswith("/protocol/openid-connect/certs"): return httpx.Response(200, json=self.jwks)
+        return httpx.Response(404)
+
+    def install(self) -> None:
+        """Passa a responder às buscas de discovery/JWKS do validador."""
+        set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(self._handle)))
+
+    def token(self, sub: str, roles: Tuple[str, ...] = (), ttl: int = 3600) -> str:
+        claims = {"sub": sub, "iss": self.url, "exp": int(time.time()) + ttl, "realm_access": {"roles": list(roles)}}
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
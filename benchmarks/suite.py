@@ -0,0 +1,324 @@
+"""Suíte reprodutível: microbenchmarks das funções do caminho quente + carga ASGI em processo.
+
+Os microbenchmarks guardam a melhor de `repeats` rodadas e a carga ponta a ponta, a mediana (sempre
+depois de uma rodada de aquecimento). A carga vem de benchmarks.fixtures, com sementes fixas: duas
+execuções na mesma máquina medem exatamente o mesmo trabalho. O resultado vai em JSON (`--out`), com os parâmetros, a versão do Python e o commit.
+
+Com `--baseline`, compara com um JSON gravado antes e marca como regressão a métrica que piorou
+mais que `--threshold` (relativo); o código de saída é 1 se houver regressão, para uso em CI. Como
+máquinas compartilhadas mudam de velocidade de um trecho para outro, cada métrica guarda também o
+tempo de um laço fixo de calibração medido entre as suas rodadas, e a comparação desconta a
+diferença (`--raw` compara os valores brutos).
+`--current` compara dois arquivos sem rodar nada.
+
+Uso: python -m benchmarks.suite [--quick] [--out results.json] [--baseline base.json] [--threshold 0.25]
+     python -m benchmarks.suite --current results.json --baseline base.json
+"""
+from __future__ import annotations
+import argparse, asyncio, gc, json, platform, random, shutil, statistics, subprocess, sys, tempfile, time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.jwt_validator import JWT_CACHE_SIZE, jwks_cache, token_cache, validate_jwt
+from app.core.predicates import VariantPlan
+from app.core.request_context import RequestContext
+from app.core.responses import EncodedResponse, PreEncodedResponse
+from app.models import MockResponse
+from app.storage.memory import InMemoryStore
+from app.storage.persistent import PersistentStore
+from .bench_segment_match import scan_store
+from .fixtures import LocalIssuer, Workload, large_body, variant_request, variants
+
+SEED = 1234
+PARAMS = {"full": {"scenarios": 50, "mocks": 10000, "requests": 20000, "concurrency": 32, "ops": 20000, "repeats": 5},
+          "quick": {"scenarios": 20, "mocks": 2000, "requests": 4000, "concurrency": 16, "ops": 4000, "repeats": 3}}
+
+Results = Dict[str, Dict[str, Any]]
+
+def calibration_us(samples: int = 5) -> float:
+    """µs de um laço fixo de Python puro (dicts, strings, chamadas), o menor de `samples`: a velocidade da máquina naquele instante."""
+    best = float("inf")
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        d: Dict[str, int] = {}
+        for i in range(5000):
+            k = f"k{i % 500}"; d[k] = d.get(k, 0) + len(str(i))
+        best = min(best, (time.perf_counter() - t0) * 1e6)
+    return best
+
+def metric(value: float, unit: str, better: str = "lower", calibration: Optional[float] = None) -> Dict[str, Any]:
+    m = {"value": round(value, 3), "unit": unit, "better": better}
+    if calibration is not None: m["calibration_us"] = round(calibration, 1)
+    return m
+
+async def per_op(call: Callable[..., Awaitable[Any]], args: List[tuple], repeats: int) -> Dict[str, Any]:
+    """Menor tempo médio por chamada (µs) entre as rodadas, como no timeit (o ruído da máquina só soma); a primeira só aquece.
+
+    Antes de cada rodada roda a calibração; vai junto a da rodada escolhida, para a comparação descontar a
+    velocidade da máquina naquele trecho.
+    """
+    rounds = []
+    gc.disable()  # como no timeit: uma coleta no meio da rodada mede o heap, não a função
+    try:
+        for r in range(repeats + 1):
+            c = calibration_us()
+            t0 = time.perf_counter()
+            for a in args: await call(*a)
+            if r: rounds.append(((time.perf_counter() - t0) / len(args) * 1e6, c))
+    finally: gc.enable()
+    best, cal = min(rounds)
+    return metric(best, "us/op", calibration=cal)
+
+def sync_op(call: Callable[..., Any], args: List[tuple], repeats: int) -> Dict[str, Any]:
+    rounds = []
+    gc.disable()
+    try:
+        for r in range(repeats + 1):
+            c = calibration_us()
+            t0 = time.perf_counter()
+            for a in args: call(*a)
+            if r: rounds.append(((time.perf_counter() - t0) / len(args) * 1e6, c))
+    finally: gc.enable()
+    best, cal = min(rounds)
+    return metric(best, "us/op", calibration=cal)
+
+# ---- requisições sintéticas ----
+
+class Req:
+    __slots__ = ("method", "path", "query", "headers", "body", "status")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: Any, status: int):
+        self.method = method; self.path = path; self.query = query; self.headers = headers; self.body = body; self.status = status
+
+def request_for(w: Workload, i: int, tokens: List[str]) -> Req:
+    headers: Dict[str, str] = {}
+    query: Dict[str, str] = {}
+    body = None
+    if w.has_variants(i): headers, query, body = variant_request(w.variant_count); headers = dict(headers)
+    if w.needs_jwt(i) and tokens: headers["authorization"] = f"Bearer {tokens[i % len(tokens)]}"
+    return Req(w.method(i), w.path(i), query, headers, body, 200)
+
+def traffic(w: Workload, n: int, tokens: List[str]) -> List[Req]:
+    """Mistura fixa: ~5% de 404 (recurso inexistente num cenário existente), o resto espalhado pelos mocks."""
+    rnd = random.Random(SEED)
+    out = []
+    for _ in range(n):
+        if rnd.random() < 0.05:
+            s = rnd.randrange(w.scenarios)
+            out.append(Req("GET", f"/svc{s}/v1/missing{rnd.randrange(1000)}", {}, {}, None, 404))
+        else:
+            out.append(request_for(w, rnd.randrange(w.mocks), tokens))
+    return out
+
+# ---- microbenchmarks ----
+
+async def bench_match(store: InMemoryStore, reqs: List[Req], repeats: int) -> Results:
+    hits = [(r.path, r.method, r.query, r.headers, r.body) for r in reqs if r.status == 200]
+    misses = [(r.path, r.method, r.query, r.headers, r.body) for r in reqs if r.status == 404]
+    for a in hits[:200]: assert await store.find_match(*a) is not None, a[:2]
+    return {"match.hit": await per_op(store.find_match, hits, repeats),
+            "match.miss": await per_op(store.find_match, misses, repeats)}
+
+async def bench_templated_scan(ops: int, repeats: int) -> Results:
+    """32 URIs com parâmetro no mesmo grupo e a requisição casando com a última: todos os candidatos são testados."""
+    store, path = await scan_store(32)
+    assert await store.find_match(path, "GET", {}, {}, None) is not None
+    return {"match.templated_scan": await per_op(store.find_match, [(path, "GET", {}, {}, None)] * ops, repeats)}
+
+async def bench_warm_start(w: Workload, repeats: int) -> Results:
+    """Carga do PersistentStore (snapshot com a carga sintética), em µs por mock: a menor de `repeats` partidas."""
+    directory = tempfile.mkdtemp(prefix="suite-warm-")
+    try:
+        store = PersistentStore(directory); await store.start()
+        await w.seed(store); await store.stop()
+        del store; gc.unfreeze(); gc.collect()
+        rounds = []
+        for _ in range(repeats):
+            c = calibration_us()
+            store = PersistentStore(directory)
+            t0 = time.perf_counter(); await store.start(); dt = time.perf_counter() - t0
+            assert store.ready and len(store.snapshot().records()) == w.mocks
+            await store.stop()
+            del store; gc.unfreeze(); gc.collect()  # start() congela o heap (gc.freeze)
+            rounds.append((dt / w.mocks * 1e6, c))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    best, cal = min(rounds)
+    return {"store.warm_start": metric(best, "us/mock", calibration=cal)}
+
+def bench_variants(ops: int, repeats: int) -> Results:
+    out = {}
+    for n in (5, 40):
+        plan = VariantPlan(variants(n))
+        headers, query, body = variant_request(n)
+        assert plan.select(headers, query, {}, body, {}) == n - 1
+        out[f"variants.select_{n}"] = sync_op(plan.select, [(headers, query, {}, body, {})] * ops, repeats)
+    return out
+
+async def bench_jwt(issuer: LocalIssuer, tokens: List[str], ops: int, repeats: int) -> Results:
+    jwks_cache.clear(); token_cache.clear()
+    await validate_jwt(tokens[0], issuer.url)  # discovery + JWKS pelo transporte local
+    assert issuer.requests == 2, issuer.requests
+    args = [(tokens[i % len(tokens)], issuer.url) for i in range(ops)]
+    cached = await per_op(validate_jwt, args, repeats)
+    token_cache.maxsize = 0
+    try: verify = await per_op(validate_jwt, args[:max(1, ops // 20)], repeats)
+    finally: token_cache.maxsize = JWT_CACHE_SIZE; token_cache.clear()
+    return {"jwt.cached": cached, "jwt.verify": verify}
+
+def bench_response(ops: int, repeats: int) -> Results:
+    small, large = EncodedResponse(MockResponse(body={"i": 1, "ok": True})), EncodedResponse(MockResponse(body=large_body(64)), compress=True)
+    extra = (("X-Mock-Snapshot-Version", "1"),)
+    def send(enc: EncodedResponse, accept: str): PreEncodedResponse(enc.negotiate(accept), enc.status_code, extra)
+    template = EncodedResponse(MockResponse(body={"id": "{{path.id}}", "page": "{{query.page}}", "items": large_body(4)["items"]}, template=True))
+    ctx = RequestContext.from_parts("GET", "/x/42", {"page": "2"}, {}, None)
+    big = MockResponse(body=large_body(64))
+    return {"response.small": sync_op(send, [(small, "gzip, br")] * ops, repeats),
+            "response.large_gzip": sync_op(send, [(large, "gzip")] * ops, repeats),
+            "response.template": sync_op(template.render, [(ctx, {"id": "42"}, {})] * max(1, ops // 10), repeats),
+            "response.encode_64k": sync_op(EncodedResponse, [(big, True)] * 20, repeats)}
+
+# ---- carga ponta a ponta ----
+
+async def load(asgi, reqs: List[Req], concurrency: int) -> Results:
+    """`concurrency` clientes em processo chamando a app ASGI direto (sem socket), até esgotar `reqs`."""
+    latencies: List[float] = []
+    wrong: List[Tuple[str, int]] = []
+    it = iter(reqs)
+
+    async def call(r: Req):
+        raw = json.dumps(r.body).encode() if r.body is not None else b""
+        headers = [(b"host", b"bench"), (b"accept", b"*/*"), (b"accept-encoding", b"gzip")]
+        headers += [(k.encode(), v.encode()) for k, v in r.headers.items()]
+        if raw: headers += [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())]
+        qs = "&".join(f"{k}={v}" for k, v in r.query.items()).encode()
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": r.method, "scheme": "http",
+                 "path": r.path, "raw_path": r.path.encode(), "root_path": "", "query_string": qs, "headers": headers,
+                 "client": ("127.0.0.1", 5000), "server": ("bench", 80)}
+        sent = False
+        async def receive():
+            nonlocal sent
+            if sent: return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        status = []
+        async def send(message):
+            if message["type"] == "http.response.start": status.append(message["status"])
+        await asgi(scope, receive, send)
+        if status[0] != r.status: wrong.append((r.path, status[0]))
+
+    async def client():
+        for r in it:
+            t0 = time.perf_counter()
+            await call(r)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - t0
+    if wrong: raise SystemExit(f"{len(wrong)} unexpected statuses, e.g. {wrong[:3]}")
+    latencies.sort()
+    return {"e2e.rps": metric(len(latencies) / elapsed, "req/s", "higher"),
+            "e2e.p50": metric(latencies[len(latencies) // 2] * 1e3, "ms"),
+            "e2e.p99": metric(latencies[int(len(latencies) * 0.99)] * 1e3, "ms")}
+
+async def bench_e2e(w: Workload, reqs: List[Req], concurrency: int, repeats: int) -> Results:
+    from app.main import app, store_instance
+    await w.seed(store_instance)
+    gc.collect(); gc.freeze()
+    await load(app, reqs[:len(reqs) // 4], concurrency)  # aquecimento
+    runs, cal = [], []
+    for _ in range(repeats):
+        cal.append(calibration_us())
+        runs.append(await load(app, reqs, concurrency))
+    return {name: metric(statistics.median(r[name]["value"] for r in runs), m["unit"], m["better"], min(cal)) for name, m in runs[0].items()}
+
+# ---- execução e comparação ----
+
+def git_commit() -> Optional[str]:
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip() or None
+    except Exception: return None
+
+async def run(quick: bool) -> Dict[str, Any]:
+    p = PARAMS["quick" if quick else "full"]
+    issuer = LocalIssuer(); issuer.install()
+    rnd = random.Random(SEED)
+    tokens = [issuer.token(f"user-{i}", roles=(f"role-{rnd.randrange(40)}", "role-19")) for i in range(50)]
+    w = Workload(scenarios=p["scenarios"], mocks=p["mocks"], issuer=issuer.url)
+    reqs = traffic(w, p["requests"], tokens)
+    results: Results = {}
+
+    store = InMemoryStore()
+    cal = calibration_us()
+    t0 = time.perf_counter(); await w.seed(store)
+    results["store.seed"] = metric((time.perf_counter() - t0) / w.mocks * 1e6, "us/mock", calibration=min(cal, calibration_us()))
+    gc.collect(); gc.freeze()  # os mocks são de longa duração: fora das coletas, como depois da carga do PersistentStore
+    results.update(await bench_match(store, reqs, p["repeats"]))
+    del store; gc.unfreeze(); gc.collect()
+    results.update(await bench_templated_scan(p["ops"], p["repeats"]))
+    results.update(await bench_warm_start(w, p["repeats"]))
+    results.update(bench_variants(p["ops"], p["repeats"]))
+    results.update(await bench_jwt(issuer, tokens, p["ops"], p["repeats"]))
+    results.update(bench_response(p["ops"], p["repeats"]))
+    results.update(await bench_e2e(w, reqs, p["concurrency"], p["repeats"]))
+    return {"meta": {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+                     "python": platform.python_version(), "platform": platform.platform(), "quick": quick, "seed": SEED, "params": p},
+            "results": results}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, calibrated: bool = True) -> List[Tuple[str, Optional[float], Optional[float], Optional[float], str]]:
+    """(métrica, base, atual, variação relativa, situação); a variação é positiva quando a métrica melhorou.
+
+    Com `calibrated`, o valor esperado é o da base escalado pela razão entre as calibrações das duas
+    execuções, tomadas junto da própria métrica: um trecho em que a máquina estava mais lenta não vira regressão.
+    """
+    rows = []
+    cur, base = current["results"], baseline["results"]
+    for name in [*base, *(n for n in cur if n not in base)]:
+        b, c = base.get(name), cur.get(name)
+        if b is None: rows.append((name, None, c["value"], None, "new")); continue
+        if c is None: rows.append((name, b["value"], None, None, "missing")); continue
+        factor = c["calibration_us"] / b["calibration_us"] if calibrated and b.get("calibration_us") and c.get("calibration_us") else 1.0
+        lower = b.get("better", "lower") == "lower"
+        expected = b["value"] * factor if lower else b["value"] / factor
+        change = (c["value"] - expected) / expected if expected else 0.0
+        if lower: change = -change
+        status = "REGRESSION" if change < -threshold else "improved" if change > threshold else "ok"
+        rows.append((name, b["value"], c["value"], change, status))
+    return rows
+
+def print_results(results: Results) -> None:
+    for name, m in results.items(): print(f"{name:<22} {m['value']:>12.3f} {m['unit']}")
+
+def print_comparison(rows, threshold: float, calibrated: bool) -> int:
+    fmt = lambda v: "-" if v is None else f"{v:.3f}"
+    print(f"{'metric':<22} {'baseline':>12} {'current':>12} {'change':>8}   (threshold {threshold:.0%}{', calibrated' if calibrated else ''})")
+    for name, b, c, change, status in rows:
+        print(f"{name:<22} {fmt(b):>12} {fmt(c):>12} {'-' if change is None else f'{change:+.1%}':>8}   {status}")
+    regressions = [r[0] for r in rows if r[4] == "REGRESSION"]
+    if regressions: print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quick", action="store_true", help="carga menor, para rodar a cada mudança")
+    ap.add_argument("--out", help="grava o resultado em JSON")
+    ap.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    ap.add_argument("--current", help="compara este JSON com --baseline em vez de rodar a suíte")
+    ap.add_argument("--threshold", type=float, default=0.25, help="piora relativa tolerada (0.25 = 25%%)")
+    ap.add_argument("--raw", action="store_true", help="compara os valores brutos, sem descontar a calibração")
+    args = ap.parse_args()
+    if args.current:
+        if not args.baseline: ap.error("--current requires --baseline")
+        with open(args.current) as f: current = json.load(f)
+    else:
+        current = asyncio.run(run(args.quick))
+        print_results(current["results"])
+        if args.out:
+            with open(args.out, "w") as f: json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        if baseline["meta"].get("params") != current["meta"].get("params"): print("warning: baseline was run with different parameters", file=sys.stderr)
+        print()
+        sys.exit(print_comparison(compare(current, baseline, args.threshold, not args.raw), args.threshold, not args.raw))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from __future__ import annotations
+import httpx, pytest
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def asgi_client():
+    """Fábrica de `httpx.AsyncClient` falando direto com uma app ASGI (sem rede, sem lifespan)."""
+    def make(app) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return make
@@ -0,0 +1,82 @@
+"""Range em `SourceResponse` (arquivo e gerador): 206 com Content-Range, sufixo, 416 e os casos em que o Range é ignorado."""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import pytest
+from app.core import body_source
+from app.core.body_source import FileSource, GeneratorSource, SourceResponse
+
+pytestmark = pytest.mark.anyio
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+async def _get(source, headers: Optional[Dict[str, str]] = None, method: str = "GET", status: int = 200) -> Tuple[int, Dict[bytes, bytes], bytes]:
+    scope = {"type": "http", "method": method, "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]}
+    sent: List[dict] = []
+    async def send(message): sent.append(message)
+    async def receive(): return {"type": "http.disconnect"}
+    await SourceResponse(source, status, [(b"content-type", b"application/octet-stream")])(scope, receive, send)
+    start = sent[0]
+    assert start["type"] == "http.response.start"
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+@pytest.fixture(params=["file", "generator"])
+def source(request, tmp_path, monkeypatch):
+    """(fonte, corpo completo); STREAM_CHUNK_BYTES pequeno para o intervalo atravessar várias fatias."""
+    monkeypatch.setattr(body_source, "STREAM_CHUNK_BYTES", 64)
+    if request.param == "file":
+        path = tmp_path / "data.bin"; path.write_bytes(DATA)
+        return FileSource(str(path)), DATA
+    gen = GeneratorSource({"i": "{{index}}", "name": "item-{{index}}"}, 150, array=True)
+    return gen, b"[" + b",".join(b'{"i":%d,"name":"item-%d"}' % (i, i) for i in range(150)) + b"]"
+
+async def test_full_body_advertises_ranges(source):
+    src, full = source
+    status, headers, body = await _get(src)
+    assert status == 200 and body == full
+    assert headers[b"accept-ranges"] == b"bytes" and headers[b"content-length"] == str(len(full)).encode()
+    assert b"content-range" not in headers
+
+@pytest.mark.parametrize("spec, first, last", [("0-0", 0, 0), ("10-99", 10, 99), ("500-", 500, None), ("300-99999", 300, None)])
+async def test_single_range(source, spec, first, last):
+    src, full = source
+    last = len(full) - 1 if last is None else last
+    status, headers, body = await _get(src, {"range": f"bytes={spec}"})
+    assert status == 206
+    assert headers[b"content-range"] == f"bytes {first}-{last}/{len(full)}".encode()
+    assert headers[b"content-length"] == str(last - first + 1).encode()
+    assert body == full[first:last + 1]
+
+@pytest.mark.parametrize("n", [1, 37, 100000])
+async def test_suffix_range(source, n):
+    src, full = source
+    status, headers, body = await _get(src, {"range": f"bytes=-{n}"})
+    first = max(0, len(full) - n)
+    assert status == 206 and headers[b"content-range"] == f"bytes {first}-{len(full) - 1}/{len(full)}".encode()
+    assert body == full[-n:]
+
+@pytest.mark.parametrize("spec", ["{size}-", "{size}-{end}", "-0"])
+async def test_unsatisfiable_range(source, spec):
+    src, full = source
+    status, headers, body = await _get(src, {"range": "bytes=" + spec.format(size=len(full), end=len(full) + 10)})
+    assert status == 416 and headers[b"content-range"] == f"bytes */{len(full)}".encode()
+    assert headers[b"content-length"] == b"0" and body == b""
+
+@pytest.mark.parametrize("headers", [{"range": "bytes=0-1,5-6"}, {"range": "items=0-1"}, {"range": "bytes=9-3"},
+                                     {"range": "bytes=0-9", "if-range": '"other-etag"'}])
+async def test_range_ignored_sends_full_body(source, headers):
+    src, full = source
+    status, out, body = await _get(src, headers)
+    assert status == 200 and body == full and b"content-range" not in out
+
+async def test_if_range_with_current_etag_and_head(source):
+    src, full = source
+    etag = (await _get(src))[1][b"etag"].decode()
+    status, headers, body = await _get(src, {"range": "bytes=5-9", "if-range": etag})
+    assert status == 206 and body == full[5:10]
+    status, headers, body = await _get(src, {"range": "bytes=5-9"}, method="HEAD")
+    assert status == 206 and headers[b"content-length"] == b"5" and body == b""
+
+async def test_range_ignored_for_non_200_status(source):
+    src, full = source
+    status, headers, body = await _get(src, {"range": "bytes=0-9"}, status=201)
+    assert status == 201 and body == full and b"content-range" not in headers
@@ -0,0 +1,44 @@
+"""Importação em lote (`InMemoryStore.import_items`): conflitos conferidos contra o lote em andamento."""
+from __future__ import annotations
+import pytest
+from app.core.bulk import BulkItem
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.memory import InMemoryStore
+
+pytestmark = pytest.mark.anyio
+
+def _mock(uri: str, status: int = 200) -> MockCreate:
+    return MockCreate(scenario_basepath="/s", request=MockRequestMatch(method="GET", uri=uri), response=MockResponse(status_code=status))
+
+@pytest.fixture
+async def store():
+    store = InMemoryStore()
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    return store
+
+def _by_uri(store: InMemoryStore):
+    return {r.uri: (r.id, r.response.status_code) for r in store.snapshot().records()}
+
+async def test_key_freed_earlier_in_the_batch_can_be_reused(store):
+    a = await store.create_mock(_mock("/a"))
+    counts, errors = await store.import_items([BulkItem(1, _mock("/b", 201), mock_id=a.id), BulkItem(2, _mock("/a", 202))], on_conflict="replace")
+    assert not errors and counts["mocks_replaced"] == 1 and counts["mocks_created"] == 1
+    uris = _by_uri(store)
+    assert uris["/b"] == (a.id, 201) and uris["/a"][1] == 202 and uris["/a"][0] != a.id
+
+async def test_existing_mocks_can_swap_uris_in_one_batch(store):
+    a = await store.create_mock(_mock("/a"))
+    b = await store.create_mock(_mock("/b"))
+    # troca as URIs de dois mocks existentes no mesmo lote, pelos ids
+    counts, errors = await store.import_items([BulkItem(1, _mock("/c", 201), mock_id=a.id), BulkItem(2, _mock("/a", 202), mock_id=b.id),
+                                               BulkItem(3, _mock("/b", 203), mock_id=a.id)], on_conflict="replace")
+    assert not errors and counts["mocks_replaced"] == 3
+    assert _by_uri(store) == {"/a": (b.id, 202), "/b": (a.id, 203)}
+    counts, errors = await store.import_items([BulkItem(1, _mock("/a", 204))])
+    assert [e.line for e in errors] == [1] and counts["mocks_created"] == 0
+
+async def test_key_taken_earlier_in_the_batch_conflicts(store):
+    counts, errors = await store.import_items([BulkItem(1, _mock("/x")), BulkItem(2, _mock("/x", 201))], atomic=False)
+    assert counts["mocks_created"] == 1 and [e.line for e in errors] == [2]
+    counts, errors = await store.import_items([BulkItem(1, _mock("/y")), BulkItem(2, _mock("/y", 201))], on_conflict="skip")
+    assert counts["mocks_created"] == 1 and counts["skipped"] == 1 and _by_uri(store)["/y"][1] == 200
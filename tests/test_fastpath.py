@@ -0,0 +1,105 @@
+"""Despacho direto (`MockFastPath`): mesmas respostas da rota do FastAPI, byte a byte, e rotas reservadas repassadas à app."""
+from __future__ import annotations
+import uuid
+import pytest
+from starlette.middleware import Middleware
+from app.fastpath import MockFastPath
+from app.main import app, store_instance
+
+pytestmark = pytest.mark.anyio
+
+def _fast_stack():
+    """A pilha da app como com FAST_PATH=1 (despacho direto por dentro do CORS) e a instância do MockFastPath nela."""
+    user = app.user_middleware
+    app.user_middleware = [*user, Middleware(MockFastPath, store=lambda: store_instance, routes=lambda: app.routes)]
+    try: stack = app.build_middleware_stack()
+    finally: app.user_middleware = user
+    fast = stack
+    while not isinstance(fast, MockFastPath): fast = fast.app
+    return stack, fast
+
+@pytest.fixture
+async def clients(asgi_client):
+    stack, fast = _fast_stack()
+    async with asgi_client(app) as plain, asgi_client(stack) as direct:
+        bp = f"/f{uuid.uuid4().hex[:8]}"
+        assert (await plain.post("/api/scenarios", json={"basepath": bp})).status_code == 201
+        mocks = [
+            {"request": {"method": "GET", "uri": "/items"}, "response": {"body": {"items": [1, 2, 3]}, "headers": {"X-Kind": "list"}}},
+            {"request": {"method": "GET", "uri": "/items/{id}"}, "response": {"body": {"id": "{{path.id}}", "q": "{{query.q}}"}, "template": True},
+             "variants": [{"when": [{"source": "query", "key": "v", "value": "2"}], "response": {"status_code": 202, "body": {"v": 2}}}]},
+            {"request": {"method": "POST", "uri": "/orders", "body": {"sku": "a"}}, "response": {"status_code": 201, "body": {"ok": True}}},
+            {"request": {"method": "GET", "uri": "/big"}, "response": {"body": {"data": "x" * 4096}}, "compress": True},
+            {"request": {"method": "GET", "uri": "/text"}, "response": {"media_type": "text/plain", "body": "olá"}},
+            {"request": {"method": "GET", "uri": "/gen"}, "response": {"body_source": {"kind": "generator", "record": {"i": "{{index}}"}, "count": 50}}},
+        ]
+        for m in mocks:
+            r = await plain.post("/api/mocks", json={"scenario_basepath": bp, **m})
+            assert r.status_code == 201, r.text
+        plain.basepath = bp
+        yield plain, direct, fast
+
+def _same(a, b) -> None:
+    assert a.status_code == b.status_code
+    assert a.headers.raw == b.headers.raw
+    assert a.content == b.content
+
+CASES = [
+    ("GET", "/items", {}, None),
+    ("GET", "/items", {"origin": "http://example.test"}, None),
+    ("HEAD", "/items", {}, None),
+    ("GET", "/items/42?q=x", {}, None),
+    ("GET", "/items/42?v=2", {}, None),
+    ("POST", "/orders", {"content-type": "application/json"}, b'{"sku": "a"}'),
+    ("POST", "/orders", {"content-type": "application/json"}, b'{"sku": "b"}'),
+    ("GET", "/big", {"accept-encoding": "gzip"}, None),
+    ("GET", "/big", {"accept-encoding": "identity"}, None),
+    ("GET", "/text", {}, None),
+    ("GET", "/gen", {"range": "bytes=10-99"}, None),
+    ("GET", "/missing", {}, None),
+]
+
+@pytest.mark.parametrize("method, path, headers, body", CASES)
+async def test_same_response_with_and_without_fast_path(clients, method, path, headers, body):
+    plain, direct, _ = clients
+    url = plain.basepath + path
+    _same(await plain.request(method, url, headers=headers, content=body), await direct.request(method, url, headers=headers, content=body))
+
+async def test_conditional_get_matches(clients):
+    plain, direct, fast = clients
+    url = plain.basepath + "/items"
+    etag = (await plain.get(url)).headers["etag"]
+    served = fast.served
+    a, b = await plain.get(url, headers={"if-none-match": etag}), await direct.get(url, headers={"if-none-match": etag})
+    assert a.status_code == 304 and fast.served == served + 1
+    _same(a, b)
+
+async def test_mocks_are_served_directly(clients):
+    plain, direct, fast = clients
+    served, forwarded = fast.served, fast.forwarded
+    await direct.get(plain.basepath + "/items")
+    await direct.get(plain.basepath + "/missing")  # 404 segue para a app completa
+    assert (fast.served, fast.forwarded) == (served + 1, forwarded + 1)
+
+@pytest.fixture
+async def shadows(clients):
+    """Cenários /api e /healthz com mocks nos caminhos completos de rotas reservadas (respondem 418 se casarem)."""
+    plain = clients[0]
+    shadowed = {"/api": f"/scenarios{plain.basepath}", "/healthz": "/ready"}
+    for bp, uri in shadowed.items():
+        assert (await plain.post("/api/scenarios", json={"basepath": bp})).status_code == 201
+        r = await plain.post("/api/mocks", json={"scenario_basepath": bp, "request": {"method": "GET", "uri": uri}, "response": {"status_code": 418}})
+        assert r.status_code == 201, r.text
+    yield
+    for bp in shadowed: await plain.delete(f"/api/scenarios{bp}")
+
+@pytest.mark.parametrize("path", ["/api/scenarios{bp}", "/scenarios{bp}/openapi.json", "/metrics", "/healthz/ready"])
+async def test_reserved_paths_are_forwarded(clients, shadows, path):
+    plain, direct, fast = clients
+    url = path.format(bp=plain.basepath)
+    forwarded, served = fast.forwarded, fast.served
+    b = await direct.get(url)
+    assert fast.forwarded == forwarded + 1 and fast.served == served
+    a = await plain.get(url)
+    assert a.status_code == b.status_code == 200  # a rota própria, não o mock 418
+    if path != "/metrics": _same(a, b)  # os contadores de /metrics mudam entre as duas chamadas
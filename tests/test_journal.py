@@ -0,0 +1,133 @@
+"""Journal de requisições: status que de fato saiu (no catch-all e no despacho direto) e limpeza com JOURNAL_FILE."""
+from __future__ import annotations
+import json, time, uuid
+import anyio
+import pytest
+from app.core import journal as journal_module
+from app.core.journal import RequestJournal, journal
+from app.core.request_context import RequestContext
+from app.fastpath import MockFastPath
+from app.main import app, store_instance
+
+pytestmark = pytest.mark.anyio
+
+def _fast_app():
+    return MockFastPath(app, store=lambda: store_instance, routes=lambda: app.routes)
+
+@pytest.fixture(params=["catch_all", "fastpath"])
+async def client(request, asgi_client):
+    async with asgi_client(app) as admin, asgi_client(app if request.param == "catch_all" else _fast_app()) as c:
+        basepath = f"/j{uuid.uuid4().hex[:8]}"
+        assert (await admin.post("/api/scenarios", json={"basepath": basepath})).status_code == 201
+        c.basepath = basepath
+        c.admin = admin
+        await journal.clear()
+        yield c
+
+async def _mock(c, uri: str, response: dict, **extra) -> str:
+    r = await c.admin.post("/api/mocks", json={"scenario_basepath": c.basepath, "request": {"method": "GET", "uri": uri}, "response": response, **extra})
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+def _statuses():
+    return [e.status for e in journal.entries()]
+
+async def test_records_configured_status(client):
+    await _mock(client, "/ok", {"status_code": 201, "body": {"ok": True}})
+    assert (await client.get(f"{client.basepath}/ok")).status_code == 201
+    assert _statuses() == [201]
+
+async def test_records_304_from_conditional_get(client):
+    await _mock(client, "/etag", {"body": {"v": 1}})
+    etag = (await client.get(f"{client.basepath}/etag")).headers["etag"]
+    assert (await client.get(f"{client.basepath}/etag", headers={"if-none-match": etag})).status_code == 304
+    assert _statuses() == [200, 304]
+
+async def test_records_injected_fault_status(client):
+    await _mock(client, "/fault", {"body": {"v": 1}}, chaos={"faults": [{"kind": "error", "probability": 1, "status_code": 503}]})
+    r = await client.get(f"{client.basepath}/fault")
+    assert r.status_code == 503 and r.headers["x-mock-fault"] == "error"
+    assert _statuses() == [503]
+
+async def test_records_range_statuses(client):
+    await _mock(client, "/gen", {"body_source": {"kind": "generator", "record": {"i": "{{index}}"}, "count": 100}})
+    assert (await client.get(f"{client.basepath}/gen", headers={"range": "bytes=0-9"})).status_code == 206
+    assert (await client.get(f"{client.basepath}/gen", headers={"range": "bytes=999999-"})).status_code == 416
+    assert _statuses() == [206, 416]
+
+async def test_clear_spills_pending_entries_first(tmp_path):
+    spill = tmp_path / "requests.ndjson"
+    j = RequestJournal(4, spill_path=str(spill))
+    started = time.perf_counter()
+    for i in range(3): j.record(RequestContext.from_parts("GET", f"/p{i}", {}, {}, None), started, "/s", None, 200)
+    await j.flush()
+    j.record(RequestContext.from_parts("GET", "/late", {}, {}, None), started, "/s", None, 404)
+    await j.clear()
+    assert list(j.entries()) == []
+    lines = [json.loads(line) for line in spill.read_text().splitlines()]
+    assert [(e["path"], e["status"]) for e in lines] == [("/p0", 200), ("/p1", 200), ("/p2", 200), ("/late", 404)]
+    await j.flush()  # nada pendente: o arquivo não muda
+    assert len(spill.read_text().splitlines()) == 4
+
+def _record(j: RequestJournal, path: str) -> None:
+    j.record(RequestContext.from_parts("GET", path, {}, {}, None), time.perf_counter(), "/s", None, 200)
+
+async def test_failed_spill_is_retried_and_counted(tmp_path):
+    spill = tmp_path / "requests.ndjson"
+    spill.mkdir()  # abrir um diretório para escrita falha com OSError
+    j = RequestJournal(8, spill_path=str(spill))
+    for i in range(3): _record(j, f"/p{i}")
+    with pytest.raises(OSError):
+        await j.flush()
+    assert j._spilled == 0 and j.stats()["spill_errors"] == 1 and j.spill_dropped == 0
+    spill.rmdir()
+    _record(j, "/p3")
+    await j.flush()
+    assert [json.loads(line)["path"] for line in spill.read_text().splitlines()] == ["/p0", "/p1", "/p2", "/p3"]
+
+async def test_spill_loop_survives_write_errors(tmp_path):
+    spill = tmp_path / "requests.ndjson"
+    spill.mkdir()
+    j = RequestJournal(8, spill_path=str(spill))
+    j.start(interval=0.01)
+    try:
+        _record(j, "/a")
+        while j.spill_errors < 2: await anyio.sleep(0.01)
+        assert not j._spill_task.done()
+        spill.rmdir()
+        while j._spilled < 1: await anyio.sleep(0.01)
+    finally:
+        await j.stop()
+    assert [json.loads(line)["path"] for line in spill.read_text().splitlines()] == ["/a"]
+
+async def test_clear_with_failing_spill_drops_and_returns(tmp_path):
+    spill = tmp_path / "requests.ndjson"
+    spill.mkdir()
+    j = RequestJournal(8, spill_path=str(spill))
+    for i in range(3): _record(j, f"/p{i}")
+    await j.clear()
+    assert list(j.entries()) == [] and j.spill_dropped == 3 and j.spill_errors == 1
+    await j.stop()
+
+async def test_clear_ends_under_steady_traffic(tmp_path, monkeypatch):
+    spill = tmp_path / "requests.ndjson"
+    j = RequestJournal(64, spill_path=str(spill))
+    append = journal_module._append
+    def slow_append(path, data):
+        _record(j, "/during")  # chega uma entrada nova a cada gravação
+        append(path, data)
+    monkeypatch.setattr(journal_module, "_append", slow_append)
+    for i in range(3): _record(j, f"/p{i}")
+    await j.clear()
+    assert [e.path for e in j.entries()] == ["/during"]
+    assert [json.loads(line)["path"] for line in spill.read_text().splitlines()] == ["/p0", "/p1", "/p2"]
+
+async def test_concurrent_flushes_append_in_order(tmp_path):
+    spill = tmp_path / "requests.ndjson"
+    j = RequestJournal(64, spill_path=str(spill))
+    async with anyio.create_task_group() as tg:
+        for i in range(20):
+            _record(j, f"/p{i}")
+            tg.start_soon(j.flush)
+    seqs = [json.loads(line)["seq"] for line in spill.read_text().splitlines()]
+    assert seqs == list(range(20))
@@ -0,0 +1,67 @@
+"""Compilador de JSONPath (app.utils.jsonpath)."""
+from __future__ import annotations
+import pytest
+from app.utils.jsonpath import compile_jsonpath, jsonpath_get, parse_jsonpath
+
+DOC = {
+    "user": {"name": "ana", "role": "premium"},
+    "a.b": {"c d": 1},
+    "items": [{"sku": "x1", "qty": 2, "active": True}, {"sku": "x2", "qty": 7}, {"sku": "x3", "qty": 5, "active": False}],
+    "resource_access": {"api": {"roles": ["read"]}, "web": {"roles": ["admin"]}},
+}
+
+@pytest.mark.parametrize("expr, expected", [
+    ("$.user.name", "ana"),
+    ("$['user']['role']", "premium"),
+    ('$["a.b"]["c d"]', 1),
+    ("$['a.b'].missing", None),
+    ("$.items[0].sku", "x1"),
+    ("$.items[-1].sku", "x3"),
+    ("$.items[-3].sku", "x1"),
+    ("$.items[-4]", None),
+    ("$.items[3]", None),
+    ("$.user[0]", None),
+    ("$.items.sku", None),
+])
+def test_single_value_paths(expr, expected):
+    assert jsonpath_get(expr, DOC) == expected
+
+def test_bare_root_returns_the_document():
+    # antes da compilação, "$" sozinho devolvia None
+    assert jsonpath_get("$", DOC) is DOC
+    assert jsonpath_get("$", [1, 2]) == [1, 2]
+    assert jsonpath_get("$", None) is None
+
+@pytest.mark.parametrize("expr, expected", [
+    ("$.items[*].sku", ["x1", "x2", "x3"]),
+    ("$.resource_access.*.roles", [["read"], ["admin"]]),
+    ("$.user.*", ["ana", "premium"]),
+    ("$.items[*].active", [True, False]),
+    ("$.nothing[*]", None),
+])
+def test_wildcards_return_lists(expr, expected):
+    assert jsonpath_get(expr, DOC) == expected
+
+@pytest.mark.parametrize("expr, expected", [
+    ("$.items[?(@.qty >= 5)].sku", ["x2", "x3"]),
+    ("$.items[?(@.qty < 5)].sku", ["x1"]),
+    ("$.items[?(@.sku == 'x2')].qty", [7]),
+    ('$.items[?(@.sku != "x2")].sku', ["x1", "x3"]),
+    ("$.items[?(@.active)].sku", ["x1", "x3"]),
+    ("$.items[?(@.active == true)].sku", ["x1"]),
+    ("$.items[?(@.qty > 100)]", None),
+    ("$.items[?(@.sku > 1)]", None),  # tipos incomparáveis não casam
+])
+def test_filters(expr, expected):
+    assert jsonpath_get(expr, DOC) == expected
+
+@pytest.mark.parametrize("expr", ["user.name", "$.", "$..a", "$[", "$['a", "$[x]", "$.a[?(@.b ~ 1)]", "$.a[?(@.b == 1]", "$a"])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        parse_jsonpath(expr)
+    assert compile_jsonpath(expr)(DOC) is None
+
+def test_compiled_accessor_is_cached_and_reusable():
+    get = compile_jsonpath("$.items[-1].qty")
+    assert compile_jsonpath("$.items[-1].qty") is get
+    assert get(DOC) == 5 and get({"items": [{"qty": 1}]}) == 1 and get("not json") is None
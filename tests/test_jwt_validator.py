@@ -0,0 +1,117 @@
+"""Validação de JWT contra um issuer local (httpx.MockTransport): JWKS por kid, caches e falhas do issuer."""
+from __future__ import annotations
+import asyncio, time
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from app.core import jwt_validator
+from app.core.jwt_validator import IssuerUnavailable, jwks_cache, set_http_client, token_cache, validate_jwt
+
+pytestmark = pytest.mark.anyio
+
+ISSUER = "https://issuer.test/realms/demo"
+
+class Issuer:
+    """Issuer OIDC de teste: discovery + JWKS; `gate` segura as respostas, `down` simula o issuer fora do ar."""
+
+    def __init__(self, jwks: dict):
+        self.jwks = jwks
+        self.jwks_calls = 0
+        self.down = False
+        self.gate = asyncio.Event(); self.gate.set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await self.gate.wait()
+        if self.down: raise httpx.ConnectError("refused", request=request)
+        if request.url.path.endswith("/.well-known/openid-configuration"): return httpx.Response(200, json={"jwks_uri": ISSUER + "/certs"})
+        self.jwks_calls += 1
+        return httpx.Response(200, json=self.jwks)
+
+@pytest.fixture(scope="module")
+def keys():
+    """Três chaves RSA (kid k0..k2): PEMs privados e o JWKS público."""
+    private, jwks = [], {"keys": []}
+    for i in range(3):
+        k = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private.append(k.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+        pub = k.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        jwks["keys"].append({**jwk.construct(pub, "RS256").to_dict(), "kid": f"k{i}", "alg": "RS256", "use": "sig"})
+    return private, jwks
+
+@pytest.fixture
+async def issuer(keys):
+    up = Issuer(keys[1])
+    jwks_cache.clear(); jwks_cache._inflight.clear(); jwks_cache.fetches = 0; token_cache.clear()
+    set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(up)))
+    yield up
+    set_http_client(None)
+    jwks_cache.clear(); token_cache.clear()
+
+def _token(keys, i: int, **claims) -> str:
+    return jwt.encode({"sub": "user", "iss": ISSUER, "exp": int(time.time()) + 60, **claims}, keys[0][i], algorithm="RS256", headers={"kid": f"k{i}"})
+
+async def test_kid_selects_a_single_key(issuer, keys):
+    ctx = await validate_jwt(_token(keys, 1), ISSUER)
+    assert ctx["header"]["kid"] == "k1" and ctx["payload"]["sub"] == "user"
+    key_set = await jwks_cache.get_keys(ISSUER)
+    assert sorted(key_set.by_kid) == ["k0", "k1", "k2"]
+    assert len(key_set.candidates({"kid": "k1", "alg": "RS256"})) == 1
+    assert key_set.candidates({"kid": "k1", "alg": "HS256"}) == []
+    assert key_set.candidates({"kid": "unknown", "alg": "RS256"}) == []
+
+async def test_token_cache_hit_skips_signature_check(issuer, keys, monkeypatch):
+    token = _token(keys, 0)
+    first = await validate_jwt(token, ISSUER)
+    def no_decode(*a, **kw):
+        raise AssertionError("signature verified again")
+    monkeypatch.setattr(jwt_validator.jwt, "decode", no_decode)
+    hits = token_cache.hits
+    assert await validate_jwt(token, ISSUER) is first
+    assert token_cache.hits == hits + 1
+    with pytest.raises(AssertionError):
+        await validate_jwt(_token(keys, 0, n=1), ISSUER)  # token diferente: verifica a assinatura
+
+async def test_concurrent_validations_share_one_jwks_fetch(issuer, keys):
+    issuer.gate.clear()
+    tokens = [_token(keys, i % 3, n=i) for i in range(20)]
+    pending = asyncio.gather(*(validate_jwt(t, ISSUER) for t in tokens))
+    await asyncio.sleep(0.05)
+    issuer.gate.set()
+    results = await pending
+    assert [r["payload"]["n"] for r in results] == list(range(20))
+    assert issuer.jwks_calls == 1 and jwks_cache.fetches == 1
+
+async def test_stale_keys_served_while_issuer_is_down(issuer, keys):
+    await validate_jwt(_token(keys, 0), ISSUER)
+    entry = jwks_cache._cache[ISSUER]
+    now = time.time()
+    entry.refresh_at, entry.expires_at, entry.stale_until = now - 20, now - 10, now + 100
+    issuer.down = True
+    # TTL vencido: responde com o JWKS antigo e revalida em background
+    assert (await validate_jwt(_token(keys, 1), ISSUER))["payload"]["sub"] == "user"
+    await asyncio.gather(*jwks_cache._inflight.values(), return_exceptions=True)
+    assert jwks_cache.fetches == 2
+    # revalidação falhou: segue no JWKS antigo, sem nova busca enquanto vale o cache negativo
+    assert (await validate_jwt(_token(keys, 2), ISSUER))["payload"]["sub"] == "user"
+    assert jwks_cache.fetches == 2
+    # issuer de volta: a próxima revalidação troca as chaves
+    issuer.down = False
+    jwks_cache._failures.clear()
+    await validate_jwt(_token(keys, 0, n=1), ISSUER)
+    await asyncio.gather(*jwks_cache._inflight.values(), return_exceptions=True)
+    assert jwks_cache.fetches == 3 and jwks_cache._cache[ISSUER].expires_at > time.time()
+
+async def test_negative_cache_raises_a_fresh_error_each_time(issuer, keys):
+    issuer.down = True
+    with pytest.raises(IssuerUnavailable) as first:
+        await validate_jwt(_token(keys, 0), ISSUER)
+    errors = []
+    for n in range(2):
+        with pytest.raises(IssuerUnavailable) as cached:
+            await validate_jwt(_token(keys, 0, n=n), ISSUER)
+        errors.append(cached.value)
+    assert jwks_cache.fetches == 1
+    assert errors[0] is not errors[1] and first.value not in errors
+    assert errors[0].__cause__ is errors[1].__cause__ is first.value
@@ -0,0 +1,43 @@
+"""Validação dos mocks na API administrativa: headers de resposta que não podem ser pré-codificados viram 422."""
+from __future__ import annotations
+import uuid
+import pytest
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def client(asgi_client):
+    async with asgi_client(app) as c:
+        c.basepath = f"/v{uuid.uuid4().hex[:8]}"
+        assert (await c.post("/api/scenarios", json={"basepath": c.basepath})).status_code == 201
+        yield c
+
+def _mock(c, uri: str, response: dict, **extra) -> dict:
+    return {"scenario_basepath": c.basepath, "request": {"method": "GET", "uri": uri}, "response": response, **extra}
+
+@pytest.mark.parametrize("headers", [{"X-Message": "olá, 世界"}, {"X-Emoji-✓": "ok"}, {"X-Split": "a\r\nSet-Cookie: x=1"}])
+async def test_create_rejects_unencodable_headers(client, headers):
+    r = await client.post("/api/mocks", json=_mock(client, "/h", {"headers": headers}))
+    assert r.status_code == 422 and "Header" in r.text
+
+async def test_rejects_unencodable_media_type_and_variant_headers(client):
+    r = await client.post("/api/mocks", json=_mock(client, "/m", {"media_type": "text/plain; x=✓"}))
+    assert r.status_code == 422
+    variant = {"when": [{"source": "query", "key": "v", "value": "1"}], "response": {"headers": {"X-Message": "世界"}}}
+    r = await client.post("/api/mocks", json=_mock(client, "/v", {}, variants=[variant]))
+    assert r.status_code == 422
+
+async def test_update_rejects_unencodable_headers(client):
+    r = await client.post("/api/mocks", json=_mock(client, "/u", {"body": {"ok": True}}))
+    assert r.status_code == 201
+    mock_id = r.json()["id"]
+    r = await client.put(f"/api/mocks/{mock_id}", json={"response": {"headers": {"X-Message": "世界"}}})
+    assert r.status_code == 422
+    assert (await client.get(f"{client.basepath}/u")).json() == {"ok": True}
+
+async def test_latin1_header_values_are_served(client):
+    r = await client.post("/api/mocks", json=_mock(client, "/l", {"headers": {"X-Message": "café"}}))
+    assert r.status_code == 201
+    r = await client.get(f"{client.basepath}/l")
+    assert r.status_code == 200 and (b"x-message", "café".encode("latin-1")) in r.headers.raw
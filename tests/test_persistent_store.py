@@ -0,0 +1,104 @@
+"""PersistentStore em tmp_path: ida e volta pelo disco (snapshot + journal), fim de journal rasgado e snapshot corrompido."""
+from __future__ import annotations
+import os
+import pytest
+from app import main as main_module
+from app.main import app
+from app.models import MockCreate, MockRequestMatch, MockResponse, MockUpdate, ScenarioCreate, ScenarioUpdate
+from app.storage.persistent import SNAPSHOT_FILE, PersistentStore
+
+pytestmark = pytest.mark.anyio
+
+def _mock(uri: str, status: int = 200) -> MockCreate:
+    return MockCreate(scenario_basepath="/s", request=MockRequestMatch(method="GET", uri=uri), response=MockResponse(status_code=status, body={"uri": uri}))
+
+async def _open(directory, **kw) -> PersistentStore:
+    store = PersistentStore(str(directory), **kw)
+    await store.start()
+    return store
+
+def _crash(store: PersistentStore) -> None:
+    """Abandona o store como numa queda: sem flush final, sem snapshot."""
+    for task in store._tasks: task.cancel()
+    os.close(store._fd)
+
+async def _state(store: PersistentStore):
+    return store.version, [s.model_dump() for s in await store.list_scenarios()], store.mocks_json()
+
+async def _write_some(store: PersistentStore) -> None:
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    a = await store.create_mock(_mock("/a"))
+    b = await store.create_mock(_mock("/users/{id}"))
+    await store.create_mock(_mock("/c", 201))
+    await store.update_mock(a.id, MockUpdate(response=MockResponse(status_code=202, body={"changed": True})))
+    await store.delete_mock(b.id)
+    await store.update_scenario("/s", ScenarioUpdate(description="persisted"))
+
+async def _write_some_more(store: PersistentStore) -> None:
+    await store.create_mock(_mock("/after-snapshot"))
+    [first] = [r for r in store.snapshot().records() if r.uri == "/before-snapshot"]
+    await store.delete_mock(first.id)
+
+async def test_round_trip_through_snapshot(tmp_path):
+    store = await _open(tmp_path)
+    await _write_some(store)
+    before = await _state(store)
+    await store.stop()
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    store = await _open(tmp_path)
+    assert store.ready and await _state(store) == before
+    await store.stop()
+
+async def test_round_trip_through_journal_after_crash(tmp_path):
+    store = await _open(tmp_path, snapshot_interval=3600)
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    await store.create_mock(_mock("/before-snapshot"))
+    await store.save_snapshot()
+    await _write_some_more(store)
+    before = await _state(store)
+    _crash(store)
+    store = await _open(tmp_path)
+    assert store.ready and await _state(store) == before
+    await store.stop()
+
+async def test_torn_journal_tail_is_discarded(tmp_path):
+    store = await _open(tmp_path, snapshot_interval=3600)
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    await store.create_mock(_mock("/kept"))
+    before = await _state(store)
+    await store.create_mock(_mock("/torn"))
+    _crash(store)
+    [journal] = tmp_path.glob("journal-*.log")
+    size = journal.stat().st_size
+    os.truncate(journal, size - 5)  # queda no meio do último registro
+    store = await _open(tmp_path)
+    assert store.ready and await _state(store) == before
+    valid = journal.stat().st_size
+    assert valid < size - 5  # o registro incompleto saiu do arquivo
+    # escritas seguintes continuam no mesmo journal e sobrevivem a outra queda
+    after = await store.create_mock(_mock("/after"))
+    expected = await _state(store)
+    _crash(store)
+    store = await _open(tmp_path)
+    assert await _state(store) == expected and store.snapshot().record(after.id) is not None
+    await store.stop()
+
+async def test_corrupted_snapshot_refuses_to_load(tmp_path, monkeypatch, asgi_client):
+    store = await _open(tmp_path)
+    await _write_some(store)
+    await store.stop()
+    snapshot = tmp_path / SNAPSHOT_FILE
+    data = bytearray(snapshot.read_bytes()); data[len(data) // 2] ^= 0xFF
+    snapshot.write_bytes(bytes(data))
+    store = await _open(tmp_path)
+    assert not store.ready and "corrupted" in store.load_error
+    assert not list(store.snapshot().records())
+    with pytest.raises(RuntimeError, match="could not be loaded"):
+        await store.create_scenario(ScenarioCreate(basepath="/other"))
+    assert snapshot.read_bytes() == bytes(data)  # nada sobrescreve o snapshot ruim
+    monkeypatch.setattr(main_module, "store_instance", store)
+    async with asgi_client(app) as c:
+        r = await c.get("/healthz/ready")
+    assert r.status_code == 503 and r.json()["status"] == "failed" and "corrupted" in r.json()["detail"]
+    await store.stop()
+    assert snapshot.read_bytes() == bytes(data)
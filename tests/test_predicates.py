@@ -0,0 +1,65 @@
+"""Predicados e variantes compilados (app.core.predicates)."""
+from __future__ import annotations
+import pytest
+from app.core.predicates import VariantPlan, compile_predicate
+from app.models import ConditionPredicate, MockResponse, ResponseVariant
+
+def _test(**fields):
+    test, _ = compile_predicate(ConditionPredicate(**fields))
+    return test
+
+def _run(test, headers=None, query=None, path=None, body=None, jwt=None) -> bool:
+    return test(headers or {}, query or {}, path or {}, body, jwt or {})
+
+def test_sources():
+    assert _run(_test(source="header", key="X-Tier", value="gold"), headers={"x-tier": "gold"})
+    assert _run(_test(source="query", key="page", value="2"), query={"page": "2"})
+    assert _run(_test(source="path", key="id", value="42"), path={"id": "42"})
+    assert _run(_test(source="body", key="kind", value="a"), body={"kind": "a"})
+    assert not _run(_test(source="body", key="kind", value="a"), body=["kind"])
+    assert _run(_test(source="jwt_header", key="kid", value="k1"), jwt={"header": {"kid": "k1"}})
+    assert _run(_test(source="jwt_payload", key="sub", value="u"), jwt={"payload": {"sub": "u"}})
+
+def test_jsonpath_sources():
+    body = {"items": [{"sku": "a", "qty": 9}, {"sku": "b", "qty": 1}]}
+    assert _run(_test(source="body", jsonpath="$.items[-1].sku", value="b"), body=body)
+    assert _run(_test(source="body", jsonpath="$.items[?(@.qty > 5)].sku", op="contains", value="a"), body=body)
+    assert not _run(_test(source="body", jsonpath="$.items[?(@.qty > 5)].sku", op="contains", value="b"), body=body)
+    claims = {"payload": {"resource_access": {"api": {"roles": ["read"]}, "web": {"roles": ["admin"]}}}}
+    assert _run(_test(source="jwt_payload", jsonpath="$.resource_access.web.roles", op="contains", value="admin"), jwt=claims)
+    assert _run(_test(source="jwt_payload", jsonpath="$['resource_access']['api'].roles[0]", value="read"), jwt=claims)
+
+def test_operators():
+    assert _run(_test(source="query", key="q", op="regex", value="^ab+c$"), query={"q": "abbc"})
+    assert not _run(_test(source="query", key="q", op="regex", value="^ab+c$"), query={})
+    assert _run(_test(source="query", key="q", op="contains", value="bb"), query={"q": "abbc"})
+    assert _run(_test(source="body", key="n", op="in", values=[1, 2]), body={"n": 2})
+    assert not _run(_test(source="body", key="n", op="in"), body={"n": 2})
+    assert not _run(_test(source="header", key="x", value="1"), headers={"x": "2"})
+
+def test_invalid_regex_and_jsonpath_are_rejected():
+    with pytest.raises(ValueError):
+        ConditionPredicate(source="query", key="q", op="regex", value="(")
+    with pytest.raises(ValueError):
+        ConditionPredicate(source="body", jsonpath="$.a[?(@.b ~ 1)]")
+
+def test_cheaper_predicates_run_first():
+    calls = []
+    class Body(dict):
+        def get(self, key, default=None):
+            calls.append(key); return super().get(key, default)
+    plan = VariantPlan([ResponseVariant(when=[ConditionPredicate(source="body", key="kind", value="a"),
+                                              ConditionPredicate(source="header", key="x", value="1")], response=MockResponse(status_code=201))])
+    assert plan.select({"x": "2"}, {}, {}, Body(kind="a"), {}) is None
+    assert calls == []  # o header (mais barato) já reprovou a variante
+    assert plan.select({"x": "1"}, {}, {}, Body(kind="a"), {}) == 0 and calls == ["kind"]
+
+def test_variant_plan_first_match_wins():
+    variants = [ResponseVariant(when=[ConditionPredicate(source="query", key="v", value="1")], response=MockResponse(status_code=201)),
+                ResponseVariant(when=[ConditionPredicate(source="query", key="v", op="regex", value=r"\d")], response=MockResponse(status_code=202))]
+    plan = VariantPlan(variants)
+    assert plan.sources == frozenset({"query"})
+    assert plan.pick({}, {"v": "1"}, {}, None, {}).status_code == 201
+    assert plan.pick({}, {"v": "7"}, {}, None, {}).status_code == 202
+    assert plan.select({}, {"v": "x"}, {}, None, {}) is None
+    assert VariantPlan(None).select({}, {}, {}, None, {}) is None
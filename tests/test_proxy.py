@@ -0,0 +1,101 @@
+"""Proxy para o `upstream_url` do cenário, contra um upstream ASGI local (sem rede)."""
+from __future__ import annotations
+import asyncio, json, uuid
+import httpx
+import pytest
+from app.core import proxy as proxy_module
+from app.core.proxy import HEADER, proxy
+from app.main import app, store_instance
+
+pytestmark = pytest.mark.anyio
+
+class Upstream:
+    """Upstream de teste: ecoa método, caminho, query e corpo; caminhos terminados em /slow esperam `release` antes de responder."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"): break
+        self.calls.append((scope["method"], scope["path"]))
+        if scope["path"].endswith("/slow"): await self.release.wait()
+        data = json.dumps({"method": scope["method"], "path": scope["path"], "query": scope["query_string"].decode(),
+                           "body": body.decode()}).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode()), (b"x-upstream", b"1")]})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else data})
+
+@pytest.fixture
+def upstream(monkeypatch):
+    up = Upstream()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=up))
+    monkeypatch.setattr(proxy_module, "get_client", lambda: client)
+    return up
+
+@pytest.fixture
+async def client(asgi_client):
+    async with asgi_client(app) as c:
+        async def scenario(**fields) -> str:
+            basepath = f"/p{uuid.uuid4().hex[:8]}"
+            r = await c.post("/api/scenarios", json={"basepath": basepath, "upstream_url": "http://upstream/base", **fields})
+            assert r.status_code == 201, r.text
+            return basepath
+        c.scenario = scenario
+        yield c
+
+def _recorded(basepath: str):
+    return [r for r in store_instance.snapshot().records() if r.basepath == basepath]
+
+async def test_forwards_unmatched_request(upstream, client):
+    bp = await client.scenario()
+    r = await client.post(f"{bp}/items/7?x=1", content=b"hello", headers={"content-type": "text/plain"})
+    assert r.status_code == 200 and r.headers[HEADER.lower()] == "upstream" and r.headers["x-upstream"] == "1"
+    assert r.json() == {"method": "POST", "path": "/base/items/7", "query": "x=1", "body": "hello"}
+    assert not _recorded(bp)
+
+async def test_collapses_identical_in_flight_gets(upstream, client):
+    bp = await client.scenario()
+    shared = proxy.shared
+    requests = [asyncio.create_task(client.get(f"{bp}/slow")) for _ in range(5)]
+    while not upstream.calls: await asyncio.sleep(0.001)
+    await asyncio.sleep(0.05)  # as demais chegam ao proxy e esperam pela primeira
+    upstream.release.set()
+    responses = await asyncio.gather(*requests)
+    assert upstream.calls == [("GET", "/base/slow")]
+    assert sorted(r.headers[HEADER.lower()] for r in responses) == ["shared"] * 4 + ["upstream"]
+    assert len({r.content for r in responses}) == 1 and proxy.shared - shared == 4
+
+async def test_records_then_replays(upstream, client):
+    bp = await client.scenario(record=True)
+    first = await client.get(f"{bp}/items/1?q=a")
+    assert first.headers[HEADER.lower()] == "upstream"
+    [mock] = _recorded(bp)
+    assert (mock.method, mock.uri, mock.query) == ("GET", "/items/1", (("q", "a"),))
+    replay = await client.get(f"{bp}/items/1?q=a")
+    assert replay.status_code == 200 and HEADER.lower() not in replay.headers and replay.json() == first.json()
+    assert upstream.calls == [("GET", "/base/items/1")]
+
+async def test_head_is_forwarded_but_not_recorded(upstream, client):
+    bp = await client.scenario(record=True)
+    head = await client.head(f"{bp}/items/2")
+    assert head.status_code == 200 and head.headers[HEADER.lower()] == "upstream" and head.content == b""
+    assert not _recorded(bp)
+    get = await client.get(f"{bp}/items/2")
+    assert get.headers[HEADER.lower()] == "upstream" and get.json()["path"] == "/base/items/2"
+    assert len(_recorded(bp)) == 1
+
+@pytest.mark.parametrize("error, status", [(httpx.ConnectError("refused"), 502), (httpx.ReadTimeout("slow"), 504)])
+async def test_upstream_failures_map_to_gateway_errors(monkeypatch, client, error, status):
+    def fail(request):
+        raise error
+    failing = httpx.AsyncClient(transport=httpx.MockTransport(fail))
+    monkeypatch.setattr(proxy_module, "get_client", lambda: failing)
+    bp = await client.scenario(record=True)
+    r = await client.get(f"{bp}/items/3")
+    assert r.status_code == status and "Upstream" in r.json()["detail"]
+    assert not _recorded(bp) and not proxy._flights
@@ -0,0 +1,87 @@
+"""RedisStore contra um Redis em memória (fakeredis): conflito de escrita, pub/sub entre nós e recuperação pelo log."""
+from __future__ import annotations
+import asyncio
+import pytest
+fakeredis = pytest.importorskip("fakeredis")
+from fakeredis.aioredis import FakeRedis
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.redis_store import RedisStore
+
+pytestmark = pytest.mark.anyio
+
+def _mock(uri: str) -> MockCreate:
+    return MockCreate(scenario_basepath="/s", request=MockRequestMatch(method="GET", uri=uri), response=MockResponse(body={"uri": uri}))
+
+def _ids(store: RedisStore):
+    return sorted(r.id for r in store.snapshot().records())
+
+async def _until(cond, timeout: float = 3.0) -> None:
+    loop = asyncio.get_running_loop(); deadline = loop.time() + timeout
+    while not cond():
+        assert loop.time() < deadline, "timeout"
+        await asyncio.sleep(0.005)
+
+@pytest.fixture
+async def nodes():
+    """Dois nós (clientes distintos) sobre o mesmo servidor Redis; sem polling, para o pub/sub ser o único aviso."""
+    server = fakeredis.FakeServer()
+    a, b = (RedisStore(FakeRedis(server=server), sync_interval=3600) for _ in range(2))
+    yield a, b
+    for store in (a, b):
+        if store._tasks: await store.stop()
+
+async def test_write_retries_after_watch_conflict(nodes, monkeypatch):
+    a, b = nodes
+    await a.create_scenario(ScenarioCreate(basepath="/s"))
+    await b.sync()
+    pipeline, conflicts = a.redis.pipeline, []
+
+    def racing_pipeline(*args, **kw):
+        pipe = pipeline(*args, **kw)
+        execute = pipe.execute
+        async def execute_after_rival(*e_args, **e_kw):
+            # a primeira transação de A com WATCH perde para uma escrita de B entre o WATCH e o EXEC
+            if pipe.watching and not conflicts:
+                conflicts.append(await b.create_mock(_mock("/from-b")))
+            return await execute(*e_args, **e_kw)
+        pipe.execute = execute_after_rival
+        return pipe
+
+    monkeypatch.setattr(a.redis, "pipeline", racing_pipeline)
+    created = await a.create_mock(_mock("/from-a"))
+    assert len(conflicts) == 1
+    assert a.version == 3
+    await b.sync()
+    assert _ids(a) == _ids(b) == sorted([created.id, conflicts[0].id])
+
+async def test_pubsub_propagates_writes_between_nodes(nodes):
+    a, b = nodes
+    await a.start(); await b.start()
+    await a.create_scenario(ScenarioCreate(basepath="/s"))
+    first = await a.create_mock(_mock("/one"))
+    await _until(lambda: b.version == a.version)
+    syncs, reloads = b.syncs, b.reloads
+    second = await b.create_mock(_mock("/two"))
+    await _until(lambda: a.version == b.version)
+    assert _ids(a) == _ids(b) == sorted([first.id, second.id])
+    third = await a.create_mock(_mock("/three"))
+    await _until(lambda: b.version == a.version)
+    # só as chaves alteradas, pelo log, sem recarga completa
+    assert b.syncs > syncs and b.reloads == reloads
+    assert b.snapshot().record(third.id) is not None
+
+async def test_sync_catches_up_from_change_log_after_missed_messages(nodes):
+    a, b = nodes
+    await a.create_scenario(ScenarioCreate(basepath="/s"))
+    kept = await a.create_mock(_mock("/kept"))
+    gone = await a.create_mock(_mock("/gone"))
+    await b.sync()
+    assert b.reloads == 1 and b.version == 3
+    # B não está inscrito no canal: os avisos destas escritas se perdem
+    added = await a.create_mock(_mock("/added"))
+    await a.delete_mock(gone.id)
+    assert b.version == 3 and b.snapshot().record(added.id) is None
+    await b.sync()  # o que a conferência periódica faria
+    assert b.version == a.version == 5
+    assert b.reloads == 1 and b.syncs == 1
+    assert _ids(b) == sorted([kept.id, added.id])
@@ -0,0 +1,68 @@
+"""Índice de rotas: grupos com índice de corpo montado junto com o snapshot e match exact pelo `==` do Python."""
+from __future__ import annotations
+import pytest
+from app.core.request_context import RequestContext
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.storage.memory import InMemoryStore, match_request
+from app.storage.route_index import BODY_INDEX_MIN, BodyIndex
+
+pytestmark = pytest.mark.anyio
+
+def _mock(body, status: int = 200, priority: int = 0, **request) -> MockCreate:
+    return MockCreate(scenario_basepath="/s", priority=priority, request=MockRequestMatch(method="POST", uri="/orders", body=body, **request),
+                      response=MockResponse(status_code=status))
+
+async def _store(*mocks: MockCreate) -> InMemoryStore:
+    store = InMemoryStore()
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    for m in mocks: await store.create_mock(m)
+    return store
+
+async def _status(store: InMemoryStore, body) -> int:
+    match = await match_request(store.snapshot(), RequestContext.from_parts("POST", "/s/orders", {}, {}, body))
+    return match[0].response.status_code if match else 404
+
+def _group(store: InMemoryStore):
+    [group] = store.snapshot().candidate_groups("/s", "POST", "/orders")
+    return group
+
+async def test_body_index_is_built_with_the_snapshot():
+    store = await _store(*(_mock({"n": i}, 200 + i) for i in range(BODY_INDEX_MIN)))
+    group = _group(store)
+    assert isinstance(group.index, BodyIndex) and group.indexed and len(group.index.by_sig) == BODY_INDEX_MIN
+    index = group.index
+    assert await _status(store, {"n": 3}) == 203 and await _status(store, {"n": 99}) == 404
+    assert group.index is index  # leitura não altera o snapshot
+    # o próximo snapshot traz o seu próprio índice; o anterior fica como estava
+    await store.create_mock(_mock({"n": 100}, 299))
+    assert _group(store).index is not index and len(_group(store).index.by_sig) == BODY_INDEX_MIN + 1
+    assert len(index.by_sig) == BODY_INDEX_MIN
+
+async def test_small_groups_are_not_indexed():
+    store = await _store(*(_mock({"n": i}, 200 + i) for i in range(BODY_INDEX_MIN - 1)))
+    assert not _group(store).indexed
+    assert await _status(store, {"n": 2}) == 202
+
+@pytest.mark.parametrize("count", [1, BODY_INDEX_MIN])  # varredura e busca por hash
+async def test_exact_body_follows_python_equality(count):
+    mocks = [_mock({"flag": True, "qty": 2.0, "tags": [False]}, 201)] + [_mock({"n": i}) for i in range(count - 1)]
+    store = await _store(*mocks)
+    for body in ({"flag": True, "qty": 2, "tags": [False]}, {"tags": [0], "qty": 2.0, "flag": 1}, {"flag": 1.0, "qty": 2, "tags": [0.0]}):
+        assert await _status(store, body) == 201, body
+    assert await _status(store, {"flag": True, "qty": 2, "tags": [True]}) == 404
+    assert await _status(store, {"flag": "true", "qty": 2, "tags": [False]}) == 404
+
+async def test_bodies_equal_by_python_equality_are_duplicates():
+    store = await _store(_mock({"active": True}))
+    with pytest.raises(FileExistsError):
+        await store.create_mock(_mock({"active": 1}))
+    await store.create_mock(_mock({"active": 2}))
+
+async def test_indexed_lookup_keeps_priority_order():
+    mocks = [_mock({"n": i}, 200 + i) for i in range(BODY_INDEX_MIN)]
+    mocks.append(_mock({"n": 1}, 260, priority=1, body_match="partial"))
+    mocks.append(_mock({"n": 2}, 270, priority=-1, body_match="partial"))
+    store = await _store(*mocks)
+    assert _group(store).indexed and len(_group(store).index.others) == 2
+    assert await _status(store, {"n": 1}) == 260  # partial com prioridade maior vence o exact
+    assert await _status(store, {"n": 2}) == 202  # exact com prioridade maior vence o partial
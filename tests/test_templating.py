@@ -0,0 +1,99 @@
+"""Templates de corpo compilados (app.core.templating): trechos estáticos + slots, corpo lido só quando preciso, valores ausentes ou não JSON."""
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+import pytest
+from app.core.request_context import RequestContext
+from app.core.responses import EncodedResponse, render_body
+from app.core.templating import check_template, compile_placeholder
+from app.models import MockCreate, MockRequestMatch, MockResponse, ScenarioCreate
+from app.routers.catch_all import pick_response_for_mock
+from app.storage.memory import InMemoryStore
+
+pytestmark = pytest.mark.anyio
+
+def _plan(body, media_type: str = "application/json"):
+    return EncodedResponse(MockResponse(body=body, media_type=media_type, template=True)).template
+
+def _ctx(query=None, headers=None, body=None, content_type: str = "application/json") -> RequestContext:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if body is not None: raw.append((b"content-type", content_type.encode()))
+    qs = "&".join(f"{k}={v}" for k, v in (query or {}).items()).encode()
+    async def load(): return body if body is not None else b""
+    return RequestContext("GET", "/x", raw, qs, load)
+
+async def _render(plan, ctx=None, path=None, jwt=None) -> bytes:
+    ctx = ctx or _ctx()
+    if plan.needs_body: await ctx.load_body()
+    return plan.render(ctx, path or {}, {"header": {}, "payload": jwt or {}})
+
+async def test_static_segments_are_the_pre_encoded_bytes():
+    body = {"id": "{{path.id}}", "greeting": "olá {{query.name}}!", "fixed": {"n": 1, "s": "ç"}, "list": [1, "{{query.n}}"]}
+    plan = _plan(body)
+    assert len(plan.slots) == 3 and len(plan.statics) == 4 and not plan.needs_body
+    out = await _render(plan, _ctx(query={"name": "ana", "n": "7"}), path={"id": "42"})
+    assert json.loads(out) == {"id": "42", "greeting": "olá ana!", "fixed": {"n": 1, "s": "ç"}, "list": [1, "7"]}
+    # trocando os placeholders pelos valores, os bytes são os da resposta estática
+    literal = {"id": "42", "greeting": "olá ana!", "fixed": {"n": 1, "s": "ç"}, "list": [1, "7"]}
+    assert out == render_body(MockResponse(body=literal))
+
+async def test_whole_placeholder_keeps_the_json_type():
+    plan = _plan({"sub": "{{jwt.sub}}", "age": "{{jwt.profile.age}}", "roles": "{{jwt.roles}}", "text": "age={{jwt.profile.age}}"})
+    out = json.loads(await _render(plan, jwt={"sub": "u1", "profile": {"age": 30}, "roles": ["a", "b"]}))
+    assert out == {"sub": "u1", "age": 30, "roles": ["a", "b"], "text": "age=30"}
+
+async def test_missing_values():
+    plan = _plan({"q": "{{query.absent}}", "h": "{{header.X_Absent}}", "deep": "{{jwt.a.b.c}}", "text": "[{{query.absent}}]"})
+    out = json.loads(await _render(plan, jwt={"a": "not-a-dict"}))
+    assert out == {"q": None, "h": None, "deep": None, "text": "[]"}
+
+async def test_values_that_are_not_json():
+    when = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    plan = _plan({"at": "{{jwt.at}}", "text": "at {{jwt.at}}"})
+    out = json.loads(await _render(plan, jwt={"at": when}))
+    assert out == {"at": str(when), "text": f"at {when}"}  # serializado como texto, sem 500
+
+async def test_header_placeholder_matches_dashes():
+    plan = _plan({"tenant": "{{header.X_Tenant}}"})
+    assert json.loads(await _render(plan, _ctx(headers={"X-Tenant": "acme"}))) == {"tenant": "acme"}
+
+async def test_jsonpath_needs_body():
+    plan = _plan({"sku": "{{jsonpath('$.items[0].sku')}}", "all": "{{jsonpath('$')}}"})
+    assert plan.needs_body
+    out = json.loads(await _render(plan, _ctx(body=b'{"items": [{"sku": "A1"}]}')))
+    assert out == {"sku": "A1", "all": {"items": [{"sku": "A1"}]}}
+    # corpo que não é JSON: o caminho não acha nada e `$` é o texto
+    out = json.loads(await _render(plan, _ctx(body=b"{not json", content_type="application/json")))
+    assert out == {"sku": None, "all": "{not json"}
+    out = json.loads(await _render(plan, _ctx(body=b"plain", content_type="text/plain")))
+    assert out == {"sku": None, "all": "plain"}
+
+async def test_text_template():
+    plan = _plan("Olá {{query.name}}, pedido {{path.id}}.", media_type="text/plain")
+    assert await _render(plan, _ctx(query={"name": "Ana"}), path={"id": "9"}) == "Olá Ana, pedido 9.".encode()
+    assert await _render(plan) == "Olá , pedido .".encode()
+
+async def _record(body) -> object:
+    store = InMemoryStore()
+    await store.create_scenario(ScenarioCreate(basepath="/s"))
+    m = await store.create_mock(MockCreate(scenario_basepath="/s", request=MockRequestMatch(method="POST", uri="/t"),
+                                           response=MockResponse(body=body, template=True)))
+    return store.snapshot().record(m.id)
+
+@pytest.mark.parametrize("body, reads", [({"q": "{{query.q}}"}, 0), ({"v": "{{jsonpath('$.v')}}"}, 1)])
+async def test_body_is_read_only_when_the_template_needs_it(body, reads):
+    record = await _record(body)
+    calls = []
+    async def load():
+        calls.append(1); return b'{"v": 5}'
+    ctx = RequestContext("POST", "/s/t", [(b"content-type", b"application/json")], b"q=1", load)
+    rendered = await pick_response_for_mock(record, ctx, path_params={}, jwt_ctx={"header": {}, "payload": {}})
+    assert len(calls) == reads and ctx.body_loaded == bool(reads)
+    assert json.loads(rendered.identity.body) == ({"q": "1"} if not reads else {"v": 5})
+
+@pytest.mark.parametrize("expr", ["nope", "query", "jsonpath($.a)", "randint(5,1)", "randint(a,b)", "upper('x')", "jsonpath('$.[')"])
+def test_invalid_placeholders_are_rejected(expr):
+    with pytest.raises(ValueError):
+        compile_placeholder(expr)
+    with pytest.raises(ValueError):
+        check_template({"a": ["x", f"{{{{{expr}}}}}"]})